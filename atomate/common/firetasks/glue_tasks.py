@@ -5,12 +5,13 @@ import os
 import monty
 import shutil
 import glob
+import time
 
 from fireworks import explicit_serialize, FiretaskBase, FWAction
 
 from atomate.utils.utils import env_chk, load_class, recursive_get_result
-from atomate.utils.fileio import FileClient
-from monty.shutil import copy_r, gzip_dir
+from atomate.utils.fileio import FileClient, DEFAULT_TRANSFER_WORKERS, compress_dir
+from monty.shutil import copy_r
 
 __author__ = "Anubhav Jain"
 __email__ = "ajain@lbl.gov"
@@ -133,22 +134,27 @@ class CopyFilesFromCalcLoc(FiretaskBase):
             return
         else:
             files_to_copy = []
-            for fname in filenames:
-                for f in glob.glob(os.path.join(calc_dir, fname)):
+            for f in fileclient.glob_many(
+                [os.path.join(calc_dir, fname) for fname in filenames]
+            ):
+                if os.path.basename(f) not in files_to_copy:
                     files_to_copy.append(os.path.basename(f))
 
         # delete any excluded files
-        for fname in exclude_files:
-            for f in glob.glob(os.path.join(calc_dir, fname)):
-                if os.path.basename(f) in files_to_copy:
-                    files_to_copy.remove(os.path.basename(f))
+        for f in fileclient.glob_many(
+            [os.path.join(calc_dir, fname) for fname in exclude_files]
+        ):
+            if os.path.basename(f) in files_to_copy:
+                files_to_copy.remove(os.path.basename(f))
 
+        transfers = []
         for f in files_to_copy:
             prev_path_full = os.path.join(calc_dir, f)
             dest_fname = self.get("name_prepend", "") + f + self.get("name_append", "")
             dest_path = os.path.join(os.getcwd(), dest_fname)
+            transfers.append((prev_path_full, dest_path))
 
-            fileclient.copy(prev_path_full, dest_path)
+        fileclient.transfer(transfers)
 
 
 @explicit_serialize
@@ -310,6 +316,13 @@ class CopyFiles(FiretaskBase):
             (e.g., rename 'INCAR' to 'INCAR.precondition')
         continue_on_missing(bool): Whether to continue copying when a file
             in filenames is missing. Defaults to False.
+        nworkers (int): maximum number of files copied concurrently.
+            Defaults to 4.
+        link_mode (str): if "reflink" or "hardlink", link the files instead of
+            copying them when source and destination are on the same
+            filesystem. Hard links share their content with the source, so
+            only use them for files that will not be modified in place.
+            Defaults to None (always copy).
     """
 
     optional_params = [
@@ -320,6 +333,8 @@ class CopyFiles(FiretaskBase):
         "exclude_files",
         "suffix",
         "continue_on_missing",
+        "nworkers",
+        "link_mode",
     ]
 
     def setup_copy(
@@ -370,20 +385,25 @@ class CopyFiles(FiretaskBase):
     def copy_files(self):
         """
         Defines the copy operation. Override this to customize copying.
+
+        Returns:
+            list of dicts with the statistics of each transfer
         """
+        transfers = []
         for f in self.files_to_copy:
             prev_path_full = os.path.join(self.from_dir, f)
             if self.suffix:
                 dest_path = os.path.join(self.to_dir, f, self.suffix)
             else:
                 dest_path = os.path.join(self.to_dir, f)
-            try:
-                self.fileclient.copy(prev_path_full, dest_path)
-            except FileNotFoundError as exc:
-                if continue_on_missing:
-                    continue
-                else:
-                    raise exc
+            transfers.append((prev_path_full, dest_path))
+
+        return self.fileclient.transfer(
+            transfers,
+            nworkers=self.get("nworkers", DEFAULT_TRANSFER_WORKERS),
+            link_mode=self.get("link_mode", None),
+            skip_missing=self.continue_on_missing,
+        )
 
     def run_task(self, fw_spec):
         self.setup_copy(
@@ -394,20 +414,41 @@ class CopyFiles(FiretaskBase):
             exclude_files=self.get("exclude_files", []),
             suffix=self.get("suffix", None),
             fw_spec=fw_spec,
+            continue_on_missing=self.get("continue_on_missing", False),
         )
-        self.copy_files()
+        transfer_stats = self.copy_files()
+        return FWAction(stored_data={"transfer_stats": transfer_stats})
 
 
 @explicit_serialize
 class GzipDir(FiretaskBase):
     """
-    Task to gzip the current directory.
+    Task to gzip the current directory. Files are compressed concurrently and
+    the time spent is recorded in the stored_data of the FWAction.
 
+    Optional params:
+        compression_rules (list): list of [pattern, codec, level] used to
+            choose how each file is compressed. The first rule whose pattern
+            matches the file name is used, files matching no rule are left
+            untouched. Codec can be "gzip", "bz2" or "xz"; note that most
+            tasks only read gzipped files. Defaults to
+            atomate.utils.fileio.DEFAULT_COMPRESSION_RULES, i.e. gzip with a
+            fast level for WAVECAR and charge densities and the best level
+            for the xml outputs.
+        nworkers (int): number of files compressed concurrently. Defaults to
+            the number of cpus.
     """
 
     required_params = []
-    optional_params = []
+    optional_params = ["compression_rules", "nworkers"]
 
     def run_task(self, fw_spec=None):
         cwd = os.getcwd()
-        gzip_dir(cwd)
+        start = time.time()
+        file_stats = compress_dir(
+            cwd,
+            rules=self.get("compression_rules", None),
+            nworkers=self.get("nworkers", None),
+        )
+        gzip_stats = {"time": time.time() - start, "files": file_stats}
+        return FWAction(stored_data={"gzip_stats": gzip_stats})
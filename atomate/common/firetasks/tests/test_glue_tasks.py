@@ -8,6 +8,7 @@ from atomate.common.firetasks.glue_tasks import (
     CreateFolder,
     DeleteFiles,
     DeleteFilesPrevFolder,
+    GzipDir,
 )
 from atomate.utils.testing import AtomateTest
 from atomate.vasp.firetasks.glue_tasks import CopyVaspOutputs
@@ -253,6 +254,33 @@ class TestCreateFolder(AtomateTest):
         )
 
 
+class TestGzipDir(AtomateTest):
+    def setUp(self):
+        super(TestGzipDir, self).setUp(lpad=False)
+
+    def test_gzipdir(self):
+        for f in ["WAVECAR", "vasprun.xml", "OUTCAR", "CHGCAR.gz"]:
+            with open(f, "w") as fout:
+                fout.write(f * 1000)
+        os.makedirs("subdir")
+
+        action = GzipDir(
+            compression_rules=[["OUTCAR", "bz2", 9], ["WAVECAR", "gzip", 1]]
+        ).run_task({})
+        self.assertEqual(
+            sorted(os.listdir(".")),
+            ["CHGCAR.gz", "OUTCAR.bz2", "WAVECAR.gz", "subdir", "vasprun.xml"],
+        )
+        stats = action.stored_data["gzip_stats"]
+        self.assertEqual(len(stats["files"]), 2)
+        self.assertGreaterEqual(stats["time"], 0)
+
+        action = GzipDir().run_task({})
+        self.assertTrue(os.path.exists("vasprun.xml.gz"))
+        self.assertEqual(action.stored_data["gzip_stats"]["files"][0]["level"], 9)
+        self.assertTrue(os.path.exists("OUTCAR.bz2"))
+
+
 class TestCopyFilesFromCalcLoc(AtomateTest):
     @classmethod
     def setUpClass(cls):
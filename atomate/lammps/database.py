@@ -5,8 +5,13 @@
 This module defines the database classes.
 """
 
+import zlib
+
+import gridfs
+import numpy as np
 import pymongo
 
+from atomate.lammps.utils import iter_dump_chunks
 from atomate.utils.database import CalcDb
 from atomate.utils.utils import get_logger
 
@@ -31,8 +36,134 @@ class LammpsCalcDb(CalcDb):
         for i in indexes:
             self.collection.create_index(i, background=background)
 
+    def insert_task(self, task_doc, use_gridfs=True, chunk_size=100):
+        """
+        Insert a task document (e.g., as returned by LammpsDrone.assimilate())
+        into the database. The trajectories of the dumps summarized in
+        output.dumps are streamed into the "dumps_fs" GridFS collection and
+        referenced by their fs_id.
+
+        Args:
+            task_doc (dict): the task document
+            use_gridfs (bool): store the dump trajectories in GridFS.
+            chunk_size (int): number of frames read and compressed at once.
+
+        Returns:
+            (int) - task_id of inserted document
+        """
+        if use_gridfs:
+            for dump in task_doc.get("output", {}).get("dumps", []):
+                dump["fs_id"] = self.insert_dump(dump["path"], chunk_size=chunk_size,
+                                                 dir_name=task_doc["dir_name"])
+                dump["compression"] = "zlib"
+        return self.insert(task_doc)
+
+    def insert_dump(self, filename, chunk_size=100, dir_name=None):
+        """
+        Stream the frames of a LAMMPS dump file into GridFS. The numeric atom
+        data of all the frames is stored as a single zlib compressed float64
+        array; the timesteps, number of atoms, boxes and column names needed to
+        rebuild the trajectory are stored in the metadata. The non-numeric
+        atom attributes (e.g. element) are only stored for the first frame, in
+        the metadata.
+
+        Args:
+            filename (str): path to the dump file
+            chunk_size (int): number of frames read and compressed at once.
+            dir_name (str): directory of the calculation, stored in the
+                metadata.
+
+        Returns:
+            file id
+        """
+        fs = gridfs.GridFS(self.db, "dumps_fs")
+        compressor = zlib.compressobj()
+        metadata = {"compression": "zlib", "dtype": "float64", "dir_name": dir_name,
+                    "timesteps": [], "natoms": [], "boxes": [], "columns": None,
+                    "string_data": None}
+        with fs.new_file(metadata=metadata) as grid_in:
+            for chunk in iter_dump_chunks(filename, chunk_size=chunk_size):
+                for frame in chunk:
+                    metadata["timesteps"].append(frame["timestep"])
+                    metadata["natoms"].append(frame["natoms"])
+                    metadata["boxes"].append(frame["box"].tolist())
+                    metadata["columns"] = frame["columns"]
+                    if metadata["string_data"] is None:
+                        metadata["string_data"] = frame["string_data"]
+                data = np.concatenate([frame["data"] for frame in chunk])
+                grid_in.write(compressor.compress(data.astype(np.float64).tobytes()))
+            grid_in.write(compressor.flush())
+            # the metadata is only written to the files collection on close
+            grid_in.metadata = metadata
+        return grid_in._id
+
+    def iter_dump(self, fs_id, start=0, stop=None):
+        """
+        Iterate over the frames of a dump trajectory stored with insert_dump,
+        decompressing it as it is read from GridFS, so that the whole
+        trajectory is never held in memory.
+
+        Args:
+            fs_id: file id of the dump
+            start (int): index of the first frame
+            stop (int): index after the last frame. Default: all the frames
+
+        Yields:
+            dict with the "timestep", "box", "columns" and "data" (natoms x
+            ncolumns array) of each frame.
+        """
+        grid_out = gridfs.GridFS(self.db, "dumps_fs").get(fs_id)
+        metadata = grid_out.metadata
+        dtype = np.dtype(metadata["dtype"])
+        frame_sizes = [n * len(metadata["columns"]) * dtype.itemsize
+                       for n in metadata["natoms"]]
+        stop = len(frame_sizes) if stop is None else min(stop, len(frame_sizes))
+        decompressor = zlib.decompressobj()
+        buffer = bytearray()
+        for i in range(stop):
+            while len(buffer) < frame_sizes[i]:
+                compressed = grid_out.read(grid_out.chunk_size)
+                if not compressed:
+                    buffer += decompressor.flush()
+                    break
+                buffer += decompressor.decompress(compressed)
+            if len(buffer) < frame_sizes[i]:
+                raise ValueError("Truncated dump trajectory {}".format(fs_id))
+            if i >= start:
+                data = np.frombuffer(bytes(buffer[:frame_sizes[i]]), dtype=dtype)
+                yield {"timestep": metadata["timesteps"][i],
+                       "box": np.array(metadata["boxes"][i]),
+                       "columns": metadata["columns"],
+                       "data": data.reshape(-1, len(metadata["columns"]))}
+            del buffer[:frame_sizes[i]]
+
+    def get_dump(self, fs_id, start=0, stop=None):
+        """
+        Read a range of frames of a dump trajectory stored with insert_dump.
+        Use iter_dump to process long trajectories frame by frame.
+
+        Args:
+            fs_id: file id of the dump
+            start (int): index of the first frame
+            stop (int): index after the last frame. Default: all the frames
+
+        Returns:
+            dict with the "timesteps", "boxes", "columns", "string_data" (of
+            the first frame) and "frames", the list of the natoms x ncolumns
+            arrays of each frame.
+        """
+        metadata = gridfs.GridFS(self.db, "dumps_fs").get(fs_id).metadata
+        frames = list(self.iter_dump(fs_id, start=start, stop=stop))
+        return {"timesteps": [f["timestep"] for f in frames],
+                "columns": metadata["columns"],
+                "string_data": metadata.get("string_data"),
+                "boxes": [f["box"] for f in frames],
+                "frames": [f["data"] for f in frames]}
+
     def reset(self):
         self.collection.delete_many({})
         self.db.counter.delete_one({"_id": "taskid"})
         self.db.counter.insert_one({"_id": "taskid", "c": 0})
+        self.db.dumps_fs.files.delete_many({})
+        self.db.dumps_fs.chunks.delete_many({})
         self.build_indexes()
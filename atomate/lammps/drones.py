@@ -12,6 +12,7 @@ from pymatgen.apps.borg.hive import AbstractDrone
 # from pymatgen.io.lammps.output import LammpsLog, LammpsDump, LammpsRun
 # from pymatgen.io.lammps.sets import LammpsInputSet
 
+from atomate.lammps.utils import get_dump_summary
 from atomate.utils.utils import get_uri
 
 from atomate.utils.utils import get_logger
@@ -24,7 +25,9 @@ logger = get_logger(__name__)
 
 class LammpsDrone(AbstractDrone):
 
-    __version__ = 0.1
+    # 0.2: output.dumps is a list of dump summaries (see generate_doc), no
+    # longer a dict of the full dumps keyed by filename
+    __version__ = 0.2
 
     schema = {
         "root": {"schema", "dir_name", "input", "output", "last_updated", "state", "completed_at"}
@@ -70,11 +73,12 @@ class LammpsDrone(AbstractDrone):
         # input set
         lmps_input = LammpsInputSet.from_file("lammps", input_file, {}, data_file, data_filename)
 
-        # dumps
+        # dumps: only a summary is computed here by streaming the frames, the
+        # trajectories are stored separately by LammpsCalcDb.insert_task
         dumps = []
         if dump_files:
             for df in dump_files:
-                dumps.append((df, LammpsDump.from_file(os.path.join(path, df))))
+                dumps.append((df, get_dump_summary(os.path.join(path, df))))
 
         # log
         log = LammpsLog(log_file=log_file)
@@ -112,10 +116,16 @@ class LammpsDrone(AbstractDrone):
             dir_name (str): path to the run dir.
             lmps_input (LammpsInput/LammpsInputSet):
             log (LammpsLog):
-            dumps ([(filename, LammpsDump)]): list of (dump filename, dump) tuples
+            dumps ([(filename, dict)]): list of (dump filename, dump summary)
+                tuples, see atomate.lammps.utils.get_dump_summary
 
         Returns:
-            dict
+            dict. Since schema version 0.2, output.dumps is a list with the
+            filename, absolute path and summary of each dump instead of a dict
+            of the full dumps keyed by filename (filenames with dots are not
+            valid MongoDB keys). The trajectories are stored in GridFS by
+            LammpsCalcDb.insert_task, under the fs_id key of each dump;
+            without a database they stay in the dump files.
         """
         try:
             fullpath = os.path.abspath(dir_name)
@@ -128,7 +138,10 @@ class LammpsDrone(AbstractDrone):
             d["last_updated"] = datetime.utcnow()
             d["input"] = lmps_input.as_dict()
             d["output"] = {"log": log.as_dict()}
-            d["output"]["dumps"] = dict([(dump_fname, dmp.as_dict()) for dump_fname, dmp in dumps])
+            d["output"]["dumps"] = [
+                dict(filename=dump_fname, path=os.path.abspath(os.path.join(dir_name, dump_fname)),
+                     **summary)
+                for dump_fname, summary in dumps]
             return d
 
         except:
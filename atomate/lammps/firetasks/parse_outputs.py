@@ -46,13 +46,20 @@ class LammpsToDB(FiretaskBase):
         dump_filenames:
         diffusion_params
         additional_fields:
+        use_gridfs (bool): store the dump trajectories as compressed arrays in
+            GridFS. Only their summary is stored in the task doc. Without
+            db_file, the task doc is written to task.json and the trajectories
+            stay in the dump files, whose paths are in output.dumps.
+            Default: True
+        dump_chunk_size (int): number of dump frames read and compressed at
+            once when storing the trajectories. Default: 100
     """
 
     required_params = ["input_filename"]
 
     optional_params = ["calc_dir", "calc_loc", "db_file", "fw_spec_field",
                        "data_filename", "log_filename", "dump_filenames", "diffusion_params",
-                       "additional_fields"]
+                       "additional_fields", "use_gridfs", "dump_chunk_size"]
 
     def run_task(self, fw_spec):
 
@@ -88,7 +95,8 @@ class LammpsToDB(FiretaskBase):
         else:
             mmdb = LammpsCalcDb.from_db_file(db_file)
             # insert the task document
-            t_id = mmdb.insert(task_doc)
+            t_id = mmdb.insert_task(task_doc, use_gridfs=self.get("use_gridfs", True),
+                                    chunk_size=self.get("dump_chunk_size", 100))
             logger.info("Finished parsing with task_id: {}".format(t_id))
 
         return FWAction(stored_data={"task_id": task_doc.get("task_id", None)})
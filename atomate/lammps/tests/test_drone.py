@@ -1,13 +1,17 @@
 # coding: utf-8
 
 import os
+import shutil
+import tempfile
 import unittest
 
 # from pymatgen.io.lammps.sets import LammpsInputSet
 # from pymatgen.io.lammps.output import LammpsLog
 
 from atomate.utils.testing import AtomateTest
+from atomate.lammps.database import LammpsCalcDb
 from atomate.lammps.drones import LammpsDrone
+from atomate.lammps.utils import get_dump_summary, iter_dump_chunks, iter_dump_frames
 
 __author__ = 'Kiran Mathew'
 __email__ = 'kmathew@lbl.gov'
@@ -46,5 +50,68 @@ class TestLammpsDrone(AtomateTest):
         self.assertEqual(lmps_output.as_dict()['thermo_data']['enthalpy'], enthalpy)
 
 
+class TestDumpSummary(unittest.TestCase):
+
+    def setUp(self):
+        self.dump_file = os.path.join(module_dir, "test_files", "peo.dump")
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+
+    def test_iter_dump_chunks(self):
+        chunks = list(iter_dump_chunks(self.dump_file, chunk_size=1))
+        self.assertEqual(len(chunks), 2)
+        frame = chunks[1][0]
+        self.assertEqual(frame["timestep"], 1000)
+        self.assertEqual(frame["data"].shape, (144, 9))
+        self.assertEqual(frame["columns"][:5], ["id", "type", "x", "y", "z"])
+
+    def test_get_dump_summary(self):
+        summary = get_dump_summary(self.dump_file)
+        self.assertEqual(summary["nframes"], 2)
+        self.assertEqual(summary["natoms"], 144)
+        self.assertEqual(summary["timesteps"], [0, 1000])
+        self.assertEqual(summary["first_box"], [[0, 22], [0, 26], [0, 28]])
+        self.assertEqual(summary["stats"]["id"]["min"], 1)
+        self.assertEqual(summary["stats"]["id"]["max"], 144)
+        self.assertAlmostEqual(summary["stats"]["id"]["mean"], 72.5)
+
+    def test_string_columns(self):
+        # e.g. "dump custom" with the element of each atom
+        with open(os.path.join(self.tmp_dir, "element.dump"), "w") as f:
+            for timestep in [0, 10]:
+                f.write("ITEM: TIMESTEP\n{}\nITEM: NUMBER OF ATOMS\n2\n".format(timestep))
+                f.write("ITEM: BOX BOUNDS pp pp pp\n0 5\n0 5\n0 5\n")
+                f.write("ITEM: ATOMS id element x y z\n1 O 0.0 0.0 0.0\n2 H 1.0 0.0 0.0\n")
+        frames = list(iter_dump_frames(os.path.join(self.tmp_dir, "element.dump")))
+        self.assertEqual(len(frames), 2)
+        self.assertEqual(frames[1]["columns"], ["id", "x", "y", "z"])
+        self.assertEqual(frames[1]["data"].shape, (2, 4))
+        self.assertEqual(frames[1]["string_data"], {"element": ["O", "H"]})
+        summary = get_dump_summary(os.path.join(self.tmp_dir, "element.dump"))
+        self.assertEqual(summary["string_columns"], ["element"])
+        self.assertEqual(summary["stats"]["x"]["max"], 1)
+
+
+class TestDumpGridFS(AtomateTest):
+
+    def setUp(self):
+        super(TestDumpGridFS, self).setUp()
+        self.dump_file = os.path.join(module_dir, "test_files", "peo.dump")
+        self.mmdb = LammpsCalcDb.from_db_file(os.path.join(db_dir, "db.json"))
+
+    def test_get_dump(self):
+        fs_id = self.mmdb.insert_dump(self.dump_file, chunk_size=1)
+        frames = list(iter_dump_frames(self.dump_file))
+        dump = self.mmdb.get_dump(fs_id)
+        self.assertEqual(dump["timesteps"], [0, 1000])
+        for frame, data in zip(frames, dump["frames"]):
+            self.assertTrue((frame["data"] == data).all())
+        # only the requested frames are decompressed
+        dump = self.mmdb.get_dump(fs_id, start=1)
+        self.assertEqual(dump["timesteps"], [1000])
+        self.assertTrue((dump["frames"][0] == frames[1]["data"]).all())
+        self.assertEqual([f["timestep"] for f in self.mmdb.iter_dump(fs_id, stop=1)], [0])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,15 +1,154 @@
 # coding: utf-8
 
 
+import numpy as np
+
+from monty.io import zopen
+
 from atomate.lammps.firetasks.run_calc import RunLammpsFake
+from atomate.utils.utils import get_fws_and_tasks
 
 __author__ = 'Kiran Mathew'
 __email__ = "kmathew@lbl.gov"
 
 
 def use_fake_lammps(original_wf, ref_dir):
-    for idx_fw, fw in enumerate(original_wf.fws):
-        for idx_t, t in enumerate(fw.tasks):
-            if "RunLammps" in str(t):
-                original_wf.fws[idx_fw].tasks[idx_t] = RunLammpsFake(ref_dir=ref_dir)
+    for idx_fw, idx_t in get_fws_and_tasks(original_wf, task_name_constraint="RunLammps"):
+        original_wf.fws[idx_fw].tasks[idx_t] = RunLammpsFake(ref_dir=ref_dir)
     return original_wf
+
+
+def iter_dump_frames(filename):
+    """
+    Iterate over the frames of a LAMMPS text dump file without loading the
+    whole file in memory. Gzipped files are supported.
+
+    Args:
+        filename (str): path to the dump file
+
+    Yields:
+        dict with the "timestep", "natoms", "box" (3x2 or 3x3 array of the
+        box bounds), "box_header" (e.g. "pp pp pp"), "columns" (names of the
+        numeric atom attributes), "data" (natoms x ncolumns float array) and
+        "string_data" (lists of the values of the non-numeric atom attributes,
+        e.g. element, by name) of each frame.
+    """
+    with zopen(filename, "rt") as f:
+        for line in f:
+            if not line.startswith("ITEM: TIMESTEP"):
+                continue
+            timestep = int(f.readline())
+            f.readline()  # ITEM: NUMBER OF ATOMS
+            natoms = int(f.readline())
+            box_header = f.readline().replace("ITEM: BOX BOUNDS", "").strip()
+            box = np.array([f.readline().split() for _ in range(3)], dtype=float)
+            all_columns = f.readline().split()[2:]
+            tokens = np.array([f.readline().split() for _ in range(natoms)], dtype=str)
+            tokens = tokens.reshape(natoms, len(all_columns))
+            columns, numeric, string_data = [], [], {}
+            for i, c in enumerate(all_columns):
+                try:
+                    numeric.append(tokens[:, i].astype(float))
+                    columns.append(c)
+                except ValueError:
+                    string_data[c] = tokens[:, i].tolist()
+            data = np.column_stack(numeric) if numeric else np.empty((natoms, 0))
+            yield {"timestep": timestep, "natoms": natoms,
+                   "box": box, "box_header": box_header,
+                   "columns": columns, "data": data.reshape(natoms, len(columns)),
+                   "string_data": string_data}
+
+
+def iter_dump_chunks(filename, chunk_size=100):
+    """
+    Iterate over the frames of a LAMMPS text dump file by chunks.
+
+    Args:
+        filename (str): path to the dump file
+        chunk_size (int): maximum number of frames per chunk
+
+    Yields:
+        list of frames, see iter_dump_frames
+    """
+    chunk = []
+    for frame in iter_dump_frames(filename):
+        chunk.append(frame)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class DumpSummary(object):
+    """
+    Summary statistics of a LAMMPS dump trajectory, accumulated frame by
+    frame: timesteps, number of atoms, first and last box and the min, max and
+    mean of each numeric atom attribute over all the frames.
+    """
+
+    def __init__(self):
+        self.timesteps = []
+        self.natoms = []
+        self.columns = None
+        self.string_columns = None
+        self.box_header = None
+        self.first_box = None
+        self.last_box = None
+        self._min = None
+        self._max = None
+        self._sum = None
+
+    def add_frame(self, frame):
+        if self.columns is None:
+            self.columns = frame["columns"]
+            self.string_columns = sorted(frame["string_data"])
+            self.box_header = frame["box_header"]
+            self.first_box = frame["box"]
+        elif frame["columns"] != self.columns:
+            raise ValueError("The atom attributes of the dump changed at timestep {}"
+                             .format(frame["timestep"]))
+        self.timesteps.append(frame["timestep"])
+        self.natoms.append(frame["natoms"])
+        self.last_box = frame["box"]
+        data = frame["data"]
+        if not len(data):
+            return
+        if self._sum is None:
+            self._min, self._max, self._sum = data.min(0), data.max(0), data.sum(0)
+        else:
+            self._min = np.minimum(self._min, data.min(0))
+            self._max = np.maximum(self._max, data.max(0))
+            self._sum += data.sum(0)
+
+    def as_dict(self):
+        d = {"nframes": len(self.timesteps), "timesteps": self.timesteps,
+             "columns": self.columns, "string_columns": self.string_columns,
+             "box_header": self.box_header,
+             "first_box": None, "last_box": None, "stats": {}}
+        d["natoms"] = self.natoms[0] if len(set(self.natoms)) == 1 else self.natoms
+        if self.timesteps:
+            d["first_box"] = self.first_box.tolist()
+            d["last_box"] = self.last_box.tolist()
+        if self._sum is not None:
+            mean = self._sum / sum(self.natoms)
+            d["stats"] = {c: {"min": float(self._min[i]), "max": float(self._max[i]),
+                              "mean": float(mean[i])}
+                          for i, c in enumerate(self.columns)}
+        return d
+
+
+def get_dump_summary(filename):
+    """
+    Summary of a LAMMPS dump file, computed by streaming the frames.
+
+    Args:
+        filename (str): path to the dump file
+
+    Returns:
+        dict, see DumpSummary
+    """
+    summary = DumpSummary()
+    for frame in iter_dump_frames(filename):
+        summary.add_frame(frame)
+    return summary.as_dict()
@@ -23,7 +23,7 @@ def use_fake_qchem(original_wf, ref_dirs, input_file="mol.qin"):
         for job_type in ref_dirs.keys():
             if job_type == fw.name:
                 for idx_t, t in enumerate(fw.tasks):
-                    if "RunQChemCustodian" in str(t) or "RunQChemDirect" in str(t):
+                    if "RunQChemCustodian" in t.fw_name or "RunQChemDirect" in t.fw_name:
                         original_wf.fws[idx_fw].tasks[idx_t] = RunQChemFake(ref_dir=ref_dirs[job_type], input_file=input_file)
 
     return original_wf
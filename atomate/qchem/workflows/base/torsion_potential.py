@@ -78,7 +78,7 @@ def get_wf_torsion_potential(molecule,
         db_file=db_file,
         **kwargs)
     for idx_t, t in enumerate(fw1.tasks):
-        if "WriteInputFromIOSet" in str(t):
+        if "WriteInputFromIOSet" in t.fw_name:
             fw1.tasks[idx_t] = WriteCustomInput(molecule=molecule, rem=rem[0])
     fws.append(fw1)
 
@@ -103,7 +103,7 @@ def get_wf_torsion_potential(molecule,
             ang=angle)
         opt = {"CONSTRAINT": [opt_line]}
         for idx_t, t in enumerate(rot_opt_fw.tasks):
-            if "WriteInputFromIOSet" in str(t):
+            if "WriteInputFromIOSet" in t.fw_name:
                 rot_opt_fw.tasks[idx_t] = WriteCustomInput(rem=rem[1], opt=opt)
         fws.append(rot_opt_fw)
 
@@ -0,0 +1,193 @@
+# coding: utf-8
+
+
+import os
+from itertools import accumulate
+from multiprocessing import Process
+
+from pymongo import DESCENDING
+
+from fireworks.core.rocket_launcher import get_fworker, launch_rocket
+from fireworks.fw_config import DS_PASSWORD
+from fireworks.utilities.fw_utilities import DataServer, create_datestamp_dir
+
+from atomate.utils.utils import get_logger
+
+"""
+This module defines a runner that packs several Fireworks in a single
+allocation ("job bundling"), e.g. small calculations that only need a
+fraction of a node. Each Firework is run by its own Rocket, in its own
+launcher directory and process, and is completed or fizzled independently of
+the others. If the number of cores of the allocation is given, they are split
+between the Fireworks: the RunVasp* tasks set the number of ranks of their
+vasp_cmd accordingly (see atomate.vasp.firetasks.run_calc.get_vasp_cmd_nprocs).
+
+Concurrent MPI launches are not placed on distinct cores by default and most
+launchers bind the ranks of each launch starting from the first core, so that
+the sub jobs would overlap. Pass the launcher options placing each sub job on
+its own cores as the placement argument of launch_bundle, e.g.
+"--cpu-set {cpu_set} --bind-to core" for Open MPI mpirun,
+"-genv I_MPI_PIN_PROCESSOR_LIST {cpu_list}" for Intel MPI or "--exclusive" for
+srun (see get_sub_jobs).
+"""
+
+logger = get_logger(__name__)
+
+# sub job of the bundle run by the current process, see get_sub_job
+_sub_job = None
+
+
+def split_cores(ncores, njobs):
+    """
+    Split the cores of an allocation between jobs, as evenly as possible.
+
+    Args:
+        ncores (int): number of cores of the allocation
+        njobs (int): number of jobs
+
+    Returns:
+        [int]: number of cores of each job
+    """
+    if ncores < njobs:
+        raise ValueError("Cannot split {} cores between {} jobs".format(ncores, njobs))
+    return [ncores // njobs + (1 if i < ncores % njobs else 0) for i in range(njobs)]
+
+
+def get_sub_jobs(ncores, njobs, placement=None):
+    """
+    Split the cores of a single-node allocation between jobs.
+
+    Args:
+        ncores (int): number of cores of the allocation
+        njobs (int): number of jobs
+        placement (str): options of the MPI launcher placing a job on its own
+            cores, formatted with nprocs, cpu_set (e.g. "0-7"), cpu_list
+            (e.g. "0,1,2,3,4,5,6,7") and first_cpu. E.g.
+            "--cpu-set {cpu_set} --bind-to core" for Open MPI mpirun,
+            "-genv I_MPI_PIN_PROCESSOR_LIST {cpu_list}" for Intel MPI or
+            "--exclusive" for srun, which places the job steps of an
+            allocation on distinct cores itself (also across nodes).
+
+    Returns:
+        [dict]: nprocs and placement (formatted options, None if no
+            placement is given) of each job
+    """
+    nprocs_list = split_cores(ncores, njobs)
+    sub_jobs = []
+    for nprocs, first_cpu in zip(nprocs_list, accumulate([0] + nprocs_list[:-1])):
+        cpus = list(range(first_cpu, first_cpu + nprocs))
+        sub_jobs.append({
+            "nprocs": nprocs,
+            "placement": placement.format(
+                nprocs=nprocs, first_cpu=first_cpu,
+                cpu_set="{}-{}".format(cpus[0], cpus[-1]),
+                cpu_list=",".join(str(c) for c in cpus)) if placement else None,
+        })
+    return sub_jobs
+
+
+def get_sub_job():
+    """
+    Sub job of the bundle run by the current process, i.e. by a Firework
+    launched by launch_bundle.
+
+    Returns:
+        dict: nprocs and placement of the sub job (see get_sub_jobs), None
+            outside of a bundle or if the bundle does not split the cores
+    """
+    return _sub_job
+
+
+def get_bundle_fw_ids(launchpad, fworker, nbundle, query=None):
+    """
+    Select the ready Fireworks of a bundle, by decreasing priority.
+
+    Args:
+        launchpad (LaunchPad)
+        fworker (FWorker): only the Fireworks matching its query are selected
+        nbundle (int): maximum number of Fireworks
+        query (dict): additional query selecting Fireworks that can share an
+            allocation, e.g. {"spec._category": "small"} or
+            {"name": {"$regex": "elastic deformation"}}
+
+    Returns:
+        [int]: fw_ids
+    """
+    m_query = dict(fworker.query)
+    m_query.update(query or {})
+    m_query["state"] = "READY"
+    return launchpad.get_fw_ids(m_query, sort=[("spec._priority", DESCENDING)],
+                                limit=nbundle)
+
+
+def _run_rocket(port, fworker, fw_id, launcher_dir, sub_job, strm_lvl):
+    global _sub_job
+    # the LaunchPad is shared with the parent process by a DataServer, as in
+    # the job packing mode of FireWorks
+    ds = DataServer(address=("127.0.0.1", port), authkey=DS_PASSWORD)
+    ds.connect()
+    _sub_job = sub_job
+    os.chdir(launcher_dir)
+    launch_rocket(ds.LaunchPad(), fworker, fw_id=fw_id, strm_lvl=strm_lvl)
+
+
+def launch_bundle(launchpad, fworker=None, nbundle=2, ncores=None, query=None,
+                  launch_dir=".", strm_lvl="INFO", placement=None):
+    """
+    Run up to nbundle ready Fireworks concurrently, each with a share of the
+    cores of the allocation.
+
+    Args:
+        launchpad (LaunchPad)
+        fworker (FWorker): FWorker running the Fireworks
+        nbundle (int): maximum number of Fireworks run concurrently
+        ncores (int): number of cores of the allocation, split between the
+            Fireworks. If None, the VASP commands are not modified.
+        query (dict): additional query selecting Fireworks that can share an
+            allocation, see get_bundle_fw_ids
+        launch_dir (str): directory in which the launcher directories are
+            created
+        strm_lvl (str): level at which to output logs to stdout
+        placement (str): options of the MPI launcher placing each Firework
+            on its own cores, added to the VASP commands, see get_sub_jobs.
+            Without them, the concurrent VASP runs may share cores.
+
+    Returns:
+        [dict]: fw_id, state, launch_dir, nprocs and placement of each
+            Firework run
+    """
+    fworker = get_fworker(fworker)
+    fw_ids = get_bundle_fw_ids(launchpad, fworker, nbundle, query)
+    if not fw_ids:
+        logger.info("No ready Firework to bundle")
+        return []
+    sub_jobs = get_sub_jobs(ncores, len(fw_ids), placement) if ncores else [None] * len(fw_ids)
+
+    ds = DataServer.setup(launchpad)
+    try:
+        runs = []
+        processes = []
+        for fw_id, sub_job in zip(fw_ids, sub_jobs):
+            launcher_dir = create_datestamp_dir(os.path.abspath(launch_dir), logger,
+                                                prefix="launcher_")
+            run = {"fw_id": fw_id, "launch_dir": launcher_dir, "nprocs": None,
+                   "placement": None}
+            run.update(sub_job or {})
+            logger.info("Running Firework {} in {} on {} cores".format(
+                fw_id, launcher_dir, run["nprocs"]))
+            p = Process(target=_run_rocket,
+                        args=(ds.address[1], fworker, fw_id, launcher_dir, sub_job, strm_lvl))
+            p.start()
+            processes.append(p)
+            runs.append(run)
+        for p in processes:
+            p.join()
+
+        # the state of each Firework, from the LaunchPad of the DataServer
+        shared_launchpad = ds.LaunchPad()
+        for run in runs:
+            run["state"] = shared_launchpad.get_fw_dict_by_id(run["fw_id"])["state"]
+            logger.info("Firework {}: {}".format(run["fw_id"], run["state"]))
+    finally:
+        ds.shutdown()
+    return runs
@@ -6,16 +6,19 @@ This module defines a base class for derived database classes that store calcula
 """
 
 import datetime
+import hashlib
+import json
 from abc import ABCMeta, abstractmethod
+from collections import OrderedDict
 
 from maggma.stores import MongoStore
 from maggma.stores import S3Store, MongoURIStore
-from monty.json import jsanitize
+from monty.json import jsanitize, MontyDecoder, MontyEncoder
 from monty.serialization import loadfn
 from pymongo import MongoClient, ReturnDocument
 from pymongo.uri_parser import parse_uri
 
-from atomate.utils.utils import get_logger
+from atomate.utils.utils import get_logger, env_chk
 
 __author__ = "Kiran Mathew"
 __credits__ = "Anubhav Jain"
@@ -23,6 +26,17 @@ __email__ = "kmathew@lbl.gov"
 
 logger = get_logger(__name__)
 
+# collection of the objects shared by the fireworks of the workflows
+SHARED_OBJECTS_COLLECTION = "shared_objects"
+# shared objects already loaded or inserted by this process, by key, least
+# recently used first. Since the objects are content addressed, the cache never
+# needs to be invalidated, only bounded for long running processes.
+_shared_objects_cache = OrderedDict()
+SHARED_OBJECTS_CACHE_SIZE = 1000
+# databases storing the shared objects used by this process, by class and db
+# file, so that resolving references does not connect to the database each time
+_shared_objects_dbs = {}
+
 
 class CalcDb(metaclass=ABCMeta):
     def __init__(
@@ -173,6 +187,41 @@ class CalcDb(metaclass=ABCMeta):
             logger.info("Skipping duplicate {}".format(d["dir_name"]))
             return None
 
+    def insert_shared_object(self, obj):
+        """
+        Store an object (e.g. a Structure or a VaspInputSet) in the shared
+        objects collection. Objects are content addressed: the key is the
+        sha256 checksum of their serialized form, so an object referenced by
+        many fireworks is stored only once.
+
+        Args:
+            obj: MSONable object or json serializable data
+
+        Returns:
+            str: the key of the object
+        """
+        obj_json = json.dumps(obj, cls=MontyEncoder, sort_keys=True)
+        key = hashlib.sha256(obj_json.encode()).hexdigest()
+        data = json.loads(obj_json)
+        self.db[SHARED_OBJECTS_COLLECTION].update_one(
+            {"_id": key}, {"$setOnInsert": {"data": data}}, upsert=True
+        )
+        # e.g. for the powerups applied after use_shared_objects
+        _cache_shared_object(key, data)
+        return key
+
+    def get_shared_object(self, key):
+        """
+        Get an object stored with insert_shared_object.
+
+        Args:
+            key (str): the key of the object
+
+        Returns:
+            the decoded object
+        """
+        return MontyDecoder().process_decoded(_get_shared_object_data(key, lambda: self))
+
     @abstractmethod
     def reset(self):
         pass
@@ -298,3 +347,93 @@ class CalcDb(metaclass=ABCMeta):
         )
 
         return store
+
+
+def get_shared_object_ref(key, db_file):
+    """
+    Reference to a shared object, to be used in place of the object in the
+    parameters of a firetask.
+
+    Args:
+        key (str): key of the object, see CalcDb.insert_shared_object
+        db_file (str): path to the file containing the credentials of the
+            database storing the object. Supports env_chk.
+
+    Returns:
+        dict
+    """
+    return {"shared_object": key, "db_file": db_file}
+
+
+def _is_shared_object_ref(value):
+    return isinstance(value, dict) and "shared_object" in value
+
+
+def _cache_shared_object(key, data):
+    _shared_objects_cache[key] = data
+    _shared_objects_cache.move_to_end(key)
+    while len(_shared_objects_cache) > SHARED_OBJECTS_CACHE_SIZE:
+        _shared_objects_cache.popitem(last=False)
+
+
+def _get_shared_object_data(key, get_db):
+    """
+    Serialized form of a shared object, with the shared objects it references
+    (e.g. the structure of an input set, see
+    atomate.vasp.powerups.use_shared_objects) substituted. The referenced
+    objects are stored in the same database.
+
+    Args:
+        key (str): key of the object
+        get_db (callable): returns the database storing the object, only
+            called if the object is not cached yet
+
+    Returns:
+        the serialized object
+    """
+    if key in _shared_objects_cache:
+        _shared_objects_cache.move_to_end(key)
+    else:
+        doc = get_db().db[SHARED_OBJECTS_COLLECTION].find_one({"_id": key})
+        if doc is None:
+            raise ValueError("Cannot find shared object {}".format(key))
+        _cache_shared_object(key, doc["data"])
+    data = _shared_objects_cache[key]
+    if isinstance(data, dict) and any(_is_shared_object_ref(v) for v in data.values()):
+        data = {
+            k: _get_shared_object_data(v["shared_object"], get_db)
+            if _is_shared_object_ref(v) else v
+            for k, v in data.items()
+        }
+    return data
+
+
+def _get_shared_objects_db(db_cls, db_file):
+    if (db_cls, db_file) not in _shared_objects_dbs:
+        _shared_objects_dbs[(db_cls, db_file)] = db_cls.from_db_file(db_file)
+    return _shared_objects_dbs[(db_cls, db_file)]
+
+
+def resolve_shared_object(value, db_cls, fw_spec=None):
+    """
+    Resolve a shared object reference. Objects already loaded or inserted by
+    the process are not queried again, and the connection to the database is
+    reused. Tasks resolve the references they are given when they are run,
+    and powerups when they need the object, e.g. after use_shared_objects.
+
+    Args:
+        value: a reference (see get_shared_object_ref) or any other value
+        db_cls (CalcDb): class of the database storing the object
+        fw_spec (dict): spec used to env_chk the db_file of the reference,
+            only needed if the object is not cached
+
+    Returns:
+        the object if value is a reference, value otherwise
+    """
+    if not _is_shared_object_ref(value):
+        return value
+    data = _get_shared_object_data(
+        value["shared_object"],
+        lambda: _get_shared_objects_db(db_cls, env_chk(value["db_file"], fw_spec or {})),
+    )
+    return MontyDecoder().process_decoded(data)
@@ -1,23 +1,137 @@
 # coding: utf-8
 
 
+import bz2
+import errno
+import fnmatch
 import glob
+import gzip
+import lzma
 import os
 import shutil
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from atomate.utils.utils import get_logger
 
 """
-This module defines the wrapper class for remote file io using paramiko.
+This module defines the wrapper class for remote file io using paramiko and
+helpers to transfer many files concurrently.
 """
 
 __author__ = 'Kiran Mathew'
 __credits__ = 'Anubhav Jain <ajain@lbl.gov>'
 __email__ = 'kmathew@lbl.gov'
 
+logger = get_logger(__name__)
+
+# default number of concurrent transfers
+DEFAULT_TRANSFER_WORKERS = 4
+# buffer size used when copying and decompressing files
+TRANSFER_BUFFER_SIZE = 16 * 1024 * 1024
+# ioctl request number to clone a file (copy-on-write) on linux
+FICLONE = 0x40049409
+GZ_EXTENSIONS = (".gz", ".GZ")
+# maximum number of bytes prefetched at once in remote transfers
+PIPELINE_WINDOW_SIZE = 256 * 1024 * 1024
+# codecs available to compress files: (extension, open function)
+COMPRESSION_CODECS = {
+    "gzip": (".gz", lambda f, level: gzip.open(f, "wb", compresslevel=level)),
+    "bz2": (".bz2", lambda f, level: bz2.open(f, "wb", compresslevel=level)),
+    "xz": (".xz", lambda f, level: lzma.open(f, "wb", preset=level)),
+}
+COMPRESSED_EXTENSIONS = (".gz", ".bz2", ".xz", ".z", ".zip", ".tgz")
+# (pattern, codec, level) rules used to compress the outputs of a
+# calculation. The first matching pattern is used. Wavefunctions and charge
+# densities compress poorly, so a fast level is used for them, while the
+# large and highly redundant xml outputs (vasprun.xml) get the best level.
+DEFAULT_COMPRESSION_RULES = [
+    ["WAVECAR*", "gzip", 1],
+    ["WAVEDER*", "gzip", 1],
+    ["CHG*", "gzip", 1],
+    ["AECCAR*", "gzip", 1],
+    ["*.xml*", "gzip", 9],
+    ["*", "gzip", 6],
+]
+
+
+class SSHConnectionPool(object):
+    """
+    Pool of SSH connections and their SFTP sessions, keyed by
+    username@host. Connections are opened on first use and reused by all the
+    FileClients of the process (e.g. all the tasks run by a rocket) as long
+    as they are active.
+    """
+
+    def __init__(self):
+        self._connections = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_key(username, host):
+        return "{}@{}".format(username, host) if username else host
+
+    def get_connection(self, username, host, private_key):
+        """
+        Get the SSH connection and the SFTP session to the given host,
+        connecting if there is no active connection in the pool.
+
+        Args:
+            username (str): if None, paramiko sets the default username
+            host (str):
+            private_key (str): path to the private key file
+
+        Returns:
+            (SSHClient, SFTPClient)
+        """
+        key = self.get_key(username, host)
+        with self._lock:
+            ssh, sftp = self._connections.get(key, (None, None))
+            if ssh is None or not self.is_active(ssh):
+                ssh = FileClient.get_ssh_connection(username, host, private_key)
+                sftp = ssh.open_sftp()
+                self._connections[key] = (ssh, sftp)
+            return ssh, sftp
+
+    def add_connection(self, filesystem, ssh, sftp=None):
+        """
+        Add an already connected SSHClient to the pool.
+
+        Args:
+            filesystem (str): username@host key of the connection
+            ssh (SSHClient): the connection
+            sftp (SFTPClient): the SFTP session. Opened if None.
+        """
+        with self._lock:
+            self._connections[filesystem] = (ssh, sftp or ssh.open_sftp())
+
+    @staticmethod
+    def is_active(ssh):
+        transport = ssh.get_transport()
+        return transport is not None and transport.is_active()
+
+    def close_all(self):
+        """
+        Close all the connections of the pool.
+        """
+        with self._lock:
+            for ssh, sftp in self._connections.values():
+                sftp.close()
+                ssh.close()
+            self._connections = {}
+
+
+SSH_CONNECTION_POOL = SSHConnectionPool()
+
 
 class FileClient(object):
     """
     A client for performing many file operations while being agnostic
-    of whether those operations are happening locally or via SSH
+    of whether those operations are happening locally or via SSH.
+    Remote connections are taken from SSH_CONNECTION_POOL, so creating many
+    FileClients for the same filesystem opens a single connection.
     """
 
     def __init__(self, filesystem=None, private_key="~/.ssh/id_rsa"):
@@ -29,6 +143,7 @@ class FileClient(object):
                 connections only). Note: passwordless ssh login must be setup
         """
         self.ssh = None
+        self.sftp = None
 
         if filesystem:
             if '@' in filesystem:
@@ -37,8 +152,8 @@ class FileClient(object):
                 username = None  # paramiko sets default username
                 host = filesystem
 
-            self.ssh = FileClient.get_ssh_connection(username, host, private_key)
-            self.sftp = self.ssh.open_sftp()
+            self.ssh, self.sftp = SSH_CONNECTION_POOL.get_connection(
+                username, host, private_key)
 
     @staticmethod
     def get_ssh_connection(username, host, private_key):
@@ -63,7 +178,8 @@ class FileClient(object):
 
         ssh = paramiko.SSHClient()
         ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        return ssh.connect(host, username=username, key_filename=private_key)
+        ssh.connect(host, username=username, key_filename=private_key)
+        return ssh
 
     @staticmethod
     def exists(sftp, path):
@@ -77,7 +193,7 @@ class FileClient(object):
         try:
             sftp.stat(path)
         except IOError as e:
-            if e[0] == 2:
+            if e.errno == errno.ENOENT:
                 return False
             raise
         else:
@@ -96,11 +212,29 @@ class FileClient(object):
         if not self.ssh:
             return os.listdir(ldir)
         else:
-            return self.sftp.listdir()
+            return self.sftp.listdir(ldir)
+
+    def stat_dir(self, ldir):
+        """
+        Get the stat of all the files in a directory. For remote filesystems
+        this is done with a single request.
+
+        Args:
+            ldir (str): full path to the directory
+
+        Returns:
+            dict of {filename: stat}, where the stats have the st_size,
+            st_mtime and st_mode attributes.
+        """
+        if not self.ssh:
+            return {f.name: f.stat() for f in os.scandir(ldir)}
+        else:
+            return {a.filename: a for a in self.sftp.listdir_attr(ldir)}
 
     def copy(self, src, dest):
         """
-        Copy from source to destination.
+        Copy from source to destination. For remote filesystems the source
+        is on the remote host and the destination is local.
 
         Args:
             src (str): source full path
@@ -109,16 +243,45 @@ class FileClient(object):
         """
         if not self.ssh:
             shutil.copy2(src, dest)
+        else:
+            self.get(src, dest)
+
+    def get(self, src, dest):
+        """
+        Copy a file or the files of a directory from the remote filesystem to
+        the local one. Reads are pipelined (prefetched) by paramiko.
+
+        Args:
+            src (str): remote source full path
+            dest (str): local destination full path
+        """
+        if stat.S_ISDIR(self.sftp.stat(src).st_mode):
+            if not os.path.exists(dest):
+                os.makedirs(dest)
+            for a in self.sftp.listdir_attr(src):
+                if stat.S_ISREG(a.st_mode):
+                    self.sftp.get(os.path.join(src, a.filename),
+                                  os.path.join(dest, a.filename))
+        else:
+            self.sftp.get(src, dest)
 
+    def put(self, src, dest):
+        """
+        Copy a local file or the files of a local directory to the remote
+        filesystem. Writes are pipelined by paramiko.
+
+        Args:
+            src (str): local source full path
+            dest (str): remote destination directory full path
+        """
+        if os.path.isdir(src):
+            if not FileClient.exists(self.sftp, dest):
+                self.sftp.mkdir(dest)
+            for f in os.listdir(src):
+                if os.path.isfile(os.path.join(src, f)):
+                    self.sftp.put(os.path.join(src, f), os.path.join(dest, f))
         else:
-            if os.path.isdir(src):
-                if not FileClient.exists(self.sftp, dest):
-                    self.sftp.mkdir(dest)
-                for f in os.listdir(src):
-                    if os.path.isfile(os.path.join(src, f)):
-                        self.sftp.put(os.path.join(src, f), os.path.join(dest, f))
-            else:
-                self.sftp.put(src, os.path.join(dest, os.path.basename(src)))
+            self.sftp.put(src, os.path.join(dest, os.path.basename(src)))
 
     def abspath(self, path):
         """
@@ -129,7 +292,8 @@ class FileClient(object):
         """
         if not self.ssh:
             return os.path.abspath(path)
-
+        elif not _needs_shell(path):
+            return self.sftp.normalize(path)
         else:
             command = ". ./.bashrc; readlink -f {}".format(path)
             stdin, stdout, stderr = self.ssh.exec_command(command)
@@ -145,7 +309,394 @@ class FileClient(object):
         """
         if not self.ssh:
             return glob.glob(path)
+        return self.glob_many([path])
+
+    def glob_many(self, paths):
+        """
+        Glob several paths. On remote filesystems the patterns are matched
+        against a single listing of each parent directory, so that globbing
+        all the files of a calculation costs one round trip.
+
+        Args:
+            paths (list): paths to glob
+
+        Returns:
+            list of the matching paths, in the order of the patterns.
+        """
+        if not self.ssh:
+            return [f for p in paths for f in glob.glob(p)]
+
+        listings = {}
+        matches = []
+        for path in paths:
+            ldir, pattern = os.path.split(path)
+            if _needs_shell(ldir) or glob.has_magic(ldir):
+                command = ". ./.bashrc; readlink -f {}".format(path)
+                stdin, stdout, stderr = self.ssh.exec_command(command)
+                matches.extend(l.split('\n')[0] for l in stdout)
+                continue
+            if ldir not in listings:
+                try:
+                    listings[ldir] = sorted(self.sftp.listdir(ldir or "."))
+                except IOError:
+                    listings[ldir] = []
+            matches.extend(os.path.join(ldir, f)
+                           for f in fnmatch.filter(listings[ldir], pattern))
+        return matches
+
+    def transfer(self, transfers, nworkers=DEFAULT_TRANSFER_WORKERS,
+                 decompress=False, link_mode=None, skip_missing=False):
+        """
+        Transfer several files from source to destination. Local transfers
+        are done concurrently with a bounded pool of threads, see
+        transfer_files for the details. Remote transfers are pipelined over
+        the SFTP session of the client, see get_many.
+
+        Args:
+            transfers (list): list of (source full path, destination file full
+                path) tuples.
+            nworkers (int): maximum number of concurrent transfers.
+            decompress (bool): whether to decompress gzipped sources, in which
+                case the destination path should not have the ".gz" extension.
+            link_mode (str): None, "reflink" or "hardlink", see transfer_file.
+            skip_missing (bool): skip the missing sources instead of raising
+                a FileNotFoundError.
+
+        Returns:
+            list of dicts with the statistics of each transfer
+        """
+        if not self.ssh:
+            return transfer_files(transfers, nworkers=nworkers,
+                                  decompress=decompress, link_mode=link_mode,
+                                  skip_missing=skip_missing)
+        return self.get_many(transfers, decompress=decompress,
+                             skip_missing=skip_missing)
+
+    def get_many(self, transfers, decompress=False, skip_missing=False,
+                 window_size=PIPELINE_WINDOW_SIZE):
+        """
+        Copy several files from the remote filesystem to the local one.
+
+        The sources are stat'ed with one listing per parent directory. The
+        reads of all the files of a window of up to window_size bytes are
+        then requested at once, so that the transfer of small files is not
+        limited by the latency of the connection. Gzipped sources can be
+        decompressed while being read.
+
+        Args:
+            transfers (list): list of (remote source full path, local
+                destination file full path) tuples.
+            decompress (bool): decompress the gzipped sources.
+            skip_missing (bool): skip the missing sources instead of raising
+                a FileNotFoundError.
+            window_size (int): maximum number of bytes prefetched at once.
+
+        Returns:
+            list of dicts with the statistics of each transfer
+        """
+        attrs = {}
+        for ldir in set(os.path.dirname(src) for src, dest in transfers):
+            try:
+                attrs.update({os.path.join(ldir, f): a
+                              for f, a in self.stat_dir(ldir).items()})
+            except FileNotFoundError:
+                pass
+
+        windows = [[]]
+        window_bytes = 0
+        for src, dest in transfers:
+            if src not in attrs:
+                if skip_missing:
+                    continue
+                raise FileNotFoundError("Cannot find file: {}".format(src))
+            if stat.S_ISDIR(attrs[src].st_mode):
+                self.get(src, dest)
+                continue
+            if windows[-1] and window_bytes + attrs[src].st_size > window_size:
+                windows.append([])
+                window_bytes = 0
+            windows[-1].append((src, dest))
+            window_bytes += attrs[src].st_size
+
+        stats = []
+        for window in windows:
+            start = time.time()
+            handles = []
+            for src, dest in window:
+                f_in = self.sftp.open(src, "rb")
+                f_in.prefetch(attrs[src].st_size)
+                handles.append((src, dest, f_in))
+            for src, dest, f_in in handles:
+                method = "sftp"
+                with f_in:
+                    if decompress and src.endswith(GZ_EXTENSIONS):
+                        f_in = gzip.GzipFile(fileobj=f_in, mode="rb")
+                        method = "sftp+decompress"
+                    with open(dest, "wb") as f_out:
+                        shutil.copyfileobj(f_in, f_out, TRANSFER_BUFFER_SIZE)
+                stats.append(_transfer_stats(src, dest, os.path.getsize(dest),
+                                             start, method))
+        _log_transfers(stats)
+        return stats
+
+    def put_many(self, transfers):
+        """
+        Copy several local files to the remote filesystem. The writes are
+        pipelined: the acknowledgements of the server are only waited for
+        when all the files have been sent.
+
+        Args:
+            transfers (list): list of (local source full path, remote
+                destination file full path) tuples.
+
+        Returns:
+            list of dicts with the statistics of each transfer
+        """
+        start = time.time()
+        handles = []
+        try:
+            for src, dest in transfers:
+                f_out = self.sftp.open(dest, "wb")
+                handles.append(f_out)
+                f_out.set_pipelined(True)
+                with open(src, "rb") as f_in:
+                    shutil.copyfileobj(f_in, f_out, TRANSFER_BUFFER_SIZE)
+        finally:
+            for f_out in handles:
+                f_out.close()
+        stats = [_transfer_stats(src, dest, os.path.getsize(src), start, "sftp")
+                 for src, dest in transfers]
+        _log_transfers(stats)
+        return stats
+
+
+def transfer_file(src, dest, decompress=False, link_mode=None):
+    """
+    Transfer a single file on the local filesystem.
+
+    Gzipped sources are decompressed while copying if decompress is True, so
+    that the data is read and written only once. Otherwise the file can be
+    linked instead of copied when source and destination are on the same
+    filesystem:
+
+        - "reflink": copy-on-write clone of the file. Falls back to a plain
+          copy if the filesystem does not support it.
+        - "hardlink": hard link to the source. Note that a hard linked file
+          shares its content with the source, so it should only be used for
+          files that will not be modified in place.
+
+    Args:
+        src (str): source full path
+        dest (str): destination file full path
+        decompress (bool): decompress the source if it has a ".gz" extension.
+        link_mode (str): None, "reflink" or "hardlink".
+
+    Returns:
+        dict with the source, destination, bytes written, elapsed time,
+        rate (bytes/s) and method of the transfer.
+    """
+    start = time.time()
+    if decompress and src.endswith(GZ_EXTENSIONS):
+        nbytes = 0
+        with gzip.open(src, "rb") as f_in, open(dest, "wb") as f_out:
+            for chunk in iter(lambda: f_in.read(TRANSFER_BUFFER_SIZE), b""):
+                nbytes += f_out.write(chunk)
+        shutil.copystat(src, dest)
+        return _transfer_stats(src, dest, nbytes, start, "decompress")
+
+    if link_mode and _same_filesystem(src, dest):
+        if os.path.lexists(dest):
+            os.remove(dest)
+        try:
+            if link_mode == "hardlink":
+                os.link(src, dest)
+            elif link_mode == "reflink":
+                _reflink(src, dest)
+            else:
+                raise ValueError("Unknown link_mode: {}".format(link_mode))
+            return _transfer_stats(src, dest, os.path.getsize(src), start,
+                                   link_mode)
+        except OSError:
+            logger.debug("Cannot {} {}, copying it.".format(link_mode, src))
+
+    shutil.copy2(src, dest)
+    return _transfer_stats(src, dest, os.path.getsize(dest), start, "copy")
+
+
+def transfer_files(transfers, nworkers=DEFAULT_TRANSFER_WORKERS,
+                   decompress=False, link_mode=None, skip_missing=False):
+    """
+    Transfer several files on the local filesystem concurrently, using a
+    bounded pool of threads. The rate of each transfer is logged.
+
+    Args:
+        transfers (list): list of (source full path, destination file full
+            path) tuples.
+        nworkers (int): maximum number of concurrent transfers.
+        decompress (bool): decompress the gzipped sources while copying.
+        link_mode (str): None, "reflink" or "hardlink", see transfer_file.
+        skip_missing (bool): skip the missing sources instead of raising a
+            FileNotFoundError.
+
+    Returns:
+        list of dicts with the statistics of each transfer, in the same order
+        as the transfers.
+    """
+    def _transfer(src_dest):
+        try:
+            return transfer_file(*src_dest, decompress=decompress,
+                                 link_mode=link_mode)
+        except FileNotFoundError:
+            if skip_missing and not os.path.exists(src_dest[0]):
+                return None
+            raise
+
+    nworkers = max(1, min(nworkers or 1, len(transfers)))
+    with ThreadPoolExecutor(max_workers=nworkers) as executor:
+        stats = list(executor.map(_transfer, transfers))
+    stats = [s for s in stats if s is not None]
+    _log_transfers(stats)
+    return stats
+
+
+def move_dir_contents(src_dir, dest_dir, nworkers=DEFAULT_TRANSFER_WORKERS):
+    """
+    Move the content of a directory to another, leaving the source directory
+    empty. When both are on the same filesystem, each entry of the source
+    directory is renamed, which is atomic and does not copy any data.
+    Otherwise the files are copied concurrently with transfer_files and then
+    removed.
+
+    Args:
+        src_dir (str): source directory
+        dest_dir (str): destination directory, created if needed.
+        nworkers (int): maximum number of concurrent copies.
+
+    Returns:
+        list of dicts with the statistics of each transfer.
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    names = os.listdir(src_dir)
+    if _same_filesystem(src_dir, os.path.join(dest_dir, "")):
+        stats = []
+        for name in names:
+            start = time.time()
+            src, dest = os.path.join(src_dir, name), os.path.join(dest_dir, name)
+            os.rename(src, dest)
+            stats.append(_transfer_stats(src, dest, 0, start, "rename"))
+        _log_transfers(stats)
+        return stats
+
+    transfers = []
+    for root, dirs, files in os.walk(src_dir):
+        dest_root = os.path.join(dest_dir, os.path.relpath(root, src_dir))
+        for d in dirs:
+            os.makedirs(os.path.join(dest_root, d), exist_ok=True)
+        transfers.extend((os.path.join(root, f), os.path.join(dest_root, f))
+                         for f in files)
+    stats = transfer_files(transfers, nworkers=nworkers)
+    for name in names:
+        path = os.path.join(src_dir, name)
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path)
         else:
-            command = ". ./.bashrc; for i in $(ls {}); do readlink -f $i; done".format(path)
-            stdin, stdout, stderr = self.ssh.exec_command(command)
-            return [l.split('\n')[0] for l in stdout]
+            os.remove(path)
+    return stats
+
+
+def _log_transfers(stats):
+    for s in stats:
+        logger.info("Transferred {} to {} ({}): {} bytes at {:.1f} bytes/s".format(
+            s["src"], s["dest"], s["method"], s["bytes"], s["rate"]))
+
+
+def _transfer_stats(src, dest, nbytes, start, method):
+    elapsed = time.time() - start
+    return {"src": src, "dest": dest, "bytes": nbytes, "time": elapsed,
+            "rate": nbytes / elapsed if elapsed > 0 else float(nbytes),
+            "method": method}
+
+
+def _needs_shell(path):
+    # paths with environment variables or "~" need to be expanded by the shell
+    return "$" in path or path.startswith("~")
+
+
+def _same_filesystem(src, dest):
+    dest_dir = os.path.dirname(os.path.abspath(dest))
+    return os.stat(src).st_dev == os.stat(dest_dir).st_dev
+
+
+def _reflink(src, dest):
+    import fcntl
+    with open(src, "rb") as f_in, open(dest, "wb") as f_out:
+        try:
+            fcntl.ioctl(f_out.fileno(), FICLONE, f_in.fileno())
+        except OSError:
+            f_out.close()
+            os.remove(dest)
+            raise
+    shutil.copystat(src, dest)
+
+
+def compress_file(path, codec="gzip", level=6):
+    """
+    Compress a file, replacing it by the compressed one (e.g. "vasprun.xml"
+    by "vasprun.xml.gz"). The stats of the file are preserved.
+
+    Args:
+        path (str): path to the file
+        codec (str): one of the COMPRESSION_CODECS, "gzip", "bz2" or "xz".
+        level (int): compression level
+
+    Returns:
+        dict with the file, codec, level, bytes before and after compression
+        and the elapsed time.
+    """
+    start = time.time()
+    ext, open_compressed = COMPRESSION_CODECS[codec]
+    with open(path, "rb") as f_in, open_compressed(path + ext, level) as f_out:
+        shutil.copyfileobj(f_in, f_out, TRANSFER_BUFFER_SIZE)
+    shutil.copystat(path, path + ext)
+    nbytes = os.path.getsize(path)
+    os.remove(path)
+    return {"file": os.path.basename(path), "codec": codec, "level": level,
+            "bytes": nbytes, "compressed_bytes": os.path.getsize(path + ext),
+            "time": time.time() - start}
+
+
+def compress_dir(path, rules=None, nworkers=None):
+    """
+    Compress all the files of a directory concurrently. Files that are
+    already compressed, directories and symbolic links are skipped.
+
+    Args:
+        path (str): path to the directory
+        rules (list): list of (pattern, codec, level) used to choose how each
+            file is compressed; the first rule whose pattern matches the file
+            name is used and files matching no rule are not compressed.
+            Defaults to DEFAULT_COMPRESSION_RULES.
+        nworkers (int): number of files compressed concurrently. Defaults to
+            the number of cpus.
+
+    Returns:
+        list of dicts with the statistics of each file, see compress_file
+    """
+    rules = rules or DEFAULT_COMPRESSION_RULES
+    to_compress = []
+    for f in sorted(os.listdir(path)):
+        full_f = os.path.join(path, f)
+        if (f.lower().endswith(COMPRESSED_EXTENSIONS) or os.path.islink(full_f)
+                or not os.path.isfile(full_f)):
+            continue
+        for pattern, codec, level in rules:
+            if fnmatch.fnmatch(f, pattern):
+                to_compress.append((full_f, codec, level))
+                break
+
+    if not to_compress:
+        return []
+    nworkers = max(1, min(nworkers or os.cpu_count() or 1, len(to_compress)))
+    # zlib, bz2 and lzma release the GIL, so threads compress in parallel
+    with ThreadPoolExecutor(max_workers=nworkers) as executor:
+        return list(executor.map(lambda args: compress_file(*args), to_compress))
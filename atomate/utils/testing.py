@@ -4,14 +4,24 @@
 import json
 import os
 import shutil
+import tempfile
 import unittest
+from functools import partial
 from io import open
+from unittest import mock
 
 from fireworks import LaunchPad
 from pymongo import MongoClient
 
 from pymatgen import SETTINGS
 
+try:
+    import mongomock
+    import mongomock.gridfs
+    from mongomock.store import ServerStore
+except ImportError:
+    mongomock = None
+
 __author__ = "Kiran Mathew"
 __credits__ = "Anubhav Jain"
 __email__ = "kmathew@lbl.gov"
@@ -26,12 +36,30 @@ VASP_CMD = (
     None  # If None, runs a "fake" VASP. Otherwise, runs VASP with this command...
 )
 
+# Database used by the tests: "mongodb" (default) for the server configured in
+# DB_DIR, or "mongomock" for an in-process stand-in, which needs no server and
+# gives each test its own empty databases, so that tests can run in parallel
+# (e.g. pytest -n 4 with pytest-xdist)
+TEST_DB_BACKEND = os.environ.get("ATOMATE_TEST_DB", "mongodb")
+# Directory where the scratch directories of the tests are created, e.g. a
+# tmpfs. Default: the system temporary directory
+TEST_SCRATCH_ROOT = os.environ.get("ATOMATE_TEST_SCRATCH")
+
+# modules whose MongoClient is replaced when using mongomock
+MONGO_CLIENT_MODULES = [
+    "pymongo",
+    "atomate.utils.database",
+    "atomate.utils.testing",
+    "atomate.utils.utils",
+    "fireworks.core.launchpad",
+]
+
 
 class AtomateTest(unittest.TestCase):
     def setUp(self, lpad=True):
         """
-        Create scratch directory(removes the old one if there is one) and change to it.
-        Also initialize launchpad.
+        Create a scratch directory for the test and change to it. Also
+        initialize launchpad.
         """
         if not SETTINGS.get("PMG_VASP_PSP_DIR"):
             SETTINGS["PMG_VASP_PSP_DIR"] = os.path.abspath(
@@ -42,11 +70,13 @@ class AtomateTest(unittest.TestCase):
                 "Please set PMG_VASP_PSP_DIR variable in your ~/.pmgrc.yaml file."
             )
 
-        self.scratch_dir = os.path.join(MODULE_DIR, "scratch")
-        if os.path.exists(self.scratch_dir):
-            shutil.rmtree(self.scratch_dir)
-        os.makedirs(self.scratch_dir)
+        self.scratch_dir = tempfile.mkdtemp(prefix="atomate_scratch_", dir=TEST_SCRATCH_ROOT)
         os.chdir(self.scratch_dir)
+        # cleanups also run for the tests that do not call AtomateTest.tearDown
+        self.addCleanup(self._remove_scratch_dir)
+
+        if TEST_DB_BACKEND == "mongomock":
+            self._use_mongomock()
         if lpad:
             try:
                 self.lp = LaunchPad.from_file(os.path.join(DB_DIR, "my_launchpad.yaml"))
@@ -57,6 +87,25 @@ class AtomateTest(unittest.TestCase):
                     "Are the credentials correct?"
                 )
 
+    def _use_mongomock(self):
+        """
+        Replace MongoClient by mongomock clients sharing an in-memory server
+        for the duration of the test.
+        """
+        if mongomock is None:
+            raise ImportError("ATOMATE_TEST_DB=mongomock requires mongomock")
+        mongomock.gridfs.enable_gridfs_integration()
+        client = partial(mongomock.MongoClient, _store=ServerStore())
+        for module in MONGO_CLIENT_MODULES:
+            patcher = mock.patch("{}.MongoClient".format(module), client)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _remove_scratch_dir(self):
+        os.chdir(MODULE_DIR)
+        if not DEBUG_MODE:
+            shutil.rmtree(self.scratch_dir, ignore_errors=True)
+
     # Note: the functions in matgendb.util, get_database and get_collection require db authentication
     # but the db.json config file used for atomate testing purpose doesnt require db authentication.
     # Hence the following 2 methods.
@@ -84,7 +133,8 @@ class AtomateTest(unittest.TestCase):
 
     def tearDown(self):
         """
-        Remove the scratch directory and teardown the test db.
+        Teardown the test db. The scratch directory is removed after the
+        tearDown.
         """
         if not DEBUG_MODE:
             if hasattr(self, "lp"):
@@ -93,5 +143,3 @@ class AtomateTest(unittest.TestCase):
                 for coll in db.collection_names():
                     if coll != "system.indexes":
                         db[coll].drop()
-            shutil.rmtree(self.scratch_dir)
-            os.chdir(MODULE_DIR)
@@ -0,0 +1,77 @@
+# coding: utf-8
+
+import os
+import unittest
+
+from fireworks import Firework, FWorker, ScriptTask, Workflow
+
+from fireworks.fw_config import FWData
+
+from atomate.utils.bundle import get_sub_jobs, launch_bundle, split_cores
+from atomate.utils.testing import AtomateTest, TEST_DB_BACKEND
+from atomate.vasp.firetasks.run_calc import RunVaspDirect, get_vasp_cmd_nprocs
+
+
+class TestBundle(AtomateTest):
+
+    def test_split_cores(self):
+        self.assertEqual(split_cores(16, 3), [6, 5, 5])
+        self.assertRaises(ValueError, split_cores, 2, 3)
+
+    def test_sub_jobs(self):
+        sub_jobs = get_sub_jobs(16, 3, "--cpu-set {cpu_set} --bind-to core")
+        self.assertEqual([j["placement"] for j in sub_jobs],
+                         ["--cpu-set 0-5 --bind-to core", "--cpu-set 6-10 --bind-to core",
+                          "--cpu-set 11-15 --bind-to core"])
+        self.assertEqual(get_sub_jobs(4, 2, "-genv I_MPI_PIN_PROCESSOR_LIST {cpu_list}")[1],
+                         {"nprocs": 2, "placement": "-genv I_MPI_PIN_PROCESSOR_LIST 2,3"})
+        self.assertEqual(get_sub_jobs(4, 2), [{"nprocs": 2, "placement": None}] * 2)
+
+    def test_vasp_cmd_nprocs(self):
+        self.assertEqual(get_vasp_cmd_nprocs("mpirun -np 32 vasp_std", 8),
+                         "mpirun -np 8 vasp_std")
+        self.assertEqual(get_vasp_cmd_nprocs("srun -N 2 --ntasks=64 vasp_std", 8),
+                         "srun -N 2 --ntasks=8 vasp_std")
+        self.assertEqual(get_vasp_cmd_nprocs("vasp_std", 8), "vasp_std")
+        self.assertEqual(get_vasp_cmd_nprocs("srun -n 32 vasp_std", 8, "--exclusive"),
+                         "srun -n 8 --exclusive vasp_std")
+        # outside of a bundle, e.g. with rlaunch multi
+        FWData().SUB_NPROCS = 8
+        try:
+            self.assertEqual(get_vasp_cmd_nprocs("mpirun -n 32 vasp_std"),
+                             "mpirun -n 32 vasp_std")
+        finally:
+            FWData().SUB_NPROCS = None
+
+    @unittest.skipIf(TEST_DB_BACKEND == "mongomock",
+                     "the rockets of the bundle need a shared MongoDB LaunchPad")
+    def test_launch_bundle(self):
+        # a fake VASP command writing its number of ranks and placement
+        fws = [Firework(RunVaspDirect(vasp_cmd="echo -n 32 > nprocs"), name="static {}".format(i))
+               for i in range(2)]
+        fws.append(Firework(ScriptTask.from_str("exit 1", {"fizzle_bad_rc": True}), name="static failed"))
+        fws.append(Firework(RunVaspDirect(vasp_cmd="echo -n 32 > nprocs"), name="optimization"))
+        self.lp.add_wf(Workflow(fws))
+
+        runs = launch_bundle(self.lp, FWorker(), nbundle=4, ncores=16,
+                             placement="--cpu-set {cpu_set}", query={"name": {"$regex": "static"}},
+                             launch_dir=self.scratch_dir)
+        self.assertEqual(len(runs), 3)
+        self.assertEqual(sorted(r["nprocs"] for r in runs), [5, 5, 6])
+        self.assertEqual(sorted(r["placement"] for r in runs),
+                         ["--cpu-set 0-5", "--cpu-set 11-15", "--cpu-set 6-10"])
+        for run in runs:
+            fw = self.lp.get_fw_by_id(run["fw_id"])
+            if fw.name == "static failed":
+                self.assertEqual(run["state"], "FIZZLED")
+            else:
+                self.assertEqual(run["state"], "COMPLETED")
+                with open(os.path.join(run["launch_dir"], "nprocs")) as f:
+                    self.assertEqual(f.read(), "{nprocs} {placement}".format(**run))
+        # not compatible with the bundle
+        self.assertEqual(self.lp.get_fw_ids({"state": "READY"}), [fws[-1].fw_id])
+        self.assertEqual(launch_bundle(self.lp, FWorker(), query={"name": "static 0"}), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,6 +4,7 @@ Testing for the CalcDb metaclass
 """
 import os
 import unittest
+from unittest import mock
 
 import boto3
 from maggma.stores import MemoryStore
@@ -12,7 +13,8 @@ from moto import mock_s3
 
 __author__ = "Jimmy Shen <jmmshn@gmail.com>"
 
-from atomate.utils.database import CalcDb
+from atomate.utils import database
+from atomate.utils.database import CalcDb, get_shared_object_ref, resolve_shared_object
 from atomate.utils.utils import get_logger
 
 MODULE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)))
@@ -77,6 +79,34 @@ class DatabaseTests(unittest.TestCase):
             store = prefix_db.get_store("test")
             self.assertEqual(store.sub_dir, "new_prefix_test/")
 
+    def test_shared_objects(self):
+        db_file = db_dir + "/db_aws.json"
+        structure = {"lattice": [[3.0, 0, 0], [0, 3.0, 0], [0, 0, 3.0]], "species": ["Si"]}
+        structure_key = self.testdb.insert_shared_object(structure)
+        vis_key = self.testdb.insert_shared_object(
+            {"reciprocal_density": 50, "structure": get_shared_object_ref(structure_key, db_file)}
+        )
+        self.assertEqual(self.testdb.get_shared_object(vis_key)["structure"], structure)
+
+        database._shared_objects_cache.clear()
+        with mock.patch.object(TestToDb, "from_db_file", return_value=self.testdb) as from_db_file:
+            vis = resolve_shared_object(get_shared_object_ref(vis_key, db_file), TestToDb)
+            self.assertEqual(vis, {"reciprocal_density": 50, "structure": structure})
+            database._shared_objects_cache.clear()
+            resolve_shared_object(get_shared_object_ref(structure_key, db_file), TestToDb)
+            # the connection is reused
+            from_db_file.assert_called_once_with(db_file)
+        database._shared_objects_dbs.clear()
+
+    def test_shared_objects_cache(self):
+        database._shared_objects_cache.clear()
+        with mock.patch.object(database, "SHARED_OBJECTS_CACHE_SIZE", 2):
+            keys = [self.testdb.insert_shared_object({"n": n}) for n in range(3)]
+            self.assertEqual(list(database._shared_objects_cache), keys[1:])
+            # evicted objects are queried again
+            self.assertEqual(self.testdb.get_shared_object(keys[0]), {"n": 0})
+            self.assertEqual(list(database._shared_objects_cache), [keys[2], keys[0]])
+
     def test_uri(self):
         calc_db = TestToDb(
             host_uri="mongodb://localhost:27017",
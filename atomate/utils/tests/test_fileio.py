@@ -0,0 +1,258 @@
+# coding: utf-8
+"""
+Testing for the file client, using an in-process SFTP server that serves the
+local filesystem.
+"""
+import gzip
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+try:
+    import paramiko
+except ImportError:
+    paramiko = None
+
+from atomate.utils.fileio import (
+    FileClient,
+    SSHConnectionPool,
+    move_dir_contents,
+    transfer_files,
+)
+
+
+if paramiko:
+
+    class StubServer(paramiko.ServerInterface):
+        def check_auth_password(self, username, password):
+            return paramiko.AUTH_SUCCESSFUL
+
+        def get_allowed_auths(self, username):
+            return "password"
+
+        def check_channel_request(self, kind, chanid):
+            return paramiko.OPEN_SUCCEEDED
+
+    class StubSFTPHandle(paramiko.SFTPHandle):
+        def stat(self):
+            return paramiko.SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+
+    class StubSFTPServer(paramiko.SFTPServerInterface):
+        """
+        Minimal SFTP server serving the local filesystem.
+        """
+
+        def _error(self, e):
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+        def canonicalize(self, path):
+            return os.path.normpath(os.path.join(os.getcwd(), path))
+
+        def list_folder(self, path):
+            try:
+                return [
+                    paramiko.SFTPAttributes.from_stat(
+                        os.stat(os.path.join(path, f)), f
+                    )
+                    for f in os.listdir(path)
+                ]
+            except OSError as e:
+                return self._error(e)
+
+        def stat(self, path):
+            try:
+                return paramiko.SFTPAttributes.from_stat(os.stat(path))
+            except OSError as e:
+                return self._error(e)
+
+        lstat = stat
+
+        def open(self, path, flags, attr):
+            try:
+                mode = "wb" if flags & (os.O_WRONLY | os.O_RDWR) else "rb"
+                f = open(path, mode)
+            except OSError as e:
+                return self._error(e)
+            handle = StubSFTPHandle(flags)
+            handle.filename = path
+            if mode == "rb":
+                handle.readfile = f
+            else:
+                handle.writefile = f
+            return handle
+
+        def mkdir(self, path, attr):
+            try:
+                os.mkdir(path)
+            except OSError as e:
+                return self._error(e)
+            return paramiko.SFTP_OK
+
+
+@unittest.skipIf(paramiko is None, "paramiko is not installed")
+class FileClientSFTPTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.host_key = paramiko.RSAKey.generate(1024)
+
+    def setUp(self):
+        self.remote_dir = tempfile.mkdtemp()
+        self.local_dir = tempfile.mkdtemp()
+        for i in range(5):
+            with open(os.path.join(self.remote_dir, "file{}".format(i)), "w") as f:
+                f.write("content {}\n".format(i) * 1000)
+        with gzip.open(os.path.join(self.remote_dir, "CHGCAR.gz"), "wt") as f:
+            f.write("charge\n" * 1000)
+
+        server_sock, client_sock = socket.socketpair()
+        self.server = paramiko.Transport(server_sock)
+        self.server.add_server_key(self.host_key)
+        self.server.set_subsystem_handler(
+            "sftp", paramiko.SFTPServer, StubSFTPServer
+        )
+        threading.Thread(
+            target=self.server.start_server,
+            kwargs={"server": StubServer()},
+            daemon=True,
+        ).start()
+
+        self.ssh = paramiko.SSHClient()
+        self.ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        self.ssh.connect("stub", username="user", password="", sock=client_sock)
+
+        self.pool = SSHConnectionPool()
+        self.pool.add_connection("user@stub", self.ssh)
+        self.pool_patch = mock.patch(
+            "atomate.utils.fileio.SSH_CONNECTION_POOL", self.pool
+        )
+        self.pool_patch.start()
+
+    def tearDown(self):
+        self.pool_patch.stop()
+        self.pool.close_all()
+        self.server.close()
+        shutil.rmtree(self.remote_dir)
+        shutil.rmtree(self.local_dir)
+
+    def test_pool_reuse(self):
+        fc1 = FileClient("user@stub")
+        fc2 = FileClient("user@stub")
+        self.assertIs(fc1.ssh, self.ssh)
+        self.assertIs(fc1.sftp, fc2.sftp)
+
+    def test_listing(self):
+        fc = FileClient("user@stub")
+        self.assertEqual(len(fc.listdir(self.remote_dir)), 6)
+        stats = fc.stat_dir(self.remote_dir)
+        self.assertEqual(
+            stats["file0"].st_size,
+            os.path.getsize(os.path.join(self.remote_dir, "file0")),
+        )
+        self.assertEqual(fc.abspath(self.remote_dir), self.remote_dir)
+        matches = fc.glob_many(
+            [os.path.join(self.remote_dir, p) for p in ["file[0-2]", "*.gz"]]
+        )
+        self.assertEqual(
+            [os.path.basename(f) for f in matches],
+            ["file0", "file1", "file2", "CHGCAR.gz"],
+        )
+
+    def test_transfer(self):
+        fc = FileClient("user@stub")
+        transfers = [
+            (os.path.join(self.remote_dir, f), os.path.join(self.local_dir, f))
+            for f in ["file0", "file1", "file2", "missing"]
+        ]
+        transfers.append(
+            (
+                os.path.join(self.remote_dir, "CHGCAR.gz"),
+                os.path.join(self.local_dir, "CHGCAR"),
+            )
+        )
+        stats = fc.transfer(transfers, nworkers=3, decompress=True, skip_missing=True)
+        self.assertEqual(len(stats), 4)
+        self.assertEqual(stats[-1]["method"], "sftp+decompress")
+        with open(os.path.join(self.local_dir, "CHGCAR")) as f:
+            self.assertEqual(f.read(), "charge\n" * 1000)
+        for f in ["file0", "file1", "file2"]:
+            with open(os.path.join(self.local_dir, f)) as f1:
+                with open(os.path.join(self.remote_dir, f)) as f2:
+                    self.assertEqual(f1.read(), f2.read())
+        self.assertFalse(os.path.exists(os.path.join(self.local_dir, "missing")))
+
+    def test_put_many(self):
+        fc = FileClient("user@stub")
+        transfers = [
+            (os.path.join(self.remote_dir, f), os.path.join(self.local_dir, f))
+            for f in ["file3", "file4"]
+        ]
+        stats = fc.put_many(transfers)
+        self.assertEqual(len(stats), 2)
+        for src, dest in transfers:
+            with open(src) as f1:
+                with open(dest) as f2:
+                    self.assertEqual(f1.read(), f2.read())
+
+
+class TransferFilesTest(unittest.TestCase):
+    def setUp(self):
+        self.src_dir = tempfile.mkdtemp()
+        self.dest_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.src_dir, "WAVECAR"), "wb") as f:
+            f.write(os.urandom(10000))
+
+    def tearDown(self):
+        shutil.rmtree(self.src_dir)
+        shutil.rmtree(self.dest_dir)
+
+    def test_missing(self):
+        transfers = [
+            (os.path.join(self.src_dir, f), os.path.join(self.dest_dir, f))
+            for f in ["WAVECAR", "CHGCAR"]
+        ]
+        self.assertRaises(FileNotFoundError, transfer_files, transfers)
+        stats = transfer_files(transfers, skip_missing=True)
+        self.assertEqual(len(stats), 1)
+        self.assertEqual(stats[0]["bytes"], 10000)
+
+    def test_hardlink(self):
+        src = os.path.join(self.src_dir, "WAVECAR")
+        stats = transfer_files(
+            [(src, os.path.join(self.src_dir, "WAVECAR.link"))], link_mode="hardlink"
+        )
+        self.assertEqual(stats[0]["method"], "hardlink")
+        self.assertEqual(os.stat(src).st_nlink, 2)
+
+    def _assert_moved(self, stats, method):
+        self.assertEqual(os.listdir(self.src_dir), [])
+        self.assertEqual({s["method"] for s in stats}, {method})
+        self.assertEqual(
+            os.path.getsize(os.path.join(self.dest_dir, "neb", "00", "CONTCAR")), 7
+        )
+        self.assertEqual(os.path.getsize(os.path.join(self.dest_dir, "neb", "WAVECAR")), 10000)
+
+    def test_move_dir_contents(self):
+        os.makedirs(os.path.join(self.src_dir, "00"))
+        with open(os.path.join(self.src_dir, "00", "CONTCAR"), "w") as f:
+            f.write("CONTCAR")
+        src_ino = os.stat(os.path.join(self.src_dir, "WAVECAR")).st_ino
+        stats = move_dir_contents(self.src_dir, os.path.join(self.dest_dir, "neb"))
+        self._assert_moved(stats, "rename")
+        self.assertEqual(len(stats), 2)
+        self.assertEqual(
+            os.stat(os.path.join(self.dest_dir, "neb", "WAVECAR")).st_ino, src_ino
+        )
+
+        # e.g. to another filesystem
+        move_dir_contents(os.path.join(self.dest_dir, "neb"), self.src_dir)
+        with mock.patch("atomate.utils.fileio._same_filesystem", return_value=False):
+            stats = move_dir_contents(self.src_dir, os.path.join(self.dest_dir, "neb"))
+        self._assert_moved(stats, "copy")
+
+
+if __name__ == "__main__":
+    unittest.main()
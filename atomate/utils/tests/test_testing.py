@@ -0,0 +1,40 @@
+# coding: utf-8
+
+import os
+import unittest
+from unittest import mock
+
+from fireworks import Firework, FWorker, ScriptTask
+from fireworks.core.rocket_launcher import rapidfire
+
+from atomate.utils import database, testing
+from atomate.utils.testing import AtomateTest
+
+
+@unittest.skipIf(testing.mongomock is None, "mongomock is not installed")
+class TestMongomockBackend(AtomateTest):
+    def setUp(self):
+        with mock.patch("atomate.utils.testing.TEST_DB_BACKEND", "mongomock"):
+            super(TestMongomockBackend, self).setUp()
+
+    def _check_isolated(self):
+        # each test starts with empty databases, shared by all the clients
+        self.assertEqual(os.getcwd(), self.scratch_dir)
+        coll = self.get_task_collection()
+        self.assertEqual(coll.count_documents({}), 0)
+        coll.insert_one({"task_id": 1})
+        client = database.MongoClient("localhost", 27017)
+        self.assertEqual(client[coll.database.name][coll.name].count_documents({}), 1)
+
+    def test_launchpad(self):
+        self._check_isolated()
+        self.lp.add_wf(Firework(ScriptTask.from_str("echo atomate")))
+        rapidfire(self.lp, FWorker())
+        self.assertEqual(self.lp.get_fw_by_id(1).state, "COMPLETED")
+
+    def test_isolation(self):
+        self._check_isolated()
+
+
+if __name__ == "__main__":
+    unittest.main()
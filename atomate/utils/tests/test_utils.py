@@ -1,13 +1,16 @@
 # coding: utf-8
 
 import os
+import sys
+import unittest
 from collections import defaultdict
 
 from pymongo.database import Database
 
 from fireworks import FiretaskBase, Firework, Workflow, explicit_serialize, FWAction
 
-from atomate.utils.utils import env_chk, get_logger, get_mongolike, recursive_get_result, recursive_update, get_database, get_uri
+from atomate.utils.utils import env_chk, get_logger, get_mongolike, recursive_get_result, recursive_update, get_database, get_uri, \
+    StageTimer
 
 from atomate.utils.testing import AtomateTest
 
@@ -112,3 +115,32 @@ class UtilsTests(AtomateTest):
         self.assertTrue(isinstance(db, Database))
         self.assertEqual(db.client.address[0], "localhost")
         self.assertEqual(db.name, "atomate_unittest")
+
+
+class StageTimerTest(unittest.TestCase):
+    def test_stages(self):
+        timer = StageTimer()
+        for _ in range(2):
+            with timer.stage("outer"):
+                with timer.stage("inner"):
+                    pass
+        self.assertEqual(set(timer.stats), {"outer", "inner"})
+        self.assertGreaterEqual(timer.stats["outer"]["time"], timer.stats["inner"]["time"])
+
+        timer = StageTimer(enabled=False)
+        with timer.stage("outer"):
+            pass
+        self.assertEqual(timer.stats, {})
+
+    @unittest.skipIf(sys.version_info < (3, 9), "tracemalloc.reset_peak needs Python 3.9")
+    def test_track_memory(self):
+        timer = StageTimer(track_memory=True)
+        with timer.stage("outer"):
+            with timer.stage("inner"):
+                data = bytearray(10 ** 7)
+            del data
+            with timer.stage("small"):
+                data = bytearray(10 ** 5)
+        self.assertGreaterEqual(timer.stats["inner"]["peak_memory"], 10 ** 7)
+        self.assertGreaterEqual(timer.stats["outer"]["peak_memory"], 10 ** 7)
+        self.assertLess(timer.stats["small"]["peak_memory"], 10 ** 6)
@@ -5,8 +5,10 @@ import logging
 import os
 import sys
 import socket
+import tracemalloc
+from contextlib import contextmanager
 from random import randint
-from time import time
+from time import perf_counter, time
 
 from pymongo import MongoClient
 from monty.json import MontyDecoder
@@ -155,6 +157,34 @@ def get_meta_from_structure(structure):
     return meta
 
 
+def get_task_index(workflow):
+    """
+    Helper method: index the tasks of a workflow by their serialization name
+    (_fw_name, e.g. "{{atomate.vasp.firetasks.run_calc.RunVaspCustodian}}").
+    The index is cached on the workflow and only rebuilt when its tasks have
+    been replaced, added or removed, so that successive powerups share it.
+
+    Args:
+        workflow (Workflow): Workflow
+
+    Returns:
+        dict of {task _fw_name: list of (fw_id, task_id) tuples}
+    """
+    tasks = [t for fw in workflow.fws for t in fw.tasks]
+    cached = getattr(workflow, "_task_index", None)
+    if cached is not None and len(cached[0]) == len(tasks) and \
+            all(t1 is t2 for t1, t2 in zip(cached[0], tasks)):
+        return cached[1]
+
+    index = {}
+    for idx_fw, fw in enumerate(workflow.fws):
+        for idx_t, t in enumerate(fw.tasks):
+            index.setdefault(t.fw_name, []).append((idx_fw, idx_t))
+    # the tasks themselves are kept so that their ids cannot be reused
+    workflow._task_index = (tasks, index)
+    return index
+
+
 def get_fws_and_tasks(workflow, fw_name_constraint=None, task_name_constraint=None):
     """
     Helper method: given a workflow, returns back the fw_ids and task_ids that match name
@@ -163,18 +193,20 @@ def get_fws_and_tasks(workflow, fw_name_constraint=None, task_name_constraint=No
     Args:
         workflow (Workflow): Workflow
         fw_name_constraint (str): a constraint on the FW name
-        task_name_constraint (str): a constraint on the task name
+        task_name_constraint (str): a constraint on the task name, matched
+            against the task _fw_name (which contains the task class)
 
     Returns:
        a list of tuples of the form (fw_id, task_id) of the RunVasp-type tasks
     """
     fws_and_tasks = []
-    for idx_fw, fw in enumerate(workflow.fws):
-        if fw_name_constraint is None or fw_name_constraint in fw.name:
-            for idx_t, t in enumerate(fw.tasks):
-                if task_name_constraint is None or task_name_constraint in str(t):
-                    fws_and_tasks.append((idx_fw, idx_t))
-    return fws_and_tasks
+    for fw_name, idx_list in get_task_index(workflow).items():
+        if task_name_constraint is None or task_name_constraint in fw_name:
+            fws_and_tasks.extend(idx_list)
+    if fw_name_constraint is not None:
+        fws_and_tasks = [(idx_fw, idx_t) for idx_fw, idx_t in fws_and_tasks
+                         if fw_name_constraint in workflow.fws[idx_fw].name]
+    return sorted(fws_and_tasks)
 
 
 # TODO: @computron - move this somewhere else, maybe dedicated serialization package - @computron
@@ -333,6 +365,74 @@ def get_uri(dir_name):
     return "{}:{}".format(hostname, fullpath)
 
 
+class StageTimer:
+    """
+    Records the wall time, and optionally the peak memory allocated by
+    Python, of the stages of a computation, e.g. of the parsing of a
+    calculation:
+
+        timer = StageTimer()
+        with timer.stage("vasprun"):
+            vrun = Vasprun("vasprun.xml")
+
+    The times of a stage run several times (e.g. for each relaxation) are
+    summed. Stages can be nested.
+    """
+
+    def __init__(self, enabled=True, track_memory=False):
+        """
+        Args:
+            enabled (bool): whether to record anything. If False, the stages
+                only run the code they enclose.
+            track_memory (bool): whether to record the peak memory of the
+                stages with tracemalloc (Python >= 3.9), which slows down the
+                enclosed code.
+        """
+        self.enabled = enabled
+        self.track_memory = track_memory and hasattr(tracemalloc, "reset_peak")
+        self.stats = {}
+        # peak traced memory of the running stages, outermost first
+        self._peaks = []
+        self._started_tracing = False
+
+    def _update_peaks(self):
+        peak = tracemalloc.get_traced_memory()[1]
+        self._peaks = [max(p, peak) for p in self._peaks]
+        tracemalloc.reset_peak()
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Context manager recording a stage.
+
+        Args:
+            name (str): name of the stage, key of its stats
+        """
+        if not self.enabled:
+            yield
+            return
+        if self.track_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            self._update_peaks()
+            start_memory = tracemalloc.get_traced_memory()[0]
+            self._peaks.append(start_memory)
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            stats = self.stats.setdefault(name, {"time": 0.0})
+            stats["time"] += perf_counter() - start
+            if self.track_memory:
+                self._update_peaks()
+                peak = self._peaks.pop() - start_memory
+                stats["peak_memory"] = max(stats.get("peak_memory", 0), peak)
+                if not self._peaks and self._started_tracing:
+                    tracemalloc.stop()
+                    self._started_tracing = False
+
+
 def get_database(config_file=None, settings=None, admin=False, **kwargs):
     d = loadfn(config_file) if settings is None else settings
 
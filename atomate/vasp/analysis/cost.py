@@ -0,0 +1,318 @@
+# coding: utf-8
+
+"""
+This module defines a model of the cost of VASP calculations, fit on the
+run_stats of the tasks collection, used to prioritize the Fireworks of a
+workflow and to request queue resources for them.
+"""
+
+import numpy as np
+
+from monty.json import MSONable
+
+from pymatgen.io.vasp import Kpoints
+
+from atomate.utils.database import resolve_shared_object
+from atomate.utils.utils import get_logger
+from atomate.vasp.database import VaspCalcDb
+
+logger = get_logger(__name__)
+
+# job type of the Fireworks whose inputs are written from a previous
+# calculation, by input writing task
+FROM_PREV_JOB_TYPES = {
+    "WriteVaspStaticFromPrev": "static",
+    "WriteVaspSOCFromPrev": "static",
+    "WriteVaspNMRFromPrev": "static",
+    "WriteVaspNSCFFromPrev": "nscf",
+    "WriteVaspHSEBSFromPrev": "nscf",
+    "WriteScanRelaxFromPrev": "relax",
+}
+
+
+def get_job_type(incar):
+    """
+    Coarse type of a VASP calculation, from its INCAR.
+
+    Args:
+        incar (dict): INCAR parameters
+
+    Returns:
+        str: "dfpt", "md", "relax", "nscf" or "static"
+    """
+    ibrion = incar.get("IBRION", -1 if incar.get("NSW", 0) == 0 else 0)
+    if incar.get("LEPSILON") or ibrion in [5, 6, 7, 8]:
+        return "dfpt"
+    if incar.get("NSW", 0) > 0 and ibrion == 0:
+        return "md"
+    if incar.get("NSW", 0) > 0 and ibrion in [1, 2, 3]:
+        return "relax"
+    if incar.get("ICHARG", 0) >= 10:
+        return "nscf"
+    return "static"
+
+
+def get_nkpoints(kpoints):
+    """
+    Number of k-points of a calculation, before symmetry reduction.
+
+    Args:
+        kpoints (Kpoints): k-points, None if KSPACING is used
+
+    Returns:
+        int: size of the grid of automatic k-points, number of explicit
+            k-points, 1 if unknown
+    """
+    if kpoints is None:
+        return 1
+    if kpoints.style in [Kpoints.supported_modes.Gamma, Kpoints.supported_modes.Monkhorst]:
+        return int(np.prod(kpoints.kpts[0]))
+    if kpoints.style in [Kpoints.supported_modes.Reciprocal, Kpoints.supported_modes.Cartesian]:
+        return len(kpoints.kpts)
+    if kpoints.style == Kpoints.supported_modes.Line_mode:
+        return kpoints.num_kpts * max(len(kpoints.kpts) // 2, 1)
+    return 1
+
+
+def get_task_cost_features(task_doc):
+    """
+    Features of the cost model for a task document.
+
+    Args:
+        task_doc (dict): task document, with at least the nsites, input,
+            calcs_reversed.input.kpoints and run_stats keys
+
+    Returns:
+        dict: features and measured costs, i.e. core_seconds (elapsed time
+            times number of cores, summed over the calculations of the task)
+            and memory_kb (maximum memory used by an MPI rank, as reported
+            in the OUTCAR), None if unavailable
+    """
+    try:
+        incar = task_doc["input"]["incar"]
+        parameters = task_doc["input"]["parameters"]
+        calc = task_doc["calcs_reversed"][-1]
+        kpoints = calc["input"].get("kpoints")
+        kpoints = Kpoints.from_dict(kpoints) if kpoints else None
+        core_seconds = 0
+        memory_kb = 0
+        for name, stats in task_doc["run_stats"].items():
+            if name == "overall":
+                continue
+            core_seconds += stats["Elapsed time (sec)"] * int(stats["cores"])
+            memory_kb = max(memory_kb, stats.get("Maximum memory used (kb)") or 0)
+        features = {
+            "nsites": task_doc["nsites"],
+            "nelect": parameters["NELECT"],
+            "encut": parameters.get("ENCUT", incar.get("ENCUT")),
+            "nkpoints": get_nkpoints(kpoints),
+            "ispin": parameters.get("ISPIN", incar.get("ISPIN", 1)),
+            "job_type": get_job_type(incar),
+            "core_seconds": core_seconds,
+            "memory_kb": memory_kb,
+        }
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not core_seconds or not all([features["nelect"], features["encut"]]):
+        return None
+    return features
+
+
+def get_input_set_cost_features(vasp_input_set):
+    """
+    Features of the cost model for the calculation of a VASP input set.
+
+    Args:
+        vasp_input_set (DictSet): input set
+
+    Returns:
+        dict: features, None if they cannot be determined (e.g. the POTCARs
+            are not available to compute the number of electrons)
+    """
+    try:
+        incar = vasp_input_set.incar
+        features = {
+            "nsites": len(vasp_input_set.structure),
+            "nelect": vasp_input_set.nelect,
+            "encut": incar.get("ENCUT"),
+            "nkpoints": get_nkpoints(vasp_input_set.kpoints),
+            "ispin": incar.get("ISPIN", 1),
+            "job_type": get_job_type(incar),
+        }
+    except Exception as ex:
+        logger.warning("Cannot get the cost features of {}: {}".format(
+            type(vasp_input_set).__name__, ex))
+        return None
+    # e.g. the default cutoff of VASP, which is not in the INCAR
+    return features if features["encut"] else None
+
+
+def get_fw_cost_features(fw):
+    """
+    Features of the cost model for the VASP calculation of a Firework.
+
+    Args:
+        fw (Firework): Firework
+
+    Returns:
+        dict: features, None if the Firework does not write VASP inputs
+            from an input set. For the Fireworks whose inputs are written
+            from a previous calculation, only the job_type key is set.
+    """
+    for task in fw.tasks:
+        name = task.fw_name.split(".")[-1].rstrip("}")
+        if name in FROM_PREV_JOB_TYPES:
+            return {"job_type": FROM_PREV_JOB_TYPES[name]}
+        # the input set may be a reference, see use_shared_objects
+        vis = resolve_shared_object(task.get("vasp_input_set"), VaspCalcDb)
+        if hasattr(vis, "incar") and hasattr(vis, "structure"):
+            return get_input_set_cost_features(vis)
+    return None
+
+
+class CostModel(MSONable):
+    """
+    Log-linear model of the cost of a VASP calculation: the logarithms of the
+    core-seconds and of the maximum memory are linear in the logarithms of
+    the number of sites, of electrons, of the plane wave cutoff and of
+    k-points, with an offset for spin-polarized calculations and for each job
+    type (see get_job_type).
+    """
+
+    def __init__(self, time_coefficients, memory_coefficients, job_types, ndocs=0):
+        """
+        Args:
+            time_coefficients (list): coefficients of the core-seconds model
+            memory_coefficients (list): coefficients of the memory model
+            job_types (list): job types with an offset, in the order of the
+                coefficients
+            ndocs (int): number of task documents the model was fit on
+        """
+        self.time_coefficients = list(time_coefficients)
+        self.memory_coefficients = list(memory_coefficients)
+        self.job_types = list(job_types)
+        self.ndocs = ndocs
+
+    def _get_vector(self, features):
+        vector = [
+            1.0,
+            np.log(features["nsites"]),
+            np.log(features["nelect"]),
+            np.log(features["encut"]),
+            np.log(features["nkpoints"]),
+            float(features["ispin"] == 2),
+        ]
+        vector.extend(float(features["job_type"] == job_type) for job_type in self.job_types)
+        return np.array(vector)
+
+    @classmethod
+    def fit(cls, task_docs, regularization=1e-3):
+        """
+        Fit the model on task documents.
+
+        Args:
+            task_docs (list): task documents, see get_task_cost_features
+            regularization (float): ridge regularization of the coefficients,
+                which keeps the fit well defined for uniform training sets,
+                e.g. with a single cutoff
+
+        Returns:
+            CostModel
+        """
+        features = [get_task_cost_features(d) for d in task_docs]
+        features = [f for f in features if f]
+        if not features:
+            raise ValueError("No task document with run_stats to fit the cost model")
+        job_types = sorted({f["job_type"] for f in features})
+        model = cls([], [], job_types, ndocs=len(features))
+        x = np.array([model._get_vector(f) for f in features])
+        ridge = np.sqrt(regularization) * np.eye(x.shape[1])
+        # the intercept is not regularized
+        ridge[0, 0] = 0
+        x_ridge = np.vstack([x, ridge])
+        for key in ["core_seconds", "memory_kb"]:
+            y = np.log([max(f[key], 1) for f in features])
+            y_ridge = np.concatenate([y, np.zeros(x.shape[1])])
+            coefficients = np.linalg.lstsq(x_ridge, y_ridge, rcond=None)[0]
+            setattr(model, "time_coefficients" if key == "core_seconds"
+                    else "memory_coefficients", coefficients.tolist())
+        return model
+
+    @classmethod
+    def from_db_file(cls, db_file, query=None, limit=0, **kwargs):
+        """
+        Fit the model on the successful tasks of a database.
+
+        Args:
+            db_file (str): path to file containing the database credentials
+            query (dict): additional query on the tasks, e.g. to restrict the
+                fit to the tasks run on a given cluster
+            limit (int): maximum number of tasks, the most recent first.
+                Default: 0 (all the tasks)
+            kwargs: arguments of CostModel.fit
+
+        Returns:
+            CostModel
+        """
+        mmdb = VaspCalcDb.from_db_file(db_file, admin=True)
+        full_query = {"state": "successful", "run_stats.overall": {"$exists": True}}
+        full_query.update(query or {})
+        projection = ["nsites", "input.incar", "input.parameters", "run_stats",
+                      "calcs_reversed.input.kpoints"]
+        docs = mmdb.collection.find(full_query, projection).sort(
+            "last_updated", -1).limit(limit)
+        return cls.fit(list(docs), **kwargs)
+
+    def predict(self, features):
+        """
+        Predict the cost of a calculation.
+
+        Args:
+            features (dict): see get_task_cost_features
+
+        Returns:
+            dict: predicted core_seconds and memory_kb (per MPI rank)
+        """
+        vector = self._get_vector(features)
+        return {
+            "core_seconds": float(np.exp(vector.dot(self.time_coefficients))),
+            "memory_kb": float(np.exp(vector.dot(self.memory_coefficients))),
+        }
+
+    def predict_wf(self, wf):
+        """
+        Predict the cost of the VASP calculations of a workflow. The
+        calculations whose inputs are written from a previous calculation are
+        assumed to have the features of their closest ancestor with an input
+        set.
+
+        Args:
+            wf (Workflow): workflow
+
+        Returns:
+            dict: predicted costs (see predict) by fw_id, None for the
+                Fireworks without VASP calculation or whose features cannot be
+                determined
+        """
+        parent_links = wf.links.parent_links
+        features = {}
+
+        def _get_features(fw_id):
+            if fw_id not in features:
+                fw_features = get_fw_cost_features(wf.id_fw[fw_id])
+                if fw_features and "nsites" not in fw_features:
+                    for parent_id in parent_links.get(fw_id, []):
+                        parent_features = _get_features(parent_id)
+                        if parent_features:
+                            fw_features = dict(parent_features, **fw_features)
+                            break
+                    else:
+                        fw_features = None
+                features[fw_id] = fw_features
+            return features[fw_id]
+
+        predictions = {}
+        for fw_id in wf.id_fw:
+            fw_features = _get_features(fw_id)
+            predictions[fw_id] = self.predict(fw_features) if fw_features else None
+        return predictions
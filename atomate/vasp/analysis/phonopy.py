@@ -9,7 +9,7 @@ __email__ = 'kmathew@lbl.gov'
 # TODO: @matk86 - unit tests?
 
 def get_phonopy_gibbs(energies, volumes, force_constants, structure, t_min, t_step, t_max, mesh,
-                      eos, pressure=0):
+                      eos, pressure=0, supercell_matrix=None):
     """
     Compute QHA gibbs free energy using the phonopy interface.
 
@@ -25,6 +25,7 @@ def get_phonopy_gibbs(energies, volumes, force_constants, structure, t_min, t_st
         eos (str): equation of state used for fitting the energies and the volumes.
             options supported by phonopy: vinet, murnaghan, birch_murnaghan
         pressure (float): in GPa, optional.
+        supercell_matrix (3x3 array-like): supercell of the force constants, optional.
 
     Returns:
         (numpy.ndarray, numpy.ndarray): Gibbs free energy, Temperature
@@ -32,7 +33,8 @@ def get_phonopy_gibbs(energies, volumes, force_constants, structure, t_min, t_st
 
     # quasi-harmonic approx
     phonopy_qha = get_phonopy_qha(energies, volumes, force_constants, structure, t_min, t_step,
-                                  t_max, mesh, eos, pressure=pressure)
+                                  t_max, mesh, eos, pressure=pressure,
+                                  supercell_matrix=supercell_matrix)
 
     # gibbs free energy and temperature
     max_t_index = phonopy_qha._qha._max_t_index
@@ -42,7 +44,7 @@ def get_phonopy_gibbs(energies, volumes, force_constants, structure, t_min, t_st
 
 
 def get_phonopy_qha(energies, volumes, force_constants, structure, t_min, t_step, t_max, mesh, eos,
-                      pressure=0):
+                      pressure=0, supercell_matrix=None):
     """
     Return phonopy QHA interface.
 
@@ -58,6 +60,8 @@ def get_phonopy_qha(energies, volumes, force_constants, structure, t_min, t_step
         eos (str): equation of state used for fitting the energies and the volumes.
             options supported by phonopy: vinet, murnaghan, birch_murnaghan
         pressure (float): in GPa, optional.
+        supercell_matrix (3x3 array-like): supercell of the force constants, as in
+            Structure.make_supercell. Defaults to the unit cell (DFPT force constants).
 
     Returns:
         PhonopyQHA
@@ -71,6 +75,9 @@ def get_phonopy_qha(energies, volumes, force_constants, structure, t_min, t_step
                               scaled_positions=structure.frac_coords,
                               cell=structure.lattice.matrix)
     scell = [[1, 0, 0], [0, 1, 0], [0, 0, 1]]
+    if supercell_matrix is not None:
+        # phonopy multiplies the lattice vectors as columns
+        scell = np.transpose(supercell_matrix).tolist()
     phonon = Phonopy(phon_atoms, scell)
     # compute the required phonon thermal properties
     temperatures = []
@@ -96,7 +103,7 @@ def get_phonopy_qha(energies, volumes, force_constants, structure, t_min, t_step
 
 
 def get_phonopy_thermal_expansion(energies, volumes, force_constants, structure, t_min, t_step,
-                                  t_max, mesh, eos, pressure=0):
+                                  t_max, mesh, eos, pressure=0, supercell_matrix=None):
     """
     Compute QHA thermal expansion coefficient using the phonopy interface.
 
@@ -112,6 +119,7 @@ def get_phonopy_thermal_expansion(energies, volumes, force_constants, structure,
         eos (str): equation of state used for fitting the energies and the volumes.
             options supported by phonopy: vinet, murnaghan, birch_murnaghan
         pressure (float): in GPa, optional.
+        supercell_matrix (3x3 array-like): supercell of the force constants, optional.
 
     Returns:
         (numpy.ndarray, numpy.ndarray): thermal expansion coefficient, Temperature
@@ -119,10 +127,84 @@ def get_phonopy_thermal_expansion(energies, volumes, force_constants, structure,
 
     # quasi-harmonic approx
     phonopy_qha = get_phonopy_qha(energies, volumes, force_constants, structure, t_min, t_step,
-                                  t_max, mesh, eos, pressure=pressure)
+                                  t_max, mesh, eos, pressure=pressure,
+                                  supercell_matrix=supercell_matrix)
 
     # thermal expansion coefficient and temperature
     max_t_index = phonopy_qha._qha._max_t_index
     alpha = phonopy_qha.get_thermal_expansion()[:max_t_index]
     T = phonopy_qha._qha._temperatures[:max_t_index]
     return alpha, T
+
+
+def get_phonopy_displacements(structure, supercell_matrix, displacement=0.01):
+    """
+    Symmetry-reduced set of atomic displacements generated by phonopy to compute the
+    force constants of a supercell by finite displacements.
+
+    Args:
+        structure (Structure): unit cell
+        supercell_matrix (3x3 array-like): scaling matrix of the supercell, as in
+            Structure.make_supercell
+        displacement (float): displacement distance in Angstrom
+
+    Returns:
+        list: (index, vector) for each displacement, with the index of the displaced site in
+            structure * supercell_matrix and the cartesian displacement vector
+    """
+    from phonopy import Phonopy
+    from pymatgen.io.phonopy import get_phonopy_structure
+
+    phonon = Phonopy(get_phonopy_structure(structure), np.transpose(supercell_matrix).tolist())
+    phonon.generate_displacements(distance=displacement)
+    # the sites of the phonopy and pymatgen supercells are not in the same order
+    site_map = _get_site_map(phonon.get_supercell().get_positions(),
+                             structure * supercell_matrix)
+    return [(int(site_map[d["number"]]), np.array(d["displacement"]).tolist())
+            for d in phonon.get_displacement_dataset()["first_atoms"]]
+
+
+def get_phonopy_force_constants(structure, supercell_matrix, displaced_structures, forces):
+    """
+    Compute the force constants of a supercell from the forces in the displaced supercells
+    of get_phonopy_displacements.
+
+    Args:
+        structure (Structure): unit cell
+        supercell_matrix (3x3 array-like): scaling matrix of the supercell, as in
+            Structure.make_supercell
+        displaced_structures (list): displaced supercells (Structure), in any site order
+        forces (list): forces in eV/Angstrom, in the site order of displaced_structures
+
+    Returns:
+        numpy.ndarray: force constants of the supercell
+    """
+    from phonopy import Phonopy
+    from pymatgen.io.phonopy import get_phonopy_structure
+
+    phonon = Phonopy(get_phonopy_structure(structure), np.transpose(supercell_matrix).tolist())
+    positions = phonon.get_supercell().get_positions()
+    first_atoms = []
+    for displaced, f in zip(displaced_structures, forces):
+        site_map = _get_site_map(positions, displaced)
+        frac_disp = displaced.frac_coords[site_map] - \
+            displaced.lattice.get_fractional_coords(positions)
+        frac_disp -= np.round(frac_disp)
+        disp = displaced.lattice.get_cartesian_coords(frac_disp)
+        number = int(np.argmax(np.linalg.norm(disp, axis=1)))
+        first_atoms.append({"number": number, "displacement": disp[number],
+                            "forces": np.array(f)[site_map]})
+    phonon.set_displacement_dataset({"natom": len(positions), "first_atoms": first_atoms})
+    phonon.produce_force_constants()
+    return phonon.get_force_constants()
+
+
+def _get_site_map(positions, structure):
+    """
+    Indices of the sites of the structure closest to the given cartesian positions.
+    """
+    frac_diff = structure.lattice.get_fractional_coords(positions)[:, None, :] - \
+        structure.frac_coords[None, :, :]
+    frac_diff -= np.round(frac_diff)
+    dist = np.linalg.norm(np.dot(frac_diff, structure.lattice.matrix), axis=-1)
+    return np.argmin(dist, axis=1)
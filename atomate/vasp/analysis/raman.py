@@ -0,0 +1,42 @@
+# coding: utf-8
+
+
+import numpy as np
+
+
+def get_epsilon_derivatives(modes, displacements, epsilons):
+    """
+    Derivatives of the dielectric tensor with respect to the displacement
+    along the normal modes, computed for all the modes at once. The
+    derivative is the least-squares slope of the dielectric tensors vs the
+    displacements of each mode, i.e. the finite difference for modes with two
+    displacements.
+
+    Args:
+        modes (list): mode index of each calculation
+        displacements (list): displacement along the mode of each calculation
+        epsilons (list): dielectric tensor (3x3) of each calculation
+
+    Returns:
+        (numpy.ndarray, numpy.ndarray): indices of the modes (sorted) and the
+            derivatives of the dielectric tensor along them, shape (nmodes, 3, 3)
+    """
+    displacements = np.asarray(displacements, dtype=float)
+    epsilons = np.asarray(epsilons, dtype=float)
+    mode_ids, inverse, counts = np.unique(modes, return_inverse=True, return_counts=True)
+    if np.any(counts < 2):
+        raise ValueError("At least two displacements are needed for the modes: {}".format(
+            mode_ids[counts < 2].tolist()))
+
+    # deviations from the mean displacement and dielectric tensor of each mode
+    disp_mean = np.bincount(inverse, weights=displacements) / counts
+    eps_mean = np.zeros((len(mode_ids), 3, 3))
+    np.add.at(eps_mean, inverse, epsilons)
+    eps_mean /= counts[:, None, None]
+    d_disp = displacements - disp_mean[inverse]
+    d_eps = epsilons - eps_mean[inverse]
+
+    covariance = np.zeros((len(mode_ids), 3, 3))
+    np.add.at(covariance, inverse, d_disp[:, None, None] * d_eps)
+    variance = np.bincount(inverse, weights=d_disp ** 2)
+    return mode_ids, covariance / variance[:, None, None]
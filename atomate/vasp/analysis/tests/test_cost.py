@@ -0,0 +1,95 @@
+# coding: utf-8
+
+from pymatgen.io.vasp import Kpoints
+from pymatgen.io.vasp.sets import MPRelaxSet
+from pymatgen.util.testing import PymatgenTest
+
+from atomate.utils.testing import AtomateTest
+from atomate.vasp.analysis.cost import CostModel, get_job_type
+from atomate.vasp.powerups import add_priority_from_cost, set_queue_options_from_cost
+from atomate.vasp.workflows.base.core import get_wf
+
+
+def get_task_doc(nsites, kpts, job_type):
+    incar = {"NSW": 99, "IBRION": 2} if job_type == "relax" else {"NSW": 0}
+    core_seconds = 2 * nsites ** 2 * kpts ** 3 * (3 if job_type == "relax" else 1)
+    return {
+        "nsites": nsites,
+        "input": {"incar": incar,
+                  "parameters": {"NELECT": 4 * nsites, "ENCUT": 520, "ISPIN": 1}},
+        "calcs_reversed": [{"input": {"kpoints": Kpoints.gamma_automatic([kpts] * 3).as_dict()}}],
+        "run_stats": {"standard": {"Elapsed time (sec)": core_seconds / 16, "cores": "16",
+                                   "Maximum memory used (kb)": 1000 * nsites}},
+    }
+
+
+class TestCostModel(AtomateTest):
+
+    def setUp(self):
+        super(TestCostModel, self).setUp(lpad=False)
+        docs = [get_task_doc(n, k, t) for n in [2, 4, 8, 16] for k in [2, 4, 6]
+                for t in ["relax", "static"]]
+        # tasks without run_stats are ignored
+        docs.append({"nsites": 2})
+        self.model = CostModel.fit(docs)
+
+    def test_fit(self):
+        self.assertEqual(self.model.ndocs, 24)
+        self.assertEqual(self.model.job_types, ["relax", "static"])
+        features = {"nsites": 6, "nelect": 24, "encut": 520, "nkpoints": 125, "ispin": 1,
+                    "job_type": "relax"}
+        prediction = self.model.predict(features)
+        self.assertAlmostEqual(prediction["core_seconds"] / (2 * 36 * 125 * 3), 1, 1)
+        self.assertAlmostEqual(prediction["memory_kb"] / 6000, 1, 1)
+
+        model = CostModel.from_dict(self.model.as_dict())
+        self.assertAlmostEqual(model.predict(features)["core_seconds"],
+                               prediction["core_seconds"])
+
+    def test_job_type(self):
+        self.assertEqual(get_job_type({"NSW": 99, "IBRION": 2}), "relax")
+        self.assertEqual(get_job_type({"NSW": 0, "ICHARG": 11}), "nscf")
+        self.assertEqual(get_job_type({"IBRION": 6, "NSW": 1}), "dfpt")
+        self.assertEqual(get_job_type({"NSW": 100, "IBRION": 0}), "md")
+        self.assertEqual(get_job_type({}), "static")
+
+    def test_powerups(self):
+        structure = PymatgenTest.get_structure("Si")
+        wf = get_wf(structure, "bandstructure.yaml",
+                    vis=MPRelaxSet(structure, force_gamma=True))
+        predictions = self.model.predict_wf(wf)
+        # the inputs of the static and nscf calculations are written from
+        # the optimization
+        self.assertTrue(all(predictions.values()))
+        fw_ids = {fw.name.split("-")[-1]: fw.fw_id for fw in wf.fws}
+        opt_cost = predictions[fw_ids["structure optimization"]]["core_seconds"]
+        static_cost = predictions[fw_ids["static"]]["core_seconds"]
+        self.assertAlmostEqual(opt_cost / static_cost, 3, 0)
+
+        wf = add_priority_from_cost(wf, self.model, mode="critical_path")
+        priorities = {name: wf.id_fw[i].spec["_priority"] for name, i in fw_ids.items()}
+        self.assertGreater(priorities["structure optimization"], priorities["static"])
+        self.assertGreater(priorities["static"], priorities["nscf uniform"])
+
+        wf = add_priority_from_cost(wf, self.model)
+        self.assertLess(wf.id_fw[fw_ids["structure optimization"]].spec["_priority"],
+                        wf.id_fw[fw_ids["static"]].spec["_priority"])
+        self.assertRaises(ValueError, add_priority_from_cost, wf, self.model, "unknown")
+
+        wf = set_queue_options_from_cost(wf, self.model, ncores=1, walltime_factor=1,
+                                         min_walltime=0, max_walltime=3600,
+                                         memory_key="mem")
+        qadapter = wf.id_fw[fw_ids["structure optimization"]].spec["_queueadapter"]
+        walltime = min(int(round(opt_cost)), 3600)
+        self.assertEqual(qadapter["walltime"], "{:02d}:{:02d}:{:02d}".format(
+            walltime // 3600, walltime % 3600 // 60, walltime % 60))
+        self.assertAlmostEqual(qadapter["mem"], 3, delta=1)
+
+        # the predicted memory is per MPI rank
+        wf = set_queue_options_from_cost(wf, self.model, ncores=4, memory_key="mem")
+        qadapter = wf.id_fw[fw_ids["structure optimization"]].spec["_queueadapter"]
+        self.assertAlmostEqual(qadapter["mem"], 12, delta=4)
+        wf = set_queue_options_from_cost(wf, self.model, ncores=4, memory_key="mem_per_cpu",
+                                         memory_per_cpu=True)
+        qadapter = wf.id_fw[fw_ids["structure optimization"]].spec["_queueadapter"]
+        self.assertAlmostEqual(qadapter["mem_per_cpu"], 3, delta=1)
@@ -0,0 +1,67 @@
+# coding: utf-8
+
+import unittest
+
+import numpy as np
+
+from pymatgen.analysis.elasticity.strain import Deformation
+from pymatgen.core.structure import Structure
+from pymatgen.transformations.site_transformations import TranslateSitesTransformation
+from pymatgen.util.testing import PymatgenTest
+
+from atomate.vasp.analysis.phonopy import get_phonopy_displacements, \
+    get_phonopy_force_constants
+
+try:
+    import phonopy
+except ImportError:
+    phonopy = None
+
+
+@unittest.skipIf(phonopy is None, "phonopy is not installed")
+class TestFiniteDisplacements(unittest.TestCase):
+
+    def test_force_constants(self):
+        structure = PymatgenTest.get_structure("Si")
+        supercell_matrix = [[2, 0, 0], [0, 2, 0], [0, 0, 2]]
+        supercell = structure * supercell_matrix
+        displacements = get_phonopy_displacements(structure, supercell_matrix)
+        # one independent site in diamond Si
+        self.assertEqual(len(displacements), 1)
+
+        # nearest neighbor springs of constant k
+        k = 5.0
+        displaced_structures = []
+        forces = []
+        for index, vector in displacements:
+            displaced = TranslateSitesTransformation(
+                [index], vector, vector_in_frac_coords=False).apply_transformation(supercell)
+            f = np.zeros((len(supercell), 3))
+            for neighbor in supercell.get_neighbors(supercell[index], 2.5):
+                f[index] -= k * np.array(vector)
+                f[neighbor.index] += k * np.array(vector)
+            # the input sets may sort the sites
+            order = np.arange(len(supercell))[::-1]
+            displaced_structures.append(Structure.from_sites([displaced[i] for i in order]))
+            forces.append(f[order])
+
+        fc = get_phonopy_force_constants(structure, supercell_matrix, displaced_structures,
+                                         forces)
+        self.assertEqual(fc.shape, (16, 16, 3, 3))
+        for i in range(16):
+            np.testing.assert_allclose(fc[i, i], 4 * k * np.eye(3), atol=1e-6)
+        np.testing.assert_allclose(np.sum(fc, axis=1), 0, atol=1e-6)
+
+    def test_deformed_displacements(self):
+        structure = PymatgenTest.get_structure("Si")
+        supercell_matrix = [[2, 0, 0], [0, 2, 0], [0, 0, 2]]
+        isotropic = Deformation(np.eye(3) * 1.01).apply_to_structure(structure)
+        self.assertEqual(len(get_phonopy_displacements(isotropic, supercell_matrix)), 1)
+        # a uniaxial strain lowers the symmetry, more displacements are needed
+        uniaxial = Deformation([[1.02, 0, 0], [0, 1, 0], [0, 0, 1]]).apply_to_structure(
+            structure)
+        self.assertGreater(len(get_phonopy_displacements(uniaxial, supercell_matrix)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
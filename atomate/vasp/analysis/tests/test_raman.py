@@ -0,0 +1,31 @@
+# coding: utf-8
+
+import unittest
+
+import numpy as np
+
+from atomate.vasp.analysis.raman import get_epsilon_derivatives
+
+
+class TestEpsilonDerivatives(unittest.TestCase):
+
+    def test_finite_difference(self):
+        epsilons = np.random.RandomState(0).normal(size=(4, 3, 3))
+        modes, derivatives = get_epsilon_derivatives([5, 2, 5, 2], [0.005, 0.01, -0.005, -0.01],
+                                                     epsilons)
+        self.assertEqual(modes.tolist(), [2, 5])
+        np.testing.assert_allclose(derivatives[0], (epsilons[1] - epsilons[3]) / 0.02)
+        np.testing.assert_allclose(derivatives[1], (epsilons[0] - epsilons[2]) / 0.01)
+
+    def test_least_squares(self):
+        displacements = [-0.01, -0.005, 0.005, 0.01]
+        slope = np.arange(9).reshape(3, 3)
+        epsilons = [np.eye(3) + slope * d for d in displacements]
+        modes, derivatives = get_epsilon_derivatives([1] * 4, displacements, epsilons)
+        np.testing.assert_allclose(derivatives[0], slope, atol=1e-10)
+        self.assertRaises(ValueError, get_epsilon_derivatives, [1, 2, 2], [0, 0.01, -0.01],
+                          epsilons[:3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -42,6 +42,10 @@ STORE_VOLUMETRIC_DATA = ()  # e.g. ("chgcar", "aeccar0", "aeccar2", "elfcar", "l
 # useful for storing duplicate of FW.json
 STORE_ADDITIONAL_JSON = False
 
+# record the time spent in each stage of the parsing and insertion of VASP
+# calculations in the parse_stats of the task documents
+RECORD_PARSE_STATS = True
+
 # vasp output files that will be copied to lobster run
 VASP_OUTPUT_FILES = [
     "OUTCAR",
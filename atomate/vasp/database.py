@@ -8,6 +8,7 @@ from typing import Any
 from monty.json import MontyEncoder
 from pymatgen.io.vasp import Chgcar
 
+import hashlib
 import zlib
 import json
 from bson import ObjectId
@@ -16,13 +17,13 @@ from pymatgen.electronic_structure.bandstructure import (
     BandStructure,
     BandStructureSymmLine,
 )
-from pymatgen.electronic_structure.dos import CompleteDos
+from pymatgen.electronic_structure.dos import CompleteDos, Dos
 
 import gridfs
 from pymongo import ASCENDING, DESCENDING
 
-from atomate.utils.database import CalcDb
-from atomate.utils.utils import get_logger
+from atomate.utils.database import CalcDb, SHARED_OBJECTS_COLLECTION
+from atomate.utils.utils import get_logger, StageTimer
 from maggma.stores.aws import S3Store
 from monty.dev import deprecated
 
@@ -41,7 +42,10 @@ OBJ_NAMES = (
     "aeccar1",
     "aeccar2",
     "elfcar",
+    "neb_images",
 )
+# size of the chunks used when streaming files to gridfs
+FILE_CHUNK_SIZE = 1024 * 1024
 
 
 class VaspCalcDb(CalcDb):
@@ -83,6 +87,8 @@ class VaspCalcDb(CalcDb):
                 "output.energy",
                 "output.energy_per_atom",
                 "dir_name",
+                "tags",
+                "input_fingerprint",
             ]
         )
         self.collection.create_index("task_id", unique=True, background=background)
@@ -109,7 +115,7 @@ class VaspCalcDb(CalcDb):
             )
         # TODO consider sensible index building for the maggma stores
 
-    def insert_task(self, task_doc, use_gridfs=False):
+    def insert_task(self, task_doc, use_gridfs=False, timer=None):
         """
         Inserts a task document (e.g., as returned by Drone.assimilate()) into the database.
         Handles putting DOS, band structure and charge density into GridFS as needed.
@@ -121,10 +127,15 @@ class VaspCalcDb(CalcDb):
             task_doc (dict): the task document
             use_gridfs (bool): store the data matching OBJ_NAMES to gridfs.
                     if maggma_store_type is set (ex. "s3") this flag will be ignored
+            timer (StageTimer): if set, records the time spent inserting the task
+                    document and each object, and stores the stats of the timer
+                    (e.g. those of the parsing by the VaspDrone) in the
+                    parse_stats key of the document
         Returns:
             (int) - task_id of inserted document
         """
 
+        timer = timer or StageTimer(enabled=False)
         big_data_to_store = {}
 
         def extract_from_calcs_reversed(obj_key):
@@ -150,17 +161,19 @@ class VaspCalcDb(CalcDb):
                     big_data_to_store[data_key] = extract_from_calcs_reversed(data_key)
 
         # insert the task document
-        t_id = self.insert(task_doc)
+        with timer.stage("insert"):
+            t_id = self.insert(task_doc)
 
         if "calcs_reversed" in task_doc:
             # upload the data to a particular location and store the reference to that location in the task database
             for data_key, data_val in big_data_to_store.items():
-                fs_di_, compression_type_ = self.insert_object(
-                    use_gridfs=use_gridfs,
-                    d=data_val,
-                    collection=f"{data_key}_fs",
-                    task_id=t_id,
-                )
+                with timer.stage(f"insert_{data_key}"):
+                    fs_di_, compression_type_ = self.insert_object(
+                        use_gridfs=use_gridfs,
+                        d=data_val,
+                        collection=f"{data_key}_fs",
+                        task_id=t_id,
+                    )
                 self.collection.update_one(
                     {"task_id": t_id},
                     {
@@ -173,6 +186,10 @@ class VaspCalcDb(CalcDb):
                     {"task_id": t_id},
                     {"$set": {f"calcs_reversed.0.{data_key}_fs_id": fs_di_}},
                 )
+        if timer.enabled:
+            self.collection.update_one(
+                {"task_id": t_id}, {"$set": {"parse_stats": timer.stats}}
+            )
         return t_id
 
     def retrieve_task(self, task_id):
@@ -201,6 +218,8 @@ class VaspCalcDb(CalcDb):
             aeccar = self.get_aeccar(task_id)
             calc["aeccar0"] = aeccar["aeccar0"]
             calc["aeccar2"] = aeccar["aeccar2"]
+        if "neb_images_fs_id" in calc:
+            calc["neb_images"] = self.get_data_from_maggma_or_gridfs(task_id, "neb_images")
         return task_doc
 
     def insert_object(self, use_gridfs, *args, **kwargs):
@@ -359,6 +378,22 @@ class VaspCalcDb(CalcDb):
         obj_dict = self.get_data_from_maggma_or_gridfs(task_id, key="dos")
         return CompleteDos.from_dict(obj_dict)
 
+    def get_boltztrap_dos(self, fs_id):
+        """
+        Read the DOS of a BoltzTraP run stored by BoltztrapToDb
+
+        Args:
+            fs_id (ObjectId): the dos_boltztrap_fs_id of the boltztrap document
+        Returns:
+            Dos object
+        """
+        fs = gridfs.GridFS(self.db, "dos_boltztrap_fs")
+        obj_dict = json.loads(zlib.decompress(fs.get(fs_id).read()).decode())
+        # the DOS of older documents was json encoded twice
+        if isinstance(obj_dict, str):
+            obj_dict = json.loads(obj_dict)
+        return Dos.from_dict(obj_dict)
+
     @deprecated("No longer supported, use get_chgcar instead")
     def get_chgcar_string(self, task_id):
         pass
@@ -405,6 +440,9 @@ class VaspCalcDb(CalcDb):
         self.db.dos_boltztrap_fs.chunks.delete_many({})
         self.db.bandstructure_fs.files.delete_many({})
         self.db.bandstructure_fs.chunks.delete_many({})
+        self.db.neb_images_fs.files.delete_many({})
+        self.db.neb_images_fs.chunks.delete_many({})
+        self.db[SHARED_OBJECTS_COLLECTION].delete_many({})
         self.build_indexes()
 
 
@@ -412,11 +450,24 @@ class VaspCalcDb(CalcDb):
 
 
 def put_file_in_gridfs(
-    file_path, db, collection_name=None, compress=False, compression_type=None
+    file_path,
+    db,
+    collection_name=None,
+    compress=False,
+    compression_type=None,
+    deduplicate=False,
 ):
     """
     Helper function to store a file in gridfs.
 
+    The file is streamed to gridfs in chunks, so it is never fully loaded in
+    memory, and its sha256 checksum is computed while streaming and stored in
+    the metadata. If deduplicate is True and a file with the same checksum and
+    compression is already in the collection, the new copy is deleted and the
+    id of the existing file is returned. Deduplicated files are shared by all
+    the documents referencing them, with no reference counting: they must not
+    be deleted on behalf of a single document.
+
     Args:
         file_path (str):path to the files that should be saved.
         db (CalcDb): the interface with the database.
@@ -425,21 +476,55 @@ def put_file_in_gridfs(
         compress (bool): if True the file will be compressed with zlib.
         compression_type (str): if file is already compressed defines the
             compression type to be stored in the metadata.
+        deduplicate (bool): if True return the id of an identical file already
+            stored in the collection instead of keeping a new copy.
 
     Returns:
         ObjectId: the mongodb id of the file that have been saved.
     """
 
-    with open(file_path, "rb") as f:
-        data = f.read()
-
     if compress:
-        data = zlib.compress(data, compress)
         compression_type = "zlib"
 
     if collection_name is None:
         collection_name = db.collection
     fs = gridfs.GridFS(db.db, collection_name)
-    fs_id = fs.put(data, metadata={"compression": compression_type})
 
-    return fs_id
+    compressor = zlib.compressobj(compress) if compress else None
+    sha = hashlib.sha256()
+    metadata = {"compression": compression_type}
+    with fs.new_file(metadata=metadata) as grid_in, open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(FILE_CHUNK_SIZE), b""):
+            sha.update(chunk)
+            if compressor:
+                chunk = compressor.compress(chunk)
+            grid_in.write(chunk)
+        if compressor:
+            grid_in.write(compressor.flush())
+        # the metadata is only written to the files collection on close
+        metadata["checksum"] = sha.hexdigest()
+        grid_in.metadata = metadata
+
+    if deduplicate:
+        files = db.db[f"{collection_name}.files"]
+        files.create_index("metadata.checksum")
+        # the oldest copy is kept, so that concurrent uploads of the same file
+        # agree on which one to keep
+        existing = files.find_one(
+            {
+                "metadata.checksum": metadata["checksum"],
+                "metadata.compression": compression_type,
+            },
+            {"_id": 1},
+            sort=[("_id", 1)],
+        )
+        if existing is not None and existing["_id"] != grid_in._id:
+            fs.delete(grid_in._id)
+            logger.info(
+                "File {} already stored in {} with id {}".format(
+                    file_path, collection_name, existing["_id"]
+                )
+            )
+            return existing["_id"]
+
+    return grid_in._id
@@ -16,6 +16,7 @@ import json
 import glob
 import traceback
 import warnings
+from concurrent.futures import ProcessPoolExecutor
 
 from monty.io import zopen
 from monty.json import jsanitize
@@ -34,11 +35,14 @@ from pymatgen.io.vasp.outputs import Chgcar
 from pymatgen.apps.borg.hive import AbstractDrone
 from pymatgen.command_line.bader_caller import bader_analysis_from_path
 
-from atomate.utils.utils import get_uri
+from atomate.utils.utils import get_uri, StageTimer
 
 from atomate.utils.utils import get_logger
+from atomate.vasp.duplicates import load_input_fingerprint
+from atomate.vasp.prev_calc import RESTART_SUMMARY_FILE, get_first_nelectronic_steps
 from atomate import __version__ as atomate_version
-from atomate.vasp.config import STORE_VOLUMETRIC_DATA, STORE_ADDITIONAL_JSON
+from atomate.vasp.config import STORE_VOLUMETRIC_DATA, STORE_ADDITIONAL_JSON, \
+    RECORD_PARSE_STATS
 
 __author__ = 'Kiran Mathew, Shyue Ping Ong, Shyam Dwaraknath, Anubhav Jain'
 __email__ = 'kmathew@lbl.gov'
@@ -89,7 +93,8 @@ class VaspDrone(AbstractDrone):
                  parse_bader=BADER_EXE_EXISTS, parse_chgcar=False, parse_aeccar=False,
                  parse_potcar_file=True,
                  store_volumetric_data=STORE_VOLUMETRIC_DATA,
-                 store_additional_json=STORE_ADDITIONAL_JSON):
+                 store_additional_json=STORE_ADDITIONAL_JSON,
+                 record_parse_stats=RECORD_PARSE_STATS, track_memory=False):
         """
         Initialize a Vasp drone to parse vasp outputs
         Args:
@@ -116,6 +121,11 @@ class VaspDrone(AbstractDrone):
             'AECCAR0', 'AECCAR1', 'AECCAR2', 'ELFCAR'), case insensitive
             store_additional_json (bool): If True, parse any .json files present and store as
             sub-doc including the FW.json if present
+            record_parse_stats (bool): If True, store the time spent in each stage of the
+            parsing (vasprun, dos, bandstructure, bader, symmetry, ...) in the parse_stats
+            key of the task doc
+            track_memory (bool): If True, also store the peak memory of each stage in
+            parse_stats. Slows down the parsing.
         """
         self.parse_dos = parse_dos
         self.additional_fields = additional_fields or {}
@@ -128,6 +138,10 @@ class VaspDrone(AbstractDrone):
         self.store_volumetric_data = [f.lower() for f in store_volumetric_data]
         self.store_additional_json = store_additional_json
         self.parse_potcar_file = parse_potcar_file
+        self.record_parse_stats = record_parse_stats
+        self.track_memory = track_memory
+        # stats of the last assimilated calculation
+        self.timer = StageTimer(record_parse_stats, track_memory)
 
         if parse_chgcar or parse_aeccar:
             warnings.warn("These options have been deprecated in favor of the 'store_volumetric_data' "
@@ -154,14 +168,19 @@ class VaspDrone(AbstractDrone):
             (dict): a task dictionary
         """
         logger.info("Getting task doc for base dir :{}".format(path))
+        self.timer = StageTimer(self.record_parse_stats, self.track_memory)
         vasprun_files = self.filter_files(path, file_pattern="vasprun.xml")
         outcar_files = self.filter_files(path, file_pattern="OUTCAR")
         if len(vasprun_files) > 0 and len(outcar_files) > 0:
-            d = self.generate_doc(path, vasprun_files, outcar_files)
-            self.post_process(path, d)
+            with self.timer.stage("assimilate"):
+                d = self.generate_doc(path, vasprun_files, outcar_files)
+                with self.timer.stage("post_process"):
+                    self.post_process(path, d)
         else:
             raise ValueError("No VASP files found!")
         self.validate_doc(d)
+        if self.record_parse_stats:
+            d["parse_stats"] = self.timer.stats
         return d
 
     def filter_files(self, path, file_pattern="vasprun.xml"):
@@ -213,8 +232,9 @@ class VaspDrone(AbstractDrone):
             d["dir_name"] = fullpath
             d["calcs_reversed"] = [self.process_vasprun(dir_name, taskname, filename)
                                    for taskname, filename in vasprun_files.items()]
-            outcar_data = [Outcar(os.path.join(dir_name, filename)).as_dict()
-                           for taskname, filename in outcar_files.items()]
+            with self.timer.stage("outcar"):
+                outcar_data = [Outcar(os.path.join(dir_name, filename)).as_dict()
+                               for taskname, filename in outcar_files.items()]
             run_stats = {}
             for i, d_calc in enumerate(d["calcs_reversed"]):
                 run_stats[d_calc["task"]["name"]] = outcar_data[i].pop("run_stats")
@@ -304,17 +324,18 @@ class VaspDrone(AbstractDrone):
                     raise
 
             # Store symmetry information
-            sg = SpacegroupAnalyzer(Structure.from_dict(d_calc_final["output"]["structure"]), 0.1)
-            if not sg.get_symmetry_dataset():
-                sg = SpacegroupAnalyzer(Structure.from_dict(d_calc_final["output"]["structure"]),
-                                        1e-3, 1)
-            d["output"]["spacegroup"] = {
-                "source": "spglib",
-                "symbol": sg.get_space_group_symbol(),
-                "number": sg.get_space_group_number(),
-                "point_group": sg.get_point_group_symbol(),
-                "crystal_system": sg.get_crystal_system(),
-                "hall": sg.get_hall()}
+            with self.timer.stage("symmetry"):
+                sg = SpacegroupAnalyzer(Structure.from_dict(d_calc_final["output"]["structure"]), 0.1)
+                if not sg.get_symmetry_dataset():
+                    sg = SpacegroupAnalyzer(Structure.from_dict(d_calc_final["output"]["structure"]),
+                                            1e-3, 1)
+                d["output"]["spacegroup"] = {
+                    "source": "spglib",
+                    "symbol": sg.get_space_group_symbol(),
+                    "number": sg.get_space_group_number(),
+                    "point_group": sg.get_point_group_symbol(),
+                    "crystal_system": sg.get_crystal_system(),
+                    "hall": sg.get_hall()}
 
             # store dieelctric and piezo information
             if d["input"]["parameters"].get("LEPSILON"):
@@ -344,9 +365,9 @@ class VaspDrone(AbstractDrone):
         """
         vasprun_file = os.path.join(dir_name, filename)
 
-        vrun = Vasprun(vasprun_file, parse_potcar_file=self.parse_potcar_file)
-
-        d = vrun.as_dict()
+        with self.timer.stage("vasprun"):
+            vrun = Vasprun(vasprun_file, parse_potcar_file=self.parse_potcar_file)
+            d = vrun.as_dict()
 
         # rename formula keys
         for k, v in {"formula_pretty": "pretty_formula",
@@ -373,20 +394,23 @@ class VaspDrone(AbstractDrone):
 
         # Process bandstructure and DOS
         if self.bandstructure_mode != False:
-            bs = self.process_bandstructure(vrun)
+            with self.timer.stage("bandstructure"):
+                bs = self.process_bandstructure(vrun)
             if bs:
                 d["bandstructure"] = bs
 
         if self.parse_dos != False:
-            dos = self.process_dos(vrun)
+            with self.timer.stage("dos"):
+                dos = self.process_dos(vrun)
             if dos:
                 d["dos"] = dos
 
         # Parse electronic information if possible.
         # For certain optimizers this is broken and we don't get an efermi resulting in the bandstructure
         try:
-            bs = vrun.get_band_structure()
-            bs_gap = bs.get_band_gap()
+            with self.timer.stage("band_gap"):
+                bs = vrun.get_band_structure()
+                bs_gap = bs.get_band_gap()
             d["output"]["vbm"] = bs.get_vbm()["energy"]
             d["output"]["cbm"] = bs.get_cbm()["energy"]
             d["output"]["bandgap"] = bs_gap["energy"]
@@ -427,16 +451,18 @@ class VaspDrone(AbstractDrone):
 
         # parse axially averaged locpot
         if "locpot" in d["output_file_paths"] and self.parse_locpot:
-            locpot = Locpot.from_file(os.path.join(dir_name, d["output_file_paths"]["locpot"]))
-            d["output"]["locpot"] = {i: locpot.get_average_along_axis(i) for i in range(3)}
+            with self.timer.stage("locpot"):
+                locpot = Locpot.from_file(os.path.join(dir_name, d["output_file_paths"]["locpot"]))
+                d["output"]["locpot"] = {i: locpot.get_average_along_axis(i) for i in range(3)}
 
         if self.store_volumetric_data:
             for file in self.store_volumetric_data:
                 if file in d["output_file_paths"]:
                     try:
                         # assume volumetric data is all in CHGCAR format
-                        data = Chgcar.from_file(os.path.join(dir_name, d["output_file_paths"][file]))
-                        d[file] = data.as_dict()
+                        with self.timer.stage("volumetric"):
+                            data = Chgcar.from_file(os.path.join(dir_name, d["output_file_paths"][file]))
+                            d[file] = data.as_dict()
                     except:
                         raise ValueError("Failed to parse {} at {}.".format(file,
                                                                             d["output_file_paths"][file]))
@@ -450,7 +476,8 @@ class VaspDrone(AbstractDrone):
         # perform Bader analysis using Henkelman bader
         if self.parse_bader and "chgcar" in d["output_file_paths"]:
             suffix = '' if taskname == 'standard' else ".{}".format(taskname)
-            bader = bader_analysis_from_path(dir_name, suffix=suffix)
+            with self.timer.stage("bader"):
+                bader = bader_analysis_from_path(dir_name, suffix=suffix)
             d["bader"] = bader
 
         return d
@@ -628,6 +655,26 @@ class VaspDrone(AbstractDrone):
                 with zopen(fname, "rt") as f:
                     custodian.append(json.load(f)[0])
             d["custodian"] = custodian
+        # The fingerprint of the inputs written by CheckDuplicateCalc, used to
+        # find the tasks run with the same inputs. If the outputs were copied
+        # from such a task, it is recorded as d["duplicate_of"]
+        fingerprint = load_input_fingerprint(fullpath)
+        if fingerprint:
+            d["input_fingerprint"] = fingerprint["input_fingerprint"]
+            if fingerprint.get("duplicate_of"):
+                d["duplicate_of"] = fingerprint["duplicate_of"]["task_id"]
+        # The restart files copied from a previous calculation by
+        # CopyVaspRestartFiles, with the electronic steps they saved in the
+        # first ionic step compared with the previous calculation
+        filenames = glob.glob(os.path.join(fullpath, RESTART_SUMMARY_FILE + "*"))
+        if len(filenames) >= 1:
+            with zopen(filenames[0], "rt") as f:
+                restart = json.load(f)
+            restart["nelectronic_steps"] = get_first_nelectronic_steps(d)
+            if restart.get("prev_nelectronic_steps") and restart["nelectronic_steps"]:
+                restart["electronic_steps_saved"] = \
+                    restart["prev_nelectronic_steps"] - restart["nelectronic_steps"]
+            d["restart"] = restart
         # Convert to full uri path.
         if self.use_full_uri:
             d["dir_name"] = get_uri(dir_name)
@@ -655,7 +702,8 @@ class VaspDrone(AbstractDrone):
         if self.store_additional_json and filenames:
             for filename in filenames:
                 key = os.path.basename(filename).split('.')[0]
-                if key != "custodian" and key != "transformations":
+                if key not in ["custodian", "transformations", "input_fingerprint",
+                               "restart_summary"]:
                     with zopen(filename, "rt") as f:
                         d[key] = json.load(f)
 
@@ -702,7 +750,9 @@ class VaspDrone(AbstractDrone):
             "bandstructure_mode": self.bandstructure_mode,
             "additional_fields": self.additional_fields,
             "use_full_uri": self.use_full_uri,
-            "runs": self.runs}
+            "runs": self.runs,
+            "record_parse_stats": self.record_parse_stats,
+            "track_memory": self.track_memory}
         return {
             "@module": self.__class__.__module__,
             "@class": self.__class__.__name__,
@@ -713,3 +763,213 @@ class VaspDrone(AbstractDrone):
     @classmethod
     def from_dict(cls, d):
         return cls(**d["init_args"])
+
+
+def _get_output_file(dir_name, name):
+    # the file itself if present, else e.g. its gzipped version
+    path = os.path.join(dir_name, name)
+    if os.path.exists(path):
+        return path
+    paths = sorted(glob.glob(path + "*"))
+    return paths[-1] if paths else None
+
+
+def parse_neb_image(image_dir):
+    """
+    Parse the outputs of an image of a NEB calculation, or of the relaxation
+    of one of its endpoints. A module-level function, so that the images can
+    be parsed in a pool of processes.
+
+    Args:
+        image_dir (str): directory of the image, e.g. "neb/01"
+
+    Returns:
+        (dict, dict): summary of the image (final structure, energy, tangent
+            force) and its parsed OUTCAR, None if the image has no OUTCAR
+            (e.g. the endpoints of the NEB).
+    """
+    summary = {"dir_name": os.path.basename(os.path.normpath(image_dir)),
+               "structure": None}
+    for name in ["CONTCAR", "POSCAR"]:
+        structure_file = _get_output_file(image_dir, name)
+        if structure_file and os.path.getsize(structure_file) > 0:
+            summary["structure"] = Structure.from_file(structure_file).as_dict()
+            break
+
+    outcar_file = _get_output_file(image_dir, "OUTCAR")
+    if not outcar_file:
+        return summary, None
+    outcar = Outcar(outcar_file)
+    outcar.read_neb()
+    summary["energy"] = outcar.data["energy"]
+    summary["tangent_force"] = outcar.data.get("tangent_force")
+    summary["completed"] = "Elapsed time (sec)" in outcar.run_stats
+    return summary, jsanitize(outcar.as_dict())
+
+
+class NEBDrone(AbstractDrone):
+    """
+    Drone parsing NEB calculations, i.e. directories with the images in the
+    00, 01, ..., NN subdirectories, into a compact document with the energy
+    profile and barriers of the band and a summary of each image. The parsed
+    OUTCARs of the images are stored in calcs_reversed.0.neb_images, which
+    VaspCalcDb.insert_task moves to GridFS.
+
+    The images are parsed concurrently in a pool of processes.
+    """
+
+    __version__ = atomate_version
+
+    def __init__(self, additional_fields=None, use_full_uri=True, nworkers=None):
+        """
+        Args:
+            additional_fields (dict): dictionary of additional fields to add to output document
+            use_full_uri (bool): converts the directory path to the full URI path
+            nworkers (int): number of processes parsing the images. Default: number of CPUs.
+                If 1, the images are parsed in the current process.
+        """
+        self.additional_fields = additional_fields or {}
+        self.use_full_uri = use_full_uri
+        self.nworkers = nworkers
+
+    def assimilate(self, path, endpoint_dirs=None):
+        """
+        Parses a NEB calculation.
+
+        Args:
+            path (str): Path to the directory of the NEB calculation
+            endpoint_dirs ([str]): Paths to the relaxations of the two endpoints, e.g. the
+                "ep0" and "ep1" directories of the NEB workflow. Their energies are used
+                when the 00 and NN directories of the NEB have no OUTCAR.
+
+        Returns:
+            (dict): a task dictionary
+        """
+        logger.info("Getting NEB task doc for base dir :{}".format(path))
+        image_dirs = sorted(d for d in glob.glob(os.path.join(path, "[0-9][0-9]"))
+                            if os.path.isdir(d))
+        if len(image_dirs) < 3:
+            raise ValueError("No NEB images found in {}!".format(path))
+        endpoint_dirs = endpoint_dirs or []
+        if len(endpoint_dirs) not in [0, 2]:
+            raise ValueError("endpoint_dirs must be the directories of the 2 endpoints")
+
+        parsed = self.parse_dirs(image_dirs + list(endpoint_dirs))
+        images, outcars = [list(x) for x in zip(*parsed[:len(image_dirs)])]
+        # use the energies of the endpoint relaxations when needed
+        for i, (summary, outcar) in zip([0, -1], parsed[len(image_dirs):]):
+            if outcars[i] is None and outcar is not None:
+                for k in ["energy", "tangent_force", "completed"]:
+                    images[i][k] = summary[k]
+                images[i]["endpoint_dir"] = os.path.abspath(endpoint_dirs[i])
+
+        d = self.generate_doc(path, images, outcars)
+        self.validate_doc(d)
+        return d
+
+    def parse_dirs(self, dirs):
+        """
+        Parse the image directories with parse_neb_image, in a pool of processes.
+
+        Args:
+            dirs ([str]): image directories
+
+        Returns:
+            list of the results of parse_neb_image, in the same order as dirs
+        """
+        nworkers = max(1, min(self.nworkers or os.cpu_count() or 1, len(dirs)))
+        if nworkers == 1:
+            return [parse_neb_image(d) for d in dirs]
+        with ProcessPoolExecutor(max_workers=nworkers) as executor:
+            return list(executor.map(parse_neb_image, dirs))
+
+    def generate_doc(self, dir_name, images, outcars):
+        """
+        Build the task document of a NEB calculation from its parsed images.
+        """
+        fullpath = os.path.abspath(dir_name)
+        d = jsanitize(self.additional_fields, strict=True)
+        d["schema"] = {"code": "atomate", "version": NEBDrone.__version__}
+        d["dir_name"] = get_uri(dir_name) if self.use_full_uri else fullpath
+
+        structures = [Structure.from_dict(s["structure"]) for s in images]
+        comp = structures[0].composition
+        d["formula_pretty"] = comp.reduced_formula
+        d["formula_anonymous"] = comp.anonymized_formula
+        d["formula_reduced_abc"] = comp.reduced_composition.alphabetical_formula
+        d["composition_unit_cell"] = comp.as_dict()
+        d["composition_reduced"] = comp.reduced_composition.as_dict()
+        d["elements"] = sorted(el.symbol for el in comp.elements)
+        d["nelements"] = len(comp.elements)
+        d["chemsys"] = "-".join(d["elements"])
+        d["nsites"] = len(structures[0])
+
+        d["input"] = {"nimages": len(images) - 2}
+        for name, cls in [("incar", Incar), ("kpoints", Kpoints)]:
+            input_file = _get_output_file(dir_name, name.upper())
+            if input_file:
+                d["input"][name] = cls.from_file(input_file).as_dict()
+
+        for i, image in enumerate(images):
+            image["index"] = i
+
+        # reaction coordinate: cumulative distance between the images, as in
+        # pymatgen.analysis.transition_state.NEBAnalysis
+        r = [0.0]
+        for s1, s2 in zip(structures[:-1], structures[1:]):
+            dists = np.array([site2.distance(site1) for site1, site2 in zip(s1, s2)])
+            r.append(float(np.sqrt(np.sum(dists ** 2))))
+        energies = [image.get("energy") for image in images]
+        d["output"] = {
+            "r": np.cumsum(r).tolist(),
+            "energies": energies,
+            "tangent_forces": [image.get("tangent_force") for image in images],
+            "forward_barrier": None,
+            "backward_barrier": None,
+        }
+        if None not in energies:
+            ts_index = int(np.argmax(energies))
+            d["output"].update({
+                "relative_energies": [e - energies[0] for e in energies],
+                "ts_index": ts_index,
+                "forward_barrier": energies[ts_index] - energies[0],
+                "backward_barrier": energies[ts_index] - energies[-1]})
+        else:
+            logger.warning("Missing endpoint energies in {}, the barriers are not computed. "
+                           "Set endpoint_dirs to the relaxations of the endpoints.".format(fullpath))
+
+        d["images"] = images
+        d["calcs_reversed"] = [{"task": {"type": "neb", "name": "neb"},
+                                "dir_name": fullpath,
+                                "neb_images": outcars}]
+        d["state"] = "successful" if all(image.get("completed") for image in images[1:-1]) \
+            else "unsuccessful"
+        d["last_updated"] = datetime.datetime.utcnow()
+        return d
+
+    def validate_doc(self, d):
+        for k in ["dir_name", "images", "output", "state"]:
+            if k not in d:
+                raise ValueError("The NEB task document has no {} key".format(k))
+
+    def get_valid_paths(self, path):
+        (parent, subdirs, files) = path
+        if "00" in subdirs and "01" in subdirs:
+            return [parent]
+        return []
+
+    def as_dict(self):
+        init_args = {
+            "additional_fields": self.additional_fields,
+            "use_full_uri": self.use_full_uri,
+            "nworkers": self.nworkers}
+        return {
+            "@module": self.__class__.__module__,
+            "@class": self.__class__.__name__,
+            "version": self.__class__.__version__,
+            "init_args": init_args
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(**d["init_args"])
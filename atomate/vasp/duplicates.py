@@ -0,0 +1,164 @@
+"""
+This module defines the fingerprint of the inputs of a VASP calculation, used
+to detect calculations that were already run by another workflow. The
+CheckDuplicateCalc task writes the fingerprint of the inputs before VASP is
+run, and records the successful task it duplicates, if any. The outputs of
+that task are then copied and the run tasks do not run VASP again.
+"""
+
+import glob
+import hashlib
+import json
+import os
+
+from monty.json import MontyEncoder
+from monty.os.path import zpath
+from monty.serialization import dumpfn, loadfn
+
+from pymatgen.io.vasp import Incar, Kpoints, Poscar
+
+from atomate.utils.utils import get_logger
+
+logger = get_logger(__name__)
+
+INPUT_FINGERPRINT_FILE = "input_fingerprint.json"
+# INCAR parameters that only change how the calculation is parallelized,
+# which do not change its results
+PARALLELIZATION_INCAR_PARAMS = ["NPAR", "NCORE", "KPAR", "NSIM", "LPLANE", "LSCALU"]
+# number of decimals of the lattice and coordinates that are compared
+FINGERPRINT_DECIMALS = 6
+# files written by VASP (and custodian for the original inputs) that are
+# copied from the duplicated calculation, possibly with a suffix, e.g.
+# vasprun.xml.relax1.gz
+DUPLICATE_OUTPUT_FILES = [
+    "vasprun.xml", "OUTCAR", "CONTCAR", "OSZICAR", "CHGCAR", "CHG",
+    "AECCAR0", "AECCAR1", "AECCAR2", "LOCPOT", "ELFCAR", "WAVECAR", "WAVEDER",
+    "DOSCAR", "EIGENVAL", "PROCAR", "IBZKPT", "XDATCAR", "PCDAT", "REPORT",
+    "OPTIC", "vaspout.h5",
+]
+# inputs only copied with a suffix, e.g. INCAR.relax1 or INCAR.orig, the
+# current inputs are written by the Firework
+DUPLICATE_INPUT_FILES = ["INCAR", "KPOINTS", "POSCAR", "POTCAR"]
+
+
+def get_input_fingerprint(calc_dir="."):
+    """
+    Fingerprint of the VASP inputs of a directory: hash of the INCAR (without
+    the parallelization parameters), of the KPOINTS, of the structure of the
+    POSCAR (rounded) and of the POTCAR or POTCAR.spec file.
+
+    Args:
+        calc_dir (str): directory with the VASP input files
+
+    Returns:
+        str: hexadecimal sha256 digest
+    """
+    incar = Incar.from_file(zpath(os.path.join(calc_dir, "INCAR")))
+    incar = {k: v for k, v in incar.items() if k not in PARALLELIZATION_INCAR_PARAMS}
+
+    # the KPOINTS may be missing, e.g. when KSPACING is set
+    kpoints = None
+    kpoints_path = zpath(os.path.join(calc_dir, "KPOINTS"))
+    if os.path.exists(kpoints_path):
+        kpoints = Kpoints.from_file(kpoints_path).as_dict()
+        kpoints.pop("comment", None)
+
+    poscar = Poscar.from_file(zpath(os.path.join(calc_dir, "POSCAR")))
+    structure = poscar.structure
+    poscar_inputs = {
+        "lattice": structure.lattice.matrix.round(FINGERPRINT_DECIMALS).tolist(),
+        "species": [str(site.species) for site in structure],
+        "frac_coords": (structure.frac_coords % 1)
+        .round(FINGERPRINT_DECIMALS)
+        .tolist(),
+        "selective_dynamics": poscar.selective_dynamics,
+    }
+
+    potcar_hash = None
+    for name in ["POTCAR", "POTCAR.spec"]:
+        potcar_path = zpath(os.path.join(calc_dir, name))
+        if os.path.exists(potcar_path):
+            with open(potcar_path, "rb") as f:
+                potcar_hash = hashlib.sha256(f.read()).hexdigest()
+            break
+
+    inputs = {"incar": incar, "kpoints": kpoints, "poscar": poscar_inputs, "potcar": potcar_hash}
+    return hashlib.sha256(
+        json.dumps(inputs, sort_keys=True, cls=MontyEncoder).encode()
+    ).hexdigest()
+
+
+def get_duplicate_output_files(calc_dir):
+    """
+    Output files of a calculation to copy when it is duplicated, see
+    DUPLICATE_OUTPUT_FILES. The other files, e.g. the FW.json,
+    transformations.json, custodian.json or the prev_calc_summary.json files
+    belong to the Firework of the original calculation.
+
+    Args:
+        calc_dir (str): directory of the calculation
+
+    Returns:
+        [str]: file names
+    """
+    files = []
+    for f in sorted(os.listdir(calc_dir)):
+        if not os.path.isfile(os.path.join(calc_dir, f)):
+            continue
+        if any(f == name or f.startswith(name + ".") for name in DUPLICATE_OUTPUT_FILES) or \
+                any(f.startswith(name + ".") for name in DUPLICATE_INPUT_FILES):
+            files.append(f)
+    return files
+
+
+def write_input_fingerprint(fingerprint, calc_dir=".", duplicate_of=None):
+    """
+    Write the fingerprint of the inputs of a calculation in its directory.
+
+    Args:
+        fingerprint (str): fingerprint of the inputs
+        calc_dir (str): directory of the calculation
+        duplicate_of (dict): task_id and dir_name of the successful task with
+            the same fingerprint, if any
+    """
+    dumpfn(
+        {"input_fingerprint": fingerprint, "duplicate_of": duplicate_of},
+        os.path.join(calc_dir, INPUT_FINGERPRINT_FILE),
+    )
+
+
+def load_input_fingerprint(calc_dir="."):
+    """
+    Load the fingerprint written by write_input_fingerprint.
+
+    Args:
+        calc_dir (str): directory of the calculation
+
+    Returns:
+        dict: with the input_fingerprint and duplicate_of keys, None if the
+            directory has no fingerprint
+    """
+    # the file is gzipped with the outputs by custodian
+    paths = sorted(glob.glob(os.path.join(calc_dir, INPUT_FINGERPRINT_FILE + "*")))
+    if not paths:
+        return None
+    try:
+        return loadfn(paths[0], cls=None)
+    except Exception:
+        logger.warning("Cannot read {}".format(paths[0]))
+        return None
+
+
+def get_duplicate_calc(calc_dir="."):
+    """
+    Get the successful task duplicated by the calculation of a directory.
+
+    Args:
+        calc_dir (str): directory of the calculation
+
+    Returns:
+        dict: task_id and dir_name of the duplicated task, None if the
+            calculation is not a duplicate
+    """
+    fingerprint = load_input_fingerprint(calc_dir)
+    return fingerprint.get("duplicate_of") if fingerprint else None
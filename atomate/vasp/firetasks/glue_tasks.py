@@ -3,8 +3,9 @@
 import glob
 import warnings
 
-from pymatgen.io.vasp import Vasprun
+from pymatgen.io.vasp import Incar, Kpoints, Poscar, Vasprun
 from monty.os.path import zpath
+from monty.serialization import dumpfn
 
 """
 This module defines tasks that acts as a glue between other vasp Firetasks to allow communication
@@ -12,11 +13,11 @@ between different Firetasks and Fireworks. This module also contains tasks that
 flow of the workflow, e.g. tasks to check stability or the gap is within a certain range.
 """
 
-import shutil
-import gzip
 import os
 import re
 
+from pymongo import DESCENDING
+
 from pymatgen import MPRester
 from pymatgen.io.vasp.sets import get_vasprun_outcar
 from pymatgen.core.structure import Structure
@@ -26,6 +27,12 @@ from fireworks import explicit_serialize, FiretaskBase, FWAction
 from atomate.utils.utils import env_chk, get_logger
 from atomate.common.firetasks.glue_tasks import get_calc_loc, PassResult, \
     CopyFiles, CopyFilesFromCalcLoc
+from atomate.utils.fileio import DEFAULT_TRANSFER_WORKERS, transfer_files
+from atomate.vasp.database import VaspCalcDb
+from atomate.vasp.duplicates import get_duplicate_output_files, get_input_fingerprint, \
+    write_input_fingerprint
+from atomate.vasp.prev_calc import PREV_CALC_SUMMARY_FILE, RESTART_SUMMARY_FILE, \
+    get_restart_files, load_prev_calc_summary
 
 logger = get_logger(__name__)
 
@@ -38,9 +45,10 @@ class CopyVaspOutputs(CopyFiles):
     """
     Copy files from a previous VASP run directory to the current directory.
     By default, copies 'INCAR', 'POSCAR' (default: via 'CONTCAR'), 'KPOINTS',
-    'POTCAR', 'OUTCAR', and 'vasprun.xml'. Additional files, e.g. 'CHGCAR',
-    can also be specified. Automatically handles files that have a ".gz"
-    extension (copies and unzips).
+    'POTCAR', 'OUTCAR', 'vasprun.xml' and the summary of the run written by
+    VaspToDb, if any. Additional files, e.g. 'CHGCAR', can also be specified.
+    Automatically handles files that have a ".gz" extension (copies and
+    unzips).
 
     Note that you must specify either "calc_loc" or "calc_dir" to indicate
     the directory containing the previous VASP run.
@@ -62,10 +70,18 @@ class CopyVaspOutputs(CopyFiles):
             "POTCAR.spec". This is intended to allow testing of workflows
             without requiring pseudo-potentials to be installed on the system.
             Default: False
+        nworkers (int): maximum number of files copied concurrently.
+            Default: 4
+        link_mode (str): if "reflink" or "hardlink", link the uncompressed
+            files instead of copying them when source and destination are on
+            the same filesystem. Hard links share their content with the
+            source, so only use them for files that will not be modified in
+            place. Default: None (always copy)
     """
 
     optional_params = ["calc_loc", "calc_dir", "filesystem", "additional_files",
-                       "contcar_to_poscar", "potcar_spec"]
+                       "contcar_to_poscar", "potcar_spec", "nworkers",
+                       "link_mode"]
 
     def run_task(self, fw_spec):
 
@@ -77,7 +93,7 @@ class CopyVaspOutputs(CopyFiles):
         files_to_copy = None
         if "$ALL" not in self.get("additional_files", []):
             files_to_copy = ['INCAR', 'POSCAR', 'KPOINTS', 'POTCAR', 'OUTCAR',
-                             'vasprun.xml']
+                             'vasprun.xml', PREV_CALC_SUMMARY_FILE]
             if self.get("additional_files"):
                 files_to_copy.extend(self["additional_files"])
             if self.get("potcar_spec", False):
@@ -96,11 +112,12 @@ class CopyVaspOutputs(CopyFiles):
                         filesystem=self.get("filesystem", None),
                         files_to_copy=files_to_copy, from_path_dict=calc_loc)
         # do the copying
-        self.copy_files()
+        transfer_stats = self.copy_files()
+        return FWAction(stored_data={"transfer_stats": transfer_stats})
 
     def copy_files(self):
         all_files = self.fileclient.listdir(self.from_dir)
-        # start file copy
+        transfers = []
         for f in self.files_to_copy:
             prev_path_full = os.path.join(self.from_dir, f)
             dest_fname = 'POSCAR' if f == 'CONTCAR' and self.get(
@@ -130,19 +147,185 @@ class CopyVaspOutputs(CopyFiles):
                 if f == 'KPOINTS':
                     warnings.warn("Cannot find file: {}".format(f))
                     continue
+                # the summary is optional, e.g. for runs not parsed by VaspToDb
+                elif f == PREV_CALC_SUMMARY_FILE:
+                    continue
                 else:
                     raise ValueError("Cannot find file: {}".format(f))
 
-            # copy the file (minus the relaxation extension)
-            self.fileclient.copy(prev_path_full + relax_ext + gz_ext,
-                                 dest_path + gz_ext)
+            # copy the file (minus the relaxation extension), the .gz files
+            # are unzipped while being copied
+            transfers.append((prev_path_full + relax_ext + gz_ext, dest_path))
+
+        return self.fileclient.transfer(
+            transfers,
+            nworkers=self.get("nworkers", DEFAULT_TRANSFER_WORKERS),
+            decompress=True,
+            link_mode=self.get("link_mode", None),
+        )
+
+
+@explicit_serialize
+class CopyVaspRestartFiles(CopyFiles):
+    """
+    Copy the WAVECAR and CHGCAR of a previous VASP run, if the current
+    calculation can read them (see atomate.vasp.prev_calc.get_restart_files),
+    and set ISTART and ICHARG accordingly in the INCAR. Must be run after the
+    inputs are written and the outputs of the previous run copied by
+    CopyVaspOutputs, whose summary is used to check the compatibility. The
+    copied files and the number of electronic steps of the previous run are
+    recorded in a restart_summary.json file, parsed by VaspToDb.
+
+    Note that the previous run only writes a WAVECAR if LWAVE = True.
+
+    Optional params:
+        calc_loc (str OR bool): if True will set most recent calc_loc. If str
+            search for the most recent calc_loc with the matching name
+        calc_dir (str): path to dir that contains VASP output files.
+        filesystem (str): remote filesystem. e.g. username@host
+        restart_files ([str]): restart files to copy, among "WAVECAR" and
+            "CHGCAR". Default: both
+        nworkers (int): maximum number of files copied concurrently.
+            Default: 4
+        link_mode (str): if "reflink", clone the files instead of copying
+            them when possible. Hard links cannot be used since VASP
+            overwrites the restart files in place. Default: None
+    """
 
-            # unzip the .gz if needed
-            if gz_ext in ['.gz', ".GZ"]:
-                # unzip dest file
-                with open(dest_path, 'wb') as f_out, gzip.open(dest_path + gz_ext, 'rb') as f_in:
-                    shutil.copyfileobj(f_in, f_out)
-                os.remove(dest_path + gz_ext)
+    optional_params = ["calc_loc", "calc_dir", "filesystem", "restart_files",
+                       "nworkers", "link_mode"]
+
+    def run_task(self, fw_spec):
+        if self.get("link_mode") == "hardlink":
+            raise ValueError("The restart files cannot be hard linked")
+        summary = load_prev_calc_summary(".")
+        if not summary:
+            logger.info("No summary of the previous run, not restarting from its files")
+            return
+
+        incar = Incar.from_file(zpath("INCAR"))
+        structure = Poscar.from_file(zpath("POSCAR")).structure
+        kpoints = Kpoints.from_file(zpath("KPOINTS")) if os.path.exists(
+            zpath("KPOINTS")) else None
+        restart_files = get_restart_files(summary, incar, structure, kpoints,
+                                          self.get("restart_files", ["WAVECAR", "CHGCAR"]))
+        if not restart_files:
+            logger.info("The files of the previous run are not compatible with the inputs")
+            return
+
+        calc_loc = get_calc_loc(self["calc_loc"], fw_spec["calc_locs"]) if self.get(
+            "calc_loc") else {}
+        self.setup_copy(self.get("calc_dir", None), filesystem=self.get("filesystem", None),
+                        files_to_copy=restart_files, from_path_dict=calc_loc)
+        all_files = self.fileclient.listdir(self.from_dir)
+        transfers = []
+        for f in restart_files:
+            # e.g. the CHGCAR of a non self-consistent run, already copied
+            if os.path.exists(f) and os.path.getsize(f) > 0:
+                continue
+            for ext in ["", ".gz", ".GZ"]:
+                if f + ext in all_files:
+                    transfers.append((os.path.join(self.from_dir, f + ext),
+                                      os.path.join(self.to_dir, f)))
+                    break
+        transfer_stats = self.fileclient.transfer(
+            transfers, nworkers=self.get("nworkers", DEFAULT_TRANSFER_WORKERS),
+            decompress=True, link_mode=self.get("link_mode", None))
+
+        # VASP leaves an empty WAVECAR when LWAVE = False
+        copied = []
+        for f in restart_files:
+            path = os.path.join(self.to_dir, f)
+            if os.path.exists(path) and os.path.getsize(path) > 0:
+                copied.append(f)
+            elif os.path.exists(path):
+                os.remove(path)
+        if not copied:
+            return
+
+        if "WAVECAR" in copied:
+            incar["ISTART"] = 1
+            # the charge density is computed from the wavefunctions, unless it
+            # is read for a non self-consistent run
+            if incar.get("ICHARG", 0) < 10:
+                incar["ICHARG"] = 0
+        elif "CHGCAR" in copied and incar.get("ICHARG", 2) < 10:
+            incar["ICHARG"] = 1
+        incar.write_file("INCAR")
+        logger.info("Restarting from {} of {}".format(", ".join(copied), self.from_dir))
+
+        dumpfn({"files": copied, "prev_calc_dir": self.from_dir,
+                "prev_nelectronic_steps": summary.get("nelectronic_steps")},
+               RESTART_SUMMARY_FILE)
+        return FWAction(stored_data={"restart_files": copied,
+                                     "transfer_stats": transfer_stats})
+
+
+@explicit_serialize
+class CheckDuplicateCalc(FiretaskBase):
+    """
+    Check whether a successful task in the database was run with the same
+    inputs as the VASP calculation of the current directory, e.g. by another
+    workflow. Must be run just before the RunVasp* task, once the inputs are
+    written.
+
+    The fingerprint of the inputs is written in the current directory and
+    stored in the task doc by VaspToDb. If a matching task is found and its
+    directory is accessible, its VASP outputs (see
+    get_duplicate_output_files) are copied in the current directory and the
+    fingerprint file records the task, so that the RunVasp* task does not
+    run VASP. VaspToDb then parses the copied outputs as usual, with the
+    task_label and additional fields of the current Firework, and the
+    duplicated task is recorded in the "duplicate_of" key of the task doc.
+    Otherwise VASP is run as usual.
+
+    Optional params:
+        db_file (str): path to file containing the database credentials.
+            Supports env_chk. If not set, only the fingerprint is written.
+        link_mode (str): if "reflink" or "hardlink", link the files of the
+            original task instead of copying them, see CopyVaspOutputs.
+            Default: None (always copy)
+        nworkers (int): maximum number of files copied concurrently.
+            Default: 4
+    """
+
+    optional_params = ["db_file", "link_mode", "nworkers"]
+
+    def run_task(self, fw_spec):
+        fingerprint = get_input_fingerprint(".")
+        db_file = env_chk(self.get("db_file"), fw_spec)
+        if not db_file:
+            write_input_fingerprint(fingerprint)
+            return
+
+        mmdb = VaspCalcDb.from_db_file(db_file, admin=True)
+        duplicate_of = None
+        docs = mmdb.collection.find(
+            {"input_fingerprint": fingerprint, "state": "successful"},
+            {"task_id": 1, "dir_name": 1}).sort("last_updated", DESCENDING)
+        for doc in docs:
+            # the dir_name of the task doc is prefixed with the hostname
+            dir_name = doc["dir_name"].split(":", 1)[-1]
+            if os.path.isdir(dir_name):
+                duplicate_of = {"task_id": doc["task_id"], "dir_name": dir_name}
+                break
+            logger.info("Directory of duplicate task {} is not accessible: {}".format(
+                doc["task_id"], doc["dir_name"]))
+
+        if not duplicate_of:
+            write_input_fingerprint(fingerprint)
+            return
+
+        logger.info("Inputs already run by task {}, reusing the outputs of {}".format(
+            duplicate_of["task_id"], duplicate_of["dir_name"]))
+        transfers = [(os.path.join(duplicate_of["dir_name"], f), os.path.join(os.getcwd(), f))
+                     for f in get_duplicate_output_files(duplicate_of["dir_name"])]
+        transfer_stats = transfer_files(
+            transfers, nworkers=self.get("nworkers", DEFAULT_TRANSFER_WORKERS),
+            link_mode=self.get("link_mode", None))
+        write_input_fingerprint(fingerprint, duplicate_of=duplicate_of)
+        return FWAction(stored_data={"duplicate_of": duplicate_of,
+                                     "transfer_stats": transfer_stats})
 
 
 @explicit_serialize
@@ -296,7 +296,11 @@ class LobsterRunToDb(FiretaskBase):
                     fs_id = None
                     if os.path.isfile(filename):
                         fs_id = put_file_in_gridfs(
-                            filename, db, collection_name="lobster_files", compress=True
+                            filename,
+                            db,
+                            collection_name="lobster_files",
+                            compress=True,
+                            deduplicate=True,
                         )
                     elif os.path.isfile(filename + ".gz"):
                         fs_id = put_file_in_gridfs(
@@ -305,6 +309,7 @@ class LobsterRunToDb(FiretaskBase):
                             collection_name="lobster_files",
                             compress=False,
                             compression_type="zlib",
+                            deduplicate=True,
                         )
 
                     if fs_id:
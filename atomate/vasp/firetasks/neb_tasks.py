@@ -5,6 +5,7 @@ import os
 import glob
 import shutil
 
+from monty.serialization import dumpfn
 from pymatgen.core import Structure
 from pymatgen.io.vasp import Incar, Kpoints, Poscar, Potcar
 from pymatgen_diffusion.neb.io import MVLCINEBSet, get_endpoint_dist, get_endpoints_from_index
@@ -12,6 +13,7 @@ from pymatgen_diffusion.neb.io import MVLCINEBSet, get_endpoint_dist, get_endpoi
 from fireworks.core.firework import FiretaskBase, FWAction
 from fireworks.utilities.fw_utilities import explicit_serialize
 
+from atomate.utils.fileio import move_dir_contents
 from atomate.utils.utils import get_logger
 
 """
@@ -25,6 +27,8 @@ __email__ = 'hat003@eng.ucsd.edu, ihchu@eng.ucsd.edu'
 VASP_NEB_OUTPUT_FILES = {'INCAR', 'KPOINTS', 'POTCAR', 'vasprun.xml'}
 VASP_NEB_OUTPUT_SUB_FILES = {'CHG', 'CHGCAR', 'CONTCAR', 'DOSCAR', 'EIGENVAL', 'IBZKPT', 'PCDAT',
                              'POSCAR', 'PROCAR', 'OSZICAR', 'OUTCAR', 'REPORT', 'WAVECAR', 'XDATCAR'}
+# file with the relaxed images of a NEB run, written in its destination directory
+NEB_IMAGES_FILE = "neb_images.json"
 
 
 @explicit_serialize
@@ -34,6 +38,11 @@ class TransferNEBTask(FiretaskBase):
     used to determine the step of calculation and hence the final path. The corresponding structure
     will be updated in fw_spec before files transferring.
 
+    The outputs are moved, i.e. renamed when the destination is on the same filesystem. Only the
+    images of the latest NEB run are kept in fw_spec["neb"]; the images of each NEB run are written
+    to NEB_IMAGES_FILE in its destination directory, whose paths are listed in
+    fw_spec["neb_history"].
+
     Required params:
         label (str): Type of calculation outputs being transferred, choose from "parent", "ep0",
             "ep1", "neb1", "neb2" and etc..
@@ -53,7 +62,8 @@ class TransferNEBTask(FiretaskBase):
         wf_name = fw_spec["wf_name"]
         src_dir = os.path.abspath(".")
         dest_dir = os.path.join(fw_spec["_fw_env"]["run_dest_root"], wf_name, label)
-        shutil.copytree(src_dir, dest_dir)
+        if os.path.exists(dest_dir):
+            raise FileExistsError(dest_dir)
 
         # Update fw_spec based on the type of calculations.
         if "neb" in label:
@@ -67,10 +77,12 @@ class TransferNEBTask(FiretaskBase):
             images.insert(0, Structure.from_file("00/POSCAR"))
             images.append(Structure.from_file("{:02}/POSCAR".format(nimages - 1)))
             images = [s.as_dict() for s in images]
-            neb = fw_spec.get("neb")
-            neb.append(images)
-            update_spec = {"neb": neb, "_queueadapter": {"nnodes": str(len(images) - 2),
-                                                         "nodes": str(len(images) - 2)}}
+            # do not accumulate the images of all the runs in the spec
+            images_file = os.path.join(dest_dir, NEB_IMAGES_FILE)
+            neb_history = fw_spec.get("neb_history", []) + [images_file]
+            update_spec = {"neb": [images], "neb_history": neb_history,
+                           "_queueadapter": {"nnodes": str(len(images) - 2),
+                                             "nodes": str(len(images) - 2)}}
             # Use neb walltime if it is in fw_spec
             if fw_spec["neb_walltime"] is not None:
                 update_spec["_queueadapter"].update({"walltime": fw_spec.get("neb_walltime")})
@@ -108,12 +120,10 @@ class TransferNEBTask(FiretaskBase):
 
             update_spec = {"parent": s.as_dict(), "ep0": ep0.as_dict(), "ep1": ep1.as_dict()}
 
-        # Clear current directory.
-        for d in os.listdir(src_dir):
-            try:
-                os.remove(os.path.join(src_dir, d))
-            except:
-                shutil.rmtree(os.path.join(src_dir, d))
+        # Move the outputs, which clears the current directory.
+        move_dir_contents(src_dir, dest_dir)
+        if "neb" in label:
+            dumpfn(images, images_file)
 
         return FWAction(update_spec=update_spec)
 
@@ -249,7 +259,9 @@ class WriteNEBFromImages(FiretaskBase):
         user_kpoints_settings = self.get("user_kpoints_settings", {})
         neb_label = self.get("neb_label")
         assert neb_label.isdigit() and int(neb_label) >= 1
-        images = fw_spec["neb"][int(neb_label) - 1]
+        # the images of the latest NEB run (previously, the spec held the
+        # images of all the runs, the latest being the last ones as well)
+        images = fw_spec["neb"][-1]
         try:
             images = [Structure.from_dict(i) for i in images]
         except:
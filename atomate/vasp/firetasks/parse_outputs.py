@@ -1,26 +1,27 @@
 # coding: utf-8
 
 
+import copy
 import json
 import os
 import re
-from collections import defaultdict
 from datetime import datetime
 
 import numpy as np
 
-from monty.json import MontyEncoder, jsanitize
+from monty.json import jsanitize
 from pydash.objects import has, get
 
 from atomate.vasp.config import DEFUSE_UNSUCCESSFUL
-from fireworks import FiretaskBase, FWAction, explicit_serialize
-from fireworks.utilities.fw_serializers import DATETIME_HANDLER
+from fireworks import FiretaskBase, Firework, FWAction, Workflow, explicit_serialize
+from fireworks.utilities.fw_serializers import DATETIME_HANDLER, load_object
 
 from pymatgen import Structure
 from pymatgen.analysis.elasticity.elastic import ElasticTensor, ElasticTensorExpansion
 from pymatgen.analysis.elasticity.strain import Strain, Deformation
 from pymatgen.analysis.elasticity.stress import Stress
 from pymatgen.electronic_structure.boltztrap import BoltztrapAnalyzer
+from pymatgen.io.vasp import Kpoints
 from pymatgen.io.vasp.sets import get_vasprun_outcar
 from pymatgen.symmetry.analyzer import SpacegroupAnalyzer
 from pymatgen.analysis.ferroelectricity.polarization import Polarization, get_total_ionic_dipole, \
@@ -29,11 +30,16 @@ from pymatgen.analysis.magnetism import CollinearMagneticStructureAnalyzer, Orde
 from pymatgen.command_line.bader_caller import bader_analysis_from_path
 
 from atomate.common.firetasks.glue_tasks import get_calc_loc
+from atomate.utils.database import resolve_shared_object
 from atomate.utils.utils import env_chk, get_meta_from_structure
 from atomate.utils.utils import get_logger
+from atomate.vasp.analysis.phonopy import get_phonopy_displacements, \
+    get_phonopy_force_constants
+from atomate.vasp.analysis.raman import get_epsilon_derivatives
 from atomate.vasp.database import VaspCalcDb
-from atomate.vasp.drones import VaspDrone, BADER_EXE_EXISTS
-from atomate.vasp.config import STORE_VOLUMETRIC_DATA
+from atomate.vasp.drones import VaspDrone, NEBDrone, BADER_EXE_EXISTS
+from atomate.vasp.prev_calc import load_prev_calc_summary, write_prev_calc_summary
+from atomate.vasp.config import STORE_VOLUMETRIC_DATA, RECORD_PARSE_STATS
 
 __author__ = 'Anubhav Jain, Kiran Mathew, Shyam Dwaraknath'
 __email__ = 'ajain@lbl.gov, kmathew@lbl.gov, shyamd@lbl.gov'
@@ -77,12 +83,23 @@ class VaspToDb(FiretaskBase):
             The path is a full mongo-style path so subdocuments can be referneced
             using dot notation and array keys can be referenced using the index.
             E.g "calcs_reversed.0.output.outar.run_stats"
+        write_prev_calc_summary (bool): whether to write a summary of the
+            calculation in its directory, used by the Write*FromPrev tasks of
+            the following calculations instead of parsing its outputs again.
+            Default: True
+        record_parse_stats (bool): whether to record the time spent in each
+            stage of the parsing and of the insertion in the parse_stats key
+            of the task doc and in the stored_data of the Firework.
+            Default: RECORD_PARSE_STATS (True)
+        track_memory (bool): whether to also record the peak memory of each
+            stage. Slows down the parsing. Default: False
     """
     optional_params = ["calc_dir", "calc_loc", "parse_dos", "bandstructure_mode",
                        "additional_fields", "db_file", "fw_spec_field", "defuse_unsuccessful",
                        "task_fields_to_push", "parse_chgcar", "parse_aeccar",
                        "parse_potcar_file", "parse_bader",
-                       "store_volumetric_data"]
+                       "store_volumetric_data", "write_prev_calc_summary",
+                       "record_parse_stats", "track_memory"]
 
     def run_task(self, fw_spec):
         # get the directory that contains the VASP dir to parse
@@ -102,10 +119,19 @@ class VaspToDb(FiretaskBase):
                           parse_bader=self.get("parse_bader", BADER_EXE_EXISTS),
                           parse_chgcar=self.get("parse_chgcar", False),  # deprecated
                           parse_aeccar=self.get("parse_aeccar", False),  # deprecated
-                          store_volumetric_data=self.get("store_volumetric_data", STORE_VOLUMETRIC_DATA))
+                          store_volumetric_data=self.get("store_volumetric_data", STORE_VOLUMETRIC_DATA),
+                          record_parse_stats=self.get("record_parse_stats", RECORD_PARSE_STATS),
+                          track_memory=self.get("track_memory", False))
 
         # assimilate (i.e., parse)
         task_doc = drone.assimilate(calc_dir)
+        timer = drone.timer
+
+        # summarize the calculation for the child fireworks, before the
+        # insertion moves the large fields of the task doc to GridFS
+        if self.get("write_prev_calc_summary", True):
+            with timer.stage("prev_calc_summary"):
+                write_prev_calc_summary(task_doc, calc_dir)
 
         # Check for additional keys to set based on the fw_spec
         if self.get("fw_spec_field"):
@@ -125,7 +151,8 @@ class VaspToDb(FiretaskBase):
                 or bool(self.get("bandstructure_mode", False))
                 or self.get("parse_chgcar", False)  # deprecated
                 or self.get("parse_aeccar", False)  # deprecated
-                or bool(self.get("store_volumetric_data", STORE_VOLUMETRIC_DATA)))
+                or bool(self.get("store_volumetric_data", STORE_VOLUMETRIC_DATA)),
+                timer=timer)
             logger.info("Finished parsing with task_id: {}".format(t_id))
 
         defuse_children = False
@@ -160,10 +187,65 @@ class VaspToDb(FiretaskBase):
                                    "in the spec and path is a full mongo-style path to a "
                                    "field in the task document".format(type(task_fields_to_push)))
 
-        return FWAction(stored_data={"task_id": task_doc.get("task_id", None)},
+        stored_data = {"task_id": task_doc.get("task_id", None)}
+        if timer.enabled:
+            stored_data["parse_stats"] = timer.stats
+        return FWAction(stored_data=stored_data,
                         defuse_children=defuse_children, update_spec=update_spec)
 
 
+@explicit_serialize
+class NEBToDb(FiretaskBase):
+    """
+    Enter a NEB calculation into the database, with the energy profile and
+    barriers of the band and a summary of each image. The images are parsed
+    concurrently by the NEBDrone, and their parsed OUTCARs are stored in
+    GridFS. Uses current directory unless you specify calc_dir.
+
+    Optional params:
+        calc_dir (str): path to the NEB directory, with the images in the
+            00, 01, ... subdirectories. Default: use current working directory.
+        endpoint_dirs ([str]): paths to the relaxations of the two endpoints,
+            used for the endpoint energies when the 00 and NN directories have
+            no OUTCAR. Default: the "ep0" and "ep1" directories of the NEB
+            workflow (in run_dest_root/wf_name, see TransferNEBTask), if they
+            exist.
+        additional_fields (dict): dict of additional fields to add
+        db_file (str): path to file containing the database credentials.
+            Supports env_chk. Default: write data to JSON file.
+        nworkers (int): number of processes parsing the images. Default: the
+            number of CPUs.
+    """
+    optional_params = ["calc_dir", "endpoint_dirs", "additional_fields", "db_file",
+                       "nworkers"]
+
+    def run_task(self, fw_spec):
+        calc_dir = self.get("calc_dir", os.getcwd())
+        logger.info("PARSING NEB DIRECTORY: {}".format(calc_dir))
+
+        drone = NEBDrone(additional_fields=self.get("additional_fields"),
+                         nworkers=self.get("nworkers"))
+        endpoint_dirs = self.get("endpoint_dirs")
+        run_dest_root = fw_spec.get("_fw_env", {}).get("run_dest_root")
+        if not endpoint_dirs and run_dest_root and "wf_name" in fw_spec:
+            endpoint_dirs = [os.path.join(run_dest_root, fw_spec["wf_name"], label)
+                             for label in ["ep0", "ep1"]]
+            if not all(os.path.isdir(d) for d in endpoint_dirs):
+                endpoint_dirs = None
+        task_doc = drone.assimilate(calc_dir, endpoint_dirs=endpoint_dirs)
+
+        db_file = env_chk(self.get("db_file"), fw_spec)
+        if not db_file:
+            with open("task.json", "w") as f:
+                f.write(json.dumps(task_doc, default=DATETIME_HANDLER))
+        else:
+            mmdb = VaspCalcDb.from_db_file(db_file, admin=True)
+            t_id = mmdb.insert_task(task_doc, use_gridfs=True)
+            logger.info("Finished parsing with task_id: {}".format(t_id))
+
+        return FWAction(stored_data={"task_id": task_doc.get("task_id", None)})
+
+
 @explicit_serialize
 class JsonToDb(FiretaskBase):
     """
@@ -234,21 +316,28 @@ class BoltztrapToDb(FiretaskBase):
         bandstructure_dir = os.getcwd()
         d["bandstructure_dir"] = bandstructure_dir
 
-        # add the structure
-        v, o = get_vasprun_outcar(bandstructure_dir, parse_eigen=False, parse_dos=False)
-        structure = v.final_structure
+        # add the structure and the spacegroup, from the summary of the band
+        # structure run written by VaspToDb if possible
+        summary = load_prev_calc_summary(bandstructure_dir) or {}
+        if summary:
+            structure = Structure.from_dict(summary["structure"])
+        else:
+            v, o = get_vasprun_outcar(bandstructure_dir, parse_eigen=False, parse_dos=False)
+            structure = v.final_structure
         d["structure"] = structure.as_dict()
         d["formula_pretty"] = structure.composition.reduced_formula
         d.update(get_meta_from_structure(structure))
 
-        # add the spacegroup
-        sg = SpacegroupAnalyzer(Structure.from_dict(d["structure"]), 0.1)
-        d["spacegroup"] = {"symbol": sg.get_space_group_symbol(),
-                           "number": sg.get_space_group_number(),
-                           "point_group": sg.get_point_group_symbol(),
-                           "source": "spglib",
-                           "crystal_system": sg.get_crystal_system(),
-                           "hall": sg.get_hall()}
+        if summary.get("spacegroup"):
+            d["spacegroup"] = summary["spacegroup"]
+        else:
+            sg = SpacegroupAnalyzer(structure, 0.1)
+            d["spacegroup"] = {"symbol": sg.get_space_group_symbol(),
+                               "number": sg.get_space_group_number(),
+                               "point_group": sg.get_point_group_symbol(),
+                               "source": "spglib",
+                               "crystal_system": sg.get_crystal_system(),
+                               "hall": sg.get_hall()}
 
         d["created_at"] = datetime.utcnow()
 
@@ -261,9 +350,8 @@ class BoltztrapToDb(FiretaskBase):
         else:
             mmdb = VaspCalcDb.from_db_file(db_file, admin=True)
 
-            # dos gets inserted into GridFS
-            dos = json.dumps(d["dos"], cls=MontyEncoder)
-            fsid, compression = mmdb.insert_gridfs(dos, collection="dos_boltztrap_fs",
+            # dos gets inserted into GridFS, which encodes it
+            fsid, compression = mmdb.insert_gridfs(d["dos"], collection="dos_boltztrap_fs",
                                                    compress=True)
             d["dos_boltztrap_fs_id"] = fsid
             del d["dos"]
@@ -437,25 +525,22 @@ class RamanTensorToDb(FiretaskBase):
                              },
              "frequencies": nm_frequencies.tolist()}
 
-        # store the displacement & epsilon for each mode in a dictionary
-        mode_disps = fw_spec["raman_epsilon"].keys()
-        modes_eps_dict = defaultdict(list)
-        for md in mode_disps:
-            modes_eps_dict[fw_spec["raman_epsilon"][md]["mode"]].append(
-                [fw_spec["raman_epsilon"][md]["displacement"],
-                 fw_spec["raman_epsilon"][md]["epsilon"]])
-
-        # raman tensor = finite difference derivative of epsilon wrt displacement.
-        raman_tensor_dict = {}
+        # raman tensor = finite difference derivative of epsilon wrt displacement, computed
+        # for all the modes at once (least-squares fit for more than 2 displacements per mode)
+        raman_epsilon = list(fw_spec["raman_epsilon"].values())
+        modes, eps_derivatives = get_epsilon_derivatives(
+            [v["mode"] for v in raman_epsilon],
+            [v["displacement"] for v in raman_epsilon],
+            [v["epsilon"] for v in raman_epsilon])
+
+        # frequency in cm^-1
+        omegas = nm_frequencies[modes]
+        for k in modes[nm_eigenvals[modes] > 0]:
+            logger.warning("Mode: {} is UNSTABLE. Freq(cm^-1) = {}".format(k, -nm_frequencies[k]))
         scale = np.sqrt(structure.volume/2.0) / 4.0 / np.pi
-        for k, v in modes_eps_dict.items():
-            raman_tensor = (np.array(v[0][1]) - np.array(v[1][1])) / (v[0][0] - v[1][0])
-            # frequency in cm^-1
-            omega = nm_frequencies[k]
-            if nm_eigenvals[k] > 0:
-                logger.warning("Mode: {} is UNSTABLE. Freq(cm^-1) = {}".format(k, -omega))
-            raman_tensor = scale * raman_tensor * np.sum(nm_norms[k]) / np.sqrt(omega)
-            raman_tensor_dict[str(k)] = raman_tensor.tolist()
+        raman_tensors = scale * eps_derivatives * (np.sum(nm_norms[modes], axis=1) /
+                                                   np.sqrt(omegas))[:, None, None]
+        raman_tensor_dict = {str(k): t.tolist() for k, t in zip(modes, raman_tensors)}
 
         d["raman_tensor"] = raman_tensor_dict
         d["state"] = "successful"
@@ -477,6 +562,58 @@ class RamanTensorToDb(FiretaskBase):
 # method? -computron
 # TODO: @computron: even if you use the db-centric method, embed information in tags rather than
 # task_label? This workflow likely requires review with its authors. -computron
+def get_finite_displacement_data(mmdb, task_label_prefix, supercell_matrix, query=None):
+    """
+    Get the energies, volumes and force constants of the deformations of a quasi-harmonic
+    workflow with finite displacement calculations, i. e. tasks labelled
+    "<task_label_prefix> deformation <n>" and "<task_label_prefix> displacement <n> <k>".
+
+    Args:
+        mmdb (VaspCalcDb): database of the tasks
+        task_label_prefix (str): prefix of the task labels, e. g. "<tag> gibbs"
+        supercell_matrix (3x3 array-like): supercell of the displacement calculations
+        query (dict): additional query on the tasks
+
+    Returns:
+        (list, list, list): energies, volumes and force constants of the supercells (with the
+            sign convention of the DFPT force constants of vasprun.xml) sorted by deformation
+    """
+    query = query or {}
+    energies, volumes = {}, {}
+    prefix = "^{} deformation ".format(re.escape(task_label_prefix))
+    for d in mmdb.collection.find(dict(query, task_label={"$regex": prefix}),
+                                  {"task_label": 1, "calcs_reversed": 1}):
+        n = int(d["task_label"].split()[-1])
+        energies[n] = d["calcs_reversed"][-1]["output"]["energy"]
+        volumes[n] = Structure.from_dict(d["calcs_reversed"][-1]["output"]["structure"]).volume
+
+    displaced_structures, forces, unit_cells = {}, {}, {}
+    prefix = "^{} displacement ".format(re.escape(task_label_prefix))
+    for d in mmdb.collection.find(dict(query, task_label={"$regex": prefix}),
+                                  {"task_label": 1, "input.structure": 1, "output.forces": 1,
+                                   "transformations": 1}):
+        n = int(d["task_label"].split()[-2])
+        # the input structure of the supercell transformation is the deformed unit cell
+        unit_cells[n] = Structure.from_dict(d["transformations"]["history"][1]["input_structure"])
+        displaced_structures.setdefault(n, []).append(Structure.from_dict(d["input"]["structure"]))
+        forces.setdefault(n, []).append(d["output"]["forces"])
+
+    # skip the deformations with failed displacement calculations. The number of
+    # displacements depends on the symmetry of each deformed cell
+    deformation_indices = sorted(
+        n for n in energies if n in unit_cells and len(forces[n]) == len(
+            get_phonopy_displacements(unit_cells[n], supercell_matrix)))
+    if len(deformation_indices) < len(energies):
+        logger.warning("Skipping {} deformations with missing displacement calculations".format(
+            len(energies) - len(deformation_indices)))
+    force_constants = [
+        (-get_phonopy_force_constants(unit_cells[n], supercell_matrix,
+                                      displaced_structures[n], forces[n])).tolist()
+        for n in deformation_indices]
+    return ([energies[n] for n in deformation_indices],
+            [volumes[n] for n in deformation_indices], force_constants)
+
+
 @explicit_serialize
 class GibbsAnalysisToDb(FiretaskBase):
     """
@@ -507,12 +644,16 @@ class GibbsAnalysisToDb(FiretaskBase):
             Gibbs energy from the Debye model. Defaults to False.
         pressure (float): in GPa, optional.
         metadata (dict): meta data
+        supercell_matrix (3x3 array-like): if set, the force constants are computed from the
+            finite displacement calculations of the supercells (see get_wf_finite_displacements)
+            instead of DFPT.
 
     """
 
     required_params = ["tag", "db_file"]
     optional_params = ["qha_type", "t_min", "t_step", "t_max", "mesh", "eos",
-                       "pressure", "poisson", "anharmonic_contribution", "metadata"]
+                       "pressure", "poisson", "anharmonic_contribution", "metadata",
+                       "supercell_matrix"]
 
     def run_task(self, fw_spec):
 
@@ -528,6 +669,7 @@ class GibbsAnalysisToDb(FiretaskBase):
         pressure = self.get("pressure", 0.0)
         poisson = self.get("poisson", 0.25)
         anharmonic_contribution = self.get("anharmonic_contribution", False)
+        supercell_matrix = self.get("supercell_matrix")
         gibbs_dict["metadata"] = self.get("metadata", {})
 
         db_file = env_chk(self.get("db_file"), fw_spec)
@@ -540,18 +682,23 @@ class GibbsAnalysisToDb(FiretaskBase):
         gibbs_dict["formula_pretty"] = structure.composition.reduced_formula
 
         # get the data(energy, volume, force constant) from the deformation runs
-        docs = mmdb.collection.find({"task_label": {"$regex": "{} gibbs*".format(tag)},
-                                     "formula_pretty": structure.composition.reduced_formula},
-                                    {"calcs_reversed": 1})
-        energies = []
-        volumes = []
-        force_constants = []
-        for d in docs:
-            s = Structure.from_dict(d["calcs_reversed"][-1]["output"]['structure'])
-            energies.append(d["calcs_reversed"][-1]["output"]['energy'])
-            if qha_type not in ["debye_model"]:
-                force_constants.append(d["calcs_reversed"][-1]["output"]['force_constants'])
-            volumes.append(s.volume)
+        if supercell_matrix is not None and qha_type not in ["debye_model"]:
+            energies, volumes, force_constants = get_finite_displacement_data(
+                mmdb, "{} gibbs".format(tag), supercell_matrix,
+                {"formula_pretty": structure.composition.reduced_formula})
+        else:
+            docs = mmdb.collection.find({"task_label": {"$regex": "{} gibbs*".format(tag)},
+                                         "formula_pretty": structure.composition.reduced_formula},
+                                        {"calcs_reversed": 1})
+            energies = []
+            volumes = []
+            force_constants = []
+            for d in docs:
+                s = Structure.from_dict(d["calcs_reversed"][-1]["output"]['structure'])
+                energies.append(d["calcs_reversed"][-1]["output"]['energy'])
+                if qha_type not in ["debye_model"]:
+                    force_constants.append(d["calcs_reversed"][-1]["output"]['force_constants'])
+                volumes.append(s.volume)
         gibbs_dict["energies"] = energies
         gibbs_dict["volumes"] = volumes
         if qha_type not in ["debye_model"]:
@@ -576,7 +723,8 @@ class GibbsAnalysisToDb(FiretaskBase):
                 from atomate.vasp.analysis.phonopy import get_phonopy_gibbs
 
                 G, T = get_phonopy_gibbs(energies, volumes, force_constants, structure, t_min,
-                                         t_step, t_max, mesh, eos, pressure)
+                                         t_step, t_max, mesh, eos, pressure,
+                                         supercell_matrix=supercell_matrix)
                 gibbs_dict["gibbs_free_energy"] = G
                 gibbs_dict["temperatures"] = T
                 gibbs_dict["success"] = True
@@ -700,6 +848,142 @@ class FitEOSToDb(FiretaskBase):
         logger.info("Bulk modulus calculation complete.")
 
 
+@explicit_serialize
+class CheckKpointsConvergence(FiretaskBase):
+    """
+    Used in the k-point convergence workflow. Compares the energy per atom and
+    the stress of the current calculation with those of the calculation at
+    the previous k-point density. If the changes are within the tolerances,
+    or if no higher density is left, the converged density is inserted in the
+    "kpoints_convergence" collection. Otherwise a copy of the current Firework
+    is added to the workflow at the next density that gives a denser k-point
+    grid. It's unlikely you will want to call this directly.
+
+    Required parameters:
+        tag (str): unique tag of the task labels of the calculations, which
+            are "<tag> kpoints convergence <reciprocal_density>"
+        db_file (str): path to the db file
+        reciprocal_density (int): k-point density of the current calculation
+        reciprocal_densities ([int]): increasing k-point densities to try
+
+    Optional parameters:
+        energy_tol (float): tolerance on the change of the energy per atom,
+            in eV/atom. Default: 1e-3
+        stress_tol (float): tolerance on the change of the components of the
+            stress, in kB. Default: 1.0
+    """
+
+    required_params = ["tag", "db_file", "reciprocal_density", "reciprocal_densities"]
+    optional_params = ["energy_tol", "stress_tol"]
+
+    # keys of the spec set by FireWorks at runtime, which are not copied to
+    # the Firework of the next density
+    runtime_spec_keys = ["_tasks", "_fw_env", "_job_info", "_files_prev"]
+
+    def run_task(self, fw_spec):
+        db_file = env_chk(self.get("db_file"), fw_spec)
+        mmdb = VaspCalcDb.from_db_file(db_file, admin=True)
+        tag = self["tag"]
+        density = self["reciprocal_density"]
+        energy_tol = self.get("energy_tol", 1e-3)
+        stress_tol = self.get("stress_tol", 1.0)
+
+        docs = mmdb.collection.find(
+            {"task_label": {"$regex": "^{} kpoints convergence".format(re.escape(tag))},
+             "state": "successful"},
+            ["task_id", "task_label", "formula_pretty", "output.energy_per_atom",
+             "output.stress", "output.structure", "calcs_reversed.input.kpoints"])
+        results = {}
+        for d in docs:
+            results[int(d["task_label"].split()[-1])] = {
+                "task_id": d["task_id"],
+                "formula_pretty": d["formula_pretty"],
+                "structure": d["output"]["structure"],
+                "kpts": d["calcs_reversed"][0]["input"]["kpoints"]["kpoints"],
+                "energy_per_atom": d["output"]["energy_per_atom"],
+                "stress": d["output"].get("stress"),
+            }
+        if density not in results:
+            raise RuntimeError("No successful calculation at the k-point density {}".format(
+                density))
+        current = results[density]
+
+        # compare with the previous density
+        previous_densities = sorted(k for k in results if k < density)
+        converged = False
+        if previous_densities:
+            previous = results[previous_densities[-1]]
+            energy_change = abs(current["energy_per_atom"] - previous["energy_per_atom"])
+            stress_change = 0.0
+            if current["stress"] and previous["stress"]:
+                stress_change = float(np.max(np.abs(
+                    np.array(current["stress"]) - np.array(previous["stress"]))))
+            logger.info("k-point density {}: energy change {} eV/atom, stress change {} "
+                        "kB".format(density, energy_change, stress_change))
+            converged = energy_change <= energy_tol and stress_change <= stress_tol
+
+        if not converged:
+            # densities that give the same grid as the current one are skipped
+            structure = Structure.from_dict(current["structure"])
+            for next_density in sorted(self["reciprocal_densities"]):
+                if next_density <= density:
+                    continue
+                kpts = Kpoints.automatic_density_by_vol(structure, next_density).kpts
+                if [list(k) for k in kpts] != [list(k) for k in current["kpts"]]:
+                    next_fw = self._get_next_fw(fw_spec, next_density,
+                                                current["formula_pretty"])
+                    return FWAction(stored_data={"converged": False},
+                                    additions=Workflow.from_Firework(next_fw))
+            logger.warning("The k-points are not converged at the highest density {}".format(
+                density))
+
+        # the converged density is the lowest one whose results are within the
+        # tolerances of those at the next density
+        summary = {
+            "formula_pretty": current["formula_pretty"],
+            "structure": current["structure"],
+            "tag": tag,
+            "converged": converged,
+            "reciprocal_density": previous_densities[-1] if converged else density,
+            "energy_tol": energy_tol,
+            "stress_tol": stress_tol,
+            "results": [dict(reciprocal_density=k, **{key: v for key, v in results[k].items()
+                                                       if key != "structure"})
+                        for k in sorted(results)],
+            "created_at": datetime.utcnow(),
+        }
+        if fw_spec.get("tags", None):
+            summary["tags"] = fw_spec["tags"]
+        mmdb.db["kpoints_convergence"].insert_one(summary)
+        logger.info("k-point convergence complete: reciprocal density {}".format(
+            summary["reciprocal_density"]))
+        return FWAction(stored_data={"converged": converged,
+                                     "reciprocal_density": summary["reciprocal_density"]})
+
+    def _get_next_fw(self, fw_spec, reciprocal_density, formula):
+        # copy of the tasks of the current Firework, with the powerups applied
+        # to the workflow
+        name = "{} kpoints convergence {}".format(self["tag"], reciprocal_density)
+        tasks = []
+        for t in copy.deepcopy(fw_spec["_tasks"]):
+            fw_name = t["_fw_name"]
+            if "WriteVaspFromIOSet" in fw_name:
+                # the input set may be a reference, see use_shared_objects
+                vis = resolve_shared_object(t["vasp_input_set"], VaspCalcDb, fw_spec)
+                vis = vis.as_dict() if hasattr(vis, "as_dict") else vis
+                vis["reciprocal_density"] = reciprocal_density
+                t["vasp_input_set"] = vis
+            elif "PassCalcLocs" in fw_name:
+                t["name"] = name
+            elif "VaspToDb" in fw_name:
+                t["additional_fields"]["task_label"] = name
+            elif "CheckKpointsConvergence" in fw_name:
+                t["reciprocal_density"] = reciprocal_density
+            tasks.append(load_object(t))
+        spec = {k: v for k, v in fw_spec.items() if k not in self.runtime_spec_keys}
+        return Firework(tasks, spec=spec, name="{}-{}".format(formula, name))
+
+
 # TODO: @computron: review method of data passing with the workflow authors. -computron
 # TODO: insert to db. -matk
 @explicit_serialize
@@ -720,10 +1004,13 @@ class ThermalExpansionCoeffToDb(FiretaskBase):
         eos (str): equation of state used for fitting the energies and the volumes.
             options supported by phonopy: "vinet" (default), "murnaghan", "birch_murnaghan".
         pressure (float): in GPa, optional.
+        supercell_matrix (3x3 array-like): if set, the force constants are computed from the
+            finite displacement calculations of the supercells (see get_wf_finite_displacements)
+            instead of DFPT.
     """
 
     required_params = ["tag", "db_file"]
-    optional_params = ["t_min", "t_step", "t_max", "mesh", "eos", "pressure"]
+    optional_params = ["t_min", "t_step", "t_max", "mesh", "eos", "pressure", "supercell_matrix"]
 
     def run_task(self, fw_spec):
 
@@ -737,6 +1024,7 @@ class ThermalExpansionCoeffToDb(FiretaskBase):
         mesh = self.get("mesh", [20, 20, 20])
         eos = self.get("eos", "vinet")
         pressure = self.get("pressure", 0.0)
+        supercell_matrix = self.get("supercell_matrix")
         summary_dict = {}
 
         mmdb = VaspCalcDb.from_db_file(db_file, admin=True)
@@ -750,20 +1038,25 @@ class ThermalExpansionCoeffToDb(FiretaskBase):
         summary_dict["formula_pretty"] = structure.composition.reduced_formula
 
         # get the data(energy, volume, force constant) from the deformation runs
-        energies = []
-        volumes = []
-        force_constants = []
-        for d in docs:
-            s = Structure.from_dict(d["calcs_reversed"][-1]["output"]['structure'])
-            energies.append(d["calcs_reversed"][-1]["output"]['energy'])
-            volumes.append(s.volume)
-            force_constants.append(d["calcs_reversed"][-1]["output"]['force_constants'])
+        if supercell_matrix is not None:
+            energies, volumes, force_constants = get_finite_displacement_data(
+                mmdb, "{} thermal_expansion".format(tag), supercell_matrix)
+        else:
+            energies = []
+            volumes = []
+            force_constants = []
+            for d in docs:
+                s = Structure.from_dict(d["calcs_reversed"][-1]["output"]['structure'])
+                energies.append(d["calcs_reversed"][-1]["output"]['energy'])
+                volumes.append(s.volume)
+                force_constants.append(d["calcs_reversed"][-1]["output"]['force_constants'])
         summary_dict["energies"] = energies
         summary_dict["volumes"] = volumes
         summary_dict["force_constants"] = force_constants
 
         alpha, T = get_phonopy_thermal_expansion(energies, volumes, force_constants, structure,
-                                                 t_min, t_step, t_max, mesh, eos, pressure)
+                                                 t_min, t_step, t_max, mesh, eos, pressure,
+                                                 supercell_matrix=supercell_matrix)
 
         summary_dict["alpha"] = alpha
         summary_dict["T"] = T
@@ -864,8 +1157,8 @@ class MagneticOrderingsToDb(FiretaskBase):
                 original_task = d
                 energy_diff_relax_static = None
 
-            input_structure = Structure.from_dict(optimize_task['input']['structure'])
-            input_magmoms = optimize_task['input']['incar']['MAGMOM']
+            input_structure = Structure.from_dict(original_task['input']['structure'])
+            input_magmoms = original_task['input']['incar']['MAGMOM']
             input_structure.add_site_property('magmom', input_magmoms)
 
             final_structure = Structure.from_dict(d["output"]["structure"])
@@ -976,6 +1269,62 @@ class MagneticOrderingsToDb(FiretaskBase):
         logger.info("Magnetic orderings calculation complete.")
 
 
+@explicit_serialize
+class MagneticOrderingsScreening(FiretaskBase):
+    """
+    Used in the adaptive mode of the magnetic orderings workflow. Compares
+    the energies of the cheap screening calculations of the orderings and
+    only adds the full calculations of the orderings within an energy
+    window of the lowest energy, as detours before the analysis. It's
+    unlikely you will want to call this directly.
+
+    Required parameters:
+        db_file (str): path to the db file that holds your tasks
+            collection
+        wf_uuid (str): auto-generated from get_wf_magnetic_orderings,
+            used to make it easier to retrieve task docs
+        energy_window (float): energy window above the lowest screening
+            energy, in eV/atom
+        ordering_wfs (list): serialized Workflows (as dicts) of the full
+            calculations, indexed by ordering
+
+    Optional parameters:
+        max_orderings (int): maximum number of orderings to calculate
+            fully, the lowest in energy are kept
+    """
+
+    required_params = ["db_file", "wf_uuid", "energy_window", "ordering_wfs"]
+    optional_params = ["max_orderings"]
+
+    def run_task(self, fw_spec):
+        db_file = env_chk(self.get("db_file"), fw_spec)
+        mmdb = VaspCalcDb.from_db_file(db_file, admin=True)
+
+        docs = mmdb.collection.find({"wf_meta.wf_uuid": self["wf_uuid"],
+                                     "task_label": {"$regex": "screening"}},
+                                    ["task_label", "output.energy_per_atom"])
+        energies = {}
+        for d in docs:
+            task_label = d["task_label"].split(' ')
+            ordering_index = int(task_label[task_label.index('ordering') + 1])
+            energies[ordering_index] = d["output"]["energy_per_atom"]
+        if not energies:
+            raise RuntimeError("No screening calculation of the magnetic "
+                               "orderings was successful.")
+
+        ground_state_energy = min(energies.values())
+        selected = sorted((e, idx) for idx, e in energies.items()
+                          if e - ground_state_energy <= self["energy_window"])
+        selected = sorted(idx for e, idx in selected[:self.get("max_orderings")])
+        logger.info("Calculating {} of {} magnetic orderings: {}".format(
+            len(selected), len(self["ordering_wfs"]), selected))
+
+        detours = [Workflow.from_dict(self["ordering_wfs"][idx]) for idx in selected]
+        stored_data = {"screening_energies": {str(idx): e for idx, e in energies.items()},
+                       "selected_orderings": selected}
+        return FWAction(stored_data=stored_data, detours=detours)
+
+
 @explicit_serialize
 class MagneticDeformationToDb(FiretaskBase):
     """
@@ -1072,11 +1421,25 @@ class MagneticDeformationToDb(FiretaskBase):
 class PolarizationToDb(FiretaskBase):
     """
     Recovers the same branch polarization and spontaneous polarization
-    for a ferroelectric workflow.
+    for a ferroelectric workflow. Only the fields of the polarization tasks
+    used in the analysis are queried, so the "outcars" stored with the
+    results only contain the "p_elec" and "zval_dict" of the OUTCARs; the
+    full OUTCARs are found through the stored "task_ids".
     """
 
     optional_params = ["db_file"]
 
+    # fields of the polarization task docs used in the analysis
+    projection = [
+        "task_id",
+        "task_label",
+        "calcs_reversed.input.structure",
+        "calcs_reversed.output.energy",
+        "calcs_reversed.output.energy_per_atom",
+        "calcs_reversed.output.outcar.p_elec",
+        "calcs_reversed.output.outcar.zval_dict",
+    ]
+
     def run_task(self, fw_spec):
 
         wfid = list(filter(lambda x: 'wfid' in x, fw_spec['tags'])).pop()
@@ -1084,9 +1447,13 @@ class PolarizationToDb(FiretaskBase):
         vaspdb = VaspCalcDb.from_db_file(db_file, admin=True)
 
         # ferroelectric workflow groups calculations by generated wfid tag
-        polarization_tasks = vaspdb.collection.find({"tags": wfid, "task_label": {"$regex": ".*polarization"}})
+        # (indexed), the task_label is only matched within the workflow
+        polarization_tasks = vaspdb.collection.find(
+            {"tags": wfid, "task_label": {"$regex": "polarization"}},
+            self.projection)
 
         tasks = []
+        task_ids = []
         outcars = []
         structure_dicts = []
         sort_weight = []
@@ -1099,6 +1466,7 @@ class PolarizationToDb(FiretaskBase):
             energies_per_atom.append(p['calcs_reversed'][0]['output']['energy_per_atom'])
             energies.append(p['calcs_reversed'][0]['output']['energy'])
             tasks.append(p['task_label'])
+            task_ids.append(p['task_id'])
             outcars.append(p['calcs_reversed'][0]['output']['outcar'])
             structure_dicts.append(p['calcs_reversed'][0]['input']['structure'])
             zval_dicts.append(p['calcs_reversed'][0]['output']['outcar']['zval_dict'])
@@ -1124,11 +1492,11 @@ class PolarizationToDb(FiretaskBase):
 
         # Sort polarization tasks
         # nonpolar -> interpolation_n -> interpolation_n-1 -> ...  -> interpolation_1 -> polar
-        data = zip(tasks, structure_dicts, outcars, energies_per_atom, energies, sort_weight)
+        data = zip(tasks, task_ids, structure_dicts, outcars, energies_per_atom, energies, sort_weight)
         data = sorted(data,key=lambda x: x[-1])
 
         # Get the tasks, structures, etc in sorted order from the zipped data.
-        tasks, structure_dicts, outcars, energies_per_atom, energies, sort_weight = zip(*data)
+        tasks, task_ids, structure_dicts, outcars, energies_per_atom, energies, sort_weight = zip(*data)
 
         structures = [Structure.from_dict(structure) for structure in structure_dicts]
 
@@ -1168,6 +1536,9 @@ class PolarizationToDb(FiretaskBase):
         polarization_dict.update({'pretty_formula': structures[0].composition.reduced_formula})
         polarization_dict.update({'wfid': wfid})
         polarization_dict.update({'task_label_order': tasks})
+        polarization_dict.update({'task_ids': task_ids})
+        # flags that the stored "outcars" only hold p_elec and zval_dict
+        polarization_dict.update({'schema': {"code": "atomate", "version": VaspDrone.__version__}})
 
         # Polarization information
         polarization_dict.update({'polarization_change': p_change})
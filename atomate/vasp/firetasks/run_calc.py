@@ -13,6 +13,7 @@ This module defines tasks that support running vasp in various ways.
 import shutil
 import shlex
 import os
+import re
 import subprocess
 
 from pymatgen.io.vasp import Incar, Kpoints, Poscar, Potcar
@@ -29,8 +30,10 @@ from custodian.vasp.validators import VasprunXMLValidator, VaspFilesValidator
 
 from fireworks import explicit_serialize, FiretaskBase, FWAction
 
+from atomate.utils.bundle import get_sub_job
 from atomate.utils.utils import env_chk, get_logger
 from atomate.vasp.config import CUSTODIAN_MAX_ERRORS
+from atomate.vasp.duplicates import get_duplicate_calc
 
 __author__ = 'Anubhav Jain <ajain@lbl.gov>'
 __credits__ = 'Shyue Ping Ong <ong.sp>'
@@ -38,6 +41,47 @@ __credits__ = 'Shyue Ping Ong <ong.sp>'
 logger = get_logger(__name__)
 
 
+def get_vasp_cmd_nprocs(vasp_cmd, nprocs=None, placement=None):
+    """
+    Set the number of MPI ranks of a VASP command, given by the -n, -np or
+    --ntasks option of the MPI launcher (e.g. mpirun or srun), and add the
+    options placing the ranks on their cores after it.
+
+    Args:
+        vasp_cmd (str): VASP command
+        nprocs (int): number of ranks. Default: that of the sub job when the
+            Firework is run by atomate.utils.bundle.launch_bundle with the
+            cores of the allocation. The command is not modified otherwise,
+            e.g. by "rlaunch multi".
+        placement (str): launcher options, e.g. "--cpu-set 0-7 --bind-to
+            core". Default: that of the sub job of the bundle, if any.
+
+    Returns:
+        str: VASP command
+    """
+    if not nprocs:
+        sub_job = get_sub_job()
+        if not sub_job:
+            return vasp_cmd
+        nprocs, placement = sub_job["nprocs"], placement or sub_job["placement"]
+    new_cmd, nsub = re.subn(r"((?:^|\s)(?:-n|-np|--np|--ntasks)(?:\s+|=))\d+",
+                            lambda m: m.group(1) + str(nprocs) +
+                            (" " + placement if placement else ""),
+                            vasp_cmd, count=1)
+    if not nsub:
+        logger.warning("Cannot set the number of ranks of {} to {}".format(vasp_cmd, nprocs))
+    return new_cmd
+
+
+def _is_duplicate_calc():
+    # the outputs were copied from a previous task by CheckDuplicateCalc
+    duplicate_of = get_duplicate_calc(".")
+    if duplicate_of:
+        logger.info("Not running VASP, outputs copied from task {}".format(
+            duplicate_of["task_id"]))
+    return bool(duplicate_of)
+
+
 @explicit_serialize
 class RunVaspDirect(FiretaskBase):
     """
@@ -53,7 +97,9 @@ class RunVaspDirect(FiretaskBase):
     optional_params = ["expand_vars"]
 
     def run_task(self, fw_spec):
-        cmd = env_chk(self["vasp_cmd"], fw_spec)
+        if _is_duplicate_calc():
+            return
+        cmd = get_vasp_cmd_nprocs(env_chk(self["vasp_cmd"], fw_spec))
         if self.get("expand_vars", False):
             cmd = os.path.expandvars(cmd)
 
@@ -96,6 +142,8 @@ class RunVaspCustodian(FiretaskBase):
                        "wall_time","half_kpts_first_relax"]
 
     def run_task(self, fw_spec):
+        if _is_duplicate_calc():
+            return
 
         handler_groups = {
             "default": [VaspErrorHandler(), MeshSymmetryErrorHandler(), UnconvergedErrorHandler(),
@@ -112,7 +160,7 @@ class RunVaspCustodian(FiretaskBase):
         vasp_cmd = env_chk(self["vasp_cmd"], fw_spec)
 
         if isinstance(vasp_cmd, str):
-            vasp_cmd = os.path.expandvars(vasp_cmd)
+            vasp_cmd = get_vasp_cmd_nprocs(os.path.expandvars(vasp_cmd))
             vasp_cmd = shlex.split(vasp_cmd)
 
         # initialize variables
@@ -123,7 +171,7 @@ class RunVaspCustodian(FiretaskBase):
         auto_npar = env_chk(self.get("auto_npar"), fw_spec, strict=False, default=False)
         gamma_vasp_cmd = env_chk(self.get("gamma_vasp_cmd"), fw_spec, strict=False, default=None)
         if gamma_vasp_cmd:
-            gamma_vasp_cmd = shlex.split(gamma_vasp_cmd)
+            gamma_vasp_cmd = shlex.split(get_vasp_cmd_nprocs(gamma_vasp_cmd))
 
         # construct jobs
         if job_type == "normal":
@@ -273,6 +321,8 @@ class RunVaspFake(FiretaskBase):
     optional_params = ["params_to_check", "check_incar", "check_kpoints", "check_poscar", "check_potcar", "clear_inputs"]
 
     def run_task(self, fw_spec):
+        if _is_duplicate_calc():
+            return
         self._verify_inputs()
         if self.get("clear_inputs", True):
             self._clear_inputs()
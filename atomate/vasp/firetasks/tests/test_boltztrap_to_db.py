@@ -0,0 +1,68 @@
+# coding: utf-8
+
+import json
+import os
+import shutil
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from pymatgen.electronic_structure.core import Spin
+from pymatgen.electronic_structure.dos import Dos
+
+from atomate.utils.testing import AtomateTest, DB_DIR
+from atomate.vasp.database import VaspCalcDb
+from atomate.vasp.firetasks.parse_outputs import BoltztrapToDb
+
+module_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)))
+ref_dir = os.path.join(module_dir, "..", "..", "test_files")
+db_file = os.path.join(DB_DIR, "db.json")
+
+
+class TestBoltztrapToDb(AtomateTest):
+
+    def setUp(self):
+        super(TestBoltztrapToDb, self).setUp()
+        # the band structure run, with an empty BoltzTraP run whose analysis is
+        # mocked since the repo has no BoltzTraP outputs
+        outputs_dir = os.path.join(ref_dir, "Si_structure_optimization", "outputs")
+        for f in ["vasprun.xml.gz", "OUTCAR.gz"]:
+            shutil.copy(os.path.join(outputs_dir, f), self.scratch_dir)
+        os.makedirs("boltztrap")
+
+        energies = np.linspace(-5, 5, 101)
+        self.dos = Dos(0.5, energies, {Spin.up: np.exp(-energies ** 2)})
+        d = {x: [] for x in ['cond', 'seebeck', 'kappa', 'hall', 'mu_steps', 'mu_doping',
+                             'carrier_conc', 'hall_doping']}
+        d["dos"] = self.dos.as_dict()
+        self.bta = mock.MagicMock(intrans={"scissor": 0.0})
+        self.bta.as_dict.return_value = d
+
+    def _assert_same_dos(self, dos):
+        self.assertAlmostEqual(dos.efermi, self.dos.efermi)
+        np.testing.assert_allclose(dos.energies, self.dos.energies)
+        np.testing.assert_allclose(dos.densities[Spin.up], self.dos.densities[Spin.up])
+
+    def test_dos_round_trip(self):
+        with mock.patch("atomate.vasp.firetasks.parse_outputs.BoltztrapAnalyzer.from_files",
+                        return_value=self.bta):
+            BoltztrapToDb(db_file=db_file).run_task({})
+
+        mmdb = VaspCalcDb.from_db_file(db_file, admin=True)
+        d = mmdb.db.boltztrap.find_one()
+        self.assertEqual(d["spacegroup"]["number"], 227)
+        self.assertNotIn("dos", d)
+        self._assert_same_dos(mmdb.get_boltztrap_dos(d["dos_boltztrap_fs_id"]))
+
+    def test_dos_encoded_twice(self):
+        # documents inserted by older versions of BoltztrapToDb, which json
+        # encoded the DOS before passing it to insert_gridfs
+        mmdb = VaspCalcDb.from_db_file(db_file, admin=True)
+        fs_id, _ = mmdb.insert_gridfs(json.dumps(self.dos.as_dict()),
+                                      collection="dos_boltztrap_fs", compress=True)
+        self._assert_same_dos(mmdb.get_boltztrap_dos(fs_id))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -85,6 +85,24 @@ class TestCopyVaspOutputs(AtomateTest):
         for f in no_files:
             self.assertFalse(os.path.exists(os.path.join(self.scratch_dir, f)))
 
+    def test_gzip_copy_stats(self):
+        ct = CopyVaspOutputs(calc_dir=self.gzip_outdir, nworkers=2)
+        action = ct.run_task({})
+        stats = action.stored_data["transfer_stats"]
+        self.assertEqual(len(stats), 6)
+        for s in stats:
+            self.assertEqual(s["method"], "decompress")
+            self.assertEqual(s["bytes"], os.path.getsize(s["dest"]))
+            self.assertGreater(s["rate"], 0)
+
+    def test_link_copy(self):
+        ct = CopyVaspOutputs(calc_dir=self.plain_outdir, link_mode="reflink")
+        ct.run_task({})
+        for f in ["INCAR", "KPOINTS", "POTCAR", "OUTCAR"]:
+            with open(os.path.join(self.plain_outdir, f)) as f1:
+                with open(os.path.join(self.scratch_dir, f)) as f2:
+                    self.assertEqual(f1.read(), f2.read())
+
     def test_relax2_copy(self):
         ct = CopyVaspOutputs(calc_dir=self.relax2_outdir, additional_files=["IBZKPT"])
         ct.run_task({})
@@ -164,6 +164,33 @@ class TestLobsterRunToDb(AtomateTest):
             results = gfs.find({"_id": oid}).count()
             self.assertEqual(results, 1)
 
+    def test_mongodb_deduplicate_files(self):
+        try:
+            VaspCalcDb.from_db_file(DB_FILE)
+        except:
+            raise unittest.SkipTest(
+                "Cannot connect to MongoDB! Is the database server running? "
+                "Are the credentials correct?"
+            )
+
+        copy_r(self.vasp_dir, ".")
+        ft = LobsterRunToDb(
+            calc_loc=True,
+            db_file=DB_FILE,
+            additional_outputs=["ICOHPLIST.lobster", "COOPCAR.lobster"],
+        )
+        ft.run_task({"calc_locs": [{"path": "test"}]})
+        ft.run_task({"calc_locs": [{"path": "test"}]})
+        coll = self.get_task_collection("lobster")
+        load_dict = coll.find_one({"formula_pretty": "K2Sn2O3"})
+        db = self.get_task_database()
+        gfs = gridfs.GridFS(db, "lobster_files")
+        self.assertEqual(gfs.find({}).count(), 2)
+        for fn in ["ICOHPLIST", "COOPCAR"]:
+            oid = load_dict[fn.lower() + "_id"]
+            stored = gfs.find_one({"_id": oid})
+            self.assertIn("checksum", stored.metadata)
+
     def test_jsonfile_si(self):
         copy_r(self.vasp_si_dir, ".")
         ft = LobsterRunToDb(calc_loc=True)
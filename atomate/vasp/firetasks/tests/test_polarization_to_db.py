@@ -5,10 +5,12 @@ import json
 import os
 import shutil
 import unittest
+from unittest import mock
 
 import numpy as np
 
 from pymongo import MongoClient
+from pymongo.collection import Collection
 
 from fireworks import LaunchPad, FWorker
 from fireworks.core.rocket_launcher import rapidfire
@@ -53,14 +55,37 @@ class TestFerroelectricWorkflow(AtomateTest):
         new_fw_spec = {'_fw_env': {"db_file": os.path.join(db_dir, "db.json")},
                        'tags':['wfid_1494203093.06934658']}
 
+        queries = []
+        find = Collection.find
+
+        def recording_find(collection, *args, **kwargs):
+            queries.append((collection, args, kwargs))
+            return find(collection, *args, **kwargs)
+
         analysis = PolarizationToDb(db_file='>>db_file<<')
-        analysis.run_task(new_fw_spec)
+        with mock.patch.object(Collection, "find", recording_find):
+            analysis.run_task(new_fw_spec)
+
+        # a single query, transferring only the fields used in the analysis
+        self.assertEqual(len(queries), 1)
+        collection, args, kwargs = queries[0]
+        size = sum(len(bson.BSON.encode(d)) for d in find(collection, *args, **kwargs))
+        full_size = sum(len(bson.BSON.encode(d)) for d in find(collection, args[0]))
+        self.assertGreater(size, 0)
+        self.assertLess(size, 0.1 * full_size)
 
         # Check recovered change in polarization
         coll = self.get_task_collection("polarization_tasks")
         d = coll.find_one()
         self.assertAlmostEqual(d['polarization_change_norm'], 46.288752795325244, 5)
 
+        # the full OUTCARs are referenced by the task_ids
+        self.assertEqual(len(d['task_ids']), len(d['outcars']))
+        self.assertEqual(set(d['outcars'][0]), {"p_elec", "zval_dict"})
+        self.assertEqual(d['schema']['code'], "atomate")
+        for task_id, task_label in zip(d['task_ids'], d['task_label_order']):
+            self.assertEqual(db.find_one({"task_id": task_id})["task_label"], task_label)
+
 
 
 if __name__ == "__main__":
@@ -1,19 +1,32 @@
+import os
+import unittest
 from pathlib import Path
 
+from fireworks import Firework, Workflow
 from fireworks.utilities.fw_serializers import load_object
 
 from atomate.vasp.firetasks.write_inputs import (
     WriteVaspFromIOSet,
     WriteVaspFromPMGObjects,
+    WriteTransmutedStructureIOSet,
     ModifyPotcar,
     ModifyIncar,
     ModifyKpoints,
+    get_input_set_for_structure,
+    get_transformation_class,
 )
-from atomate.utils.testing import AtomateTest
+from atomate.utils.database import SHARED_OBJECTS_COLLECTION
+from atomate.utils.testing import AtomateTest, DB_DIR
+from atomate.vasp.database import VaspCalcDb
+from atomate.vasp.analysis.cost import get_fw_cost_features, get_input_set_cost_features
+from atomate.vasp.powerups import use_shared_objects
 
 from pymatgen.util.testing import PymatgenTest
 from pymatgen.io.vasp import Incar, Poscar, Potcar, Kpoints
-from pymatgen.io.vasp.sets import MPRelaxSet
+from pymatgen.io.vasp.sets import MPRelaxSet, MPStaticSet
+from pymatgen.transformations.standard_transformations import (
+    SupercellTransformation,
+)
 
 __author__ = "Anubhav Jain, Kiran Mathew, Alex Ganose"
 __email__ = "ajain@lbl.gov, kmathew@lbl.gov"
@@ -117,6 +130,75 @@ class TestWriteVasp(AtomateTest):
         ft.run_task({})
         self._verify_files()
 
+    def test_shared_objects(self):
+        db_file = os.path.join(DB_DIR, "db.json")
+        try:
+            db = VaspCalcDb.from_db_file(db_file)
+            db.db[SHARED_OBJECTS_COLLECTION].delete_many({})
+        except Exception:
+            raise unittest.SkipTest("Cannot connect to MongoDB!")
+
+        vis = MPRelaxSet(self.struct_si, force_gamma=True)
+        fws = [
+            Firework(WriteVaspFromIOSet(structure=self.struct_si, vasp_input_set=vis)),
+            Firework(
+                WriteVaspFromIOSet(
+                    structure=self.struct_si, vasp_input_set="MPRelaxSet"
+                )
+            ),
+        ]
+        wf = use_shared_objects(Workflow(fws), db_file, ref_db_file=db_file)
+        tasks = [fw.tasks[0] for fw in wf.fws]
+        self.assertEqual(tasks[0]["structure"], tasks[1]["structure"])
+        self.assertIn("shared_object", tasks[0]["vasp_input_set"])
+        self.assertEqual(tasks[1]["vasp_input_set"], "MPRelaxSet")
+        self.assertEqual(db.db[SHARED_OBJECTS_COLLECTION].count_documents({}), 2)
+        # the input set references the shared structure instead of embedding it
+        vis_doc = db.db[SHARED_OBJECTS_COLLECTION].find_one(
+            {"_id": tasks[0]["vasp_input_set"]["shared_object"]}
+        )
+        self.assertEqual(
+            vis_doc["data"]["structure"]["shared_object"],
+            tasks[0]["structure"]["shared_object"],
+        )
+
+        # powerups applied afterwards see the resolved objects
+        self.assertEqual(get_fw_cost_features(wf.fws[0]), get_input_set_cost_features(vis))
+
+        ft = load_object(tasks[0].to_dict())  # simulate database insertion
+        ft.run_task({})
+        self._verify_files()
+        db.db[SHARED_OBJECTS_COLLECTION].delete_many({})
+
+    def test_transmuted(self):
+        self.assertIs(
+            get_transformation_class("SupercellTransformation"),
+            SupercellTransformation,
+        )
+        self.assertRaises(ValueError, get_transformation_class, "Unknown")
+
+        supercell = self.struct_si * [2, 1, 1]
+        overrides = {"user_incar_settings": {"ENCUT": 600}}
+        vis = MPStaticSet(self.struct_si, lepsilon=True, reciprocal_density=50)
+        vis_dict = vis.as_dict()
+        vis_dict.update(structure=supercell.as_dict(), **overrides)
+        vis_ref = MPStaticSet.from_dict(vis_dict)
+        vis_new = get_input_set_for_structure(vis, supercell, **overrides)
+        self.assertEqual(vis_new.structure, supercell)
+        self.assertEqual(vis_new.incar, vis_ref.incar)
+        self.assertEqual(str(vis_new.kpoints), str(vis_ref.kpoints))
+
+        ft = WriteTransmutedStructureIOSet(
+            structure=self.struct_si,
+            transformations=["SupercellTransformation"],
+            transformation_params=[{"scaling_matrix": [[2, 0, 0], [0, 1, 0], [0, 0, 1]]}],
+            vasp_input_set=MPRelaxSet(self.struct_si),
+        )
+        ft = load_object(ft.to_dict())  # simulate database insertion
+        ft.run_task({})
+        self.assertEqual(len(Poscar.from_file("POSCAR").structure), 4)
+        self.assertEqual(len(ft["transformation_params"]), 1)
+
     def test_modify_incar(self):
         # create an INCAR
         incar = self.ref_incar
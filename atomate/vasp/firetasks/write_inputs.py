@@ -4,9 +4,11 @@ This module defines tasks for writing vasp input sets.
 
 import os
 from importlib import import_module
+from inspect import getfullargspec
 
 import numpy as np
 
+from monty.json import MontyDecoder
 from monty.serialization import dumpfn
 
 from fireworks import FiretaskBase, explicit_serialize
@@ -33,12 +35,88 @@ from pymatgen.io.vasp.sets import (
 
 from pymatgen.io.vasp.outputs import Vasprun
 
+from atomate.utils.database import resolve_shared_object
 from atomate.utils.utils import env_chk, load_class
+from atomate.vasp.database import VaspCalcDb
 from atomate.vasp.firetasks.glue_tasks import GetInterpolatedPOSCAR
+from atomate.vasp.prev_calc import (
+    get_input_set_from_prev_calc,
+    load_prev_calc_summary,
+)
 
 __author__ = "Anubhav Jain, Shyue Ping Ong, Kiran Mathew, Alex Ganose"
 __email__ = "ajain@lbl.gov"
 
+# modules searched for transformations, a class found in several modules is
+# taken from the last one
+TRANSFORMATION_MODULES = [
+    "advanced_transformations",
+    "defect_transformations",
+    "site_transformations",
+    "standard_transformations",
+]
+
+# transformation classes by name, built on first use
+_transformation_classes = None
+
+
+def get_transformation_class(name):
+    """
+    Get a transformation class defined in the modules of
+    pymatgen.transformations.
+
+    Args:
+        name (str): name of the transformation class
+
+    Returns:
+        class
+    """
+    global _transformation_classes
+    if _transformation_classes is None:
+        classes = {}
+        for m in TRANSFORMATION_MODULES:
+            mod = import_module("pymatgen.transformations.{}".format(m))
+            classes.update(
+                {k: v for k, v in vars(mod).items() if isinstance(v, type)}
+            )
+        _transformation_classes = classes
+    if name not in _transformation_classes:
+        raise ValueError("Could not find transformation: {}".format(name))
+    return _transformation_classes[name]
+
+
+def get_input_set_for_structure(vis, structure, **kwargs):
+    """
+    Copy of a VASP input set for another structure. Equivalent to updating
+    the structure in vis.as_dict() and calling from_dict, but the input
+    set is not serialized.
+
+    Args:
+        vis (VaspInputSet): input set
+        structure (Structure): structure of the new input set
+        kwargs: other arguments of the input set to override, possibly
+            serialized
+
+    Returns:
+        VaspInputSet
+    """
+    # the same arguments as found by MSONable.as_dict
+    args = {}
+    for arg in getfullargspec(vis.__class__.__init__).args[1:]:
+        if hasattr(vis, arg):
+            args[arg] = getattr(vis, arg)
+        elif hasattr(vis, "_" + arg):
+            args[arg] = getattr(vis, "_" + arg)
+        else:
+            vis_dict = vis.as_dict()
+            vis_dict.update(structure=structure.as_dict(), **kwargs)
+            return vis.__class__.from_dict(vis_dict)
+    args.update(getattr(vis, "kwargs", {}))
+    args.update(getattr(vis, "_kwargs", {}))
+    args.update(MontyDecoder().process_decoded(kwargs))
+    args["structure"] = structure
+    return vis.__class__(**args)
+
 
 @explicit_serialize
 class WriteVaspFromIOSet(FiretaskBase):
@@ -48,9 +126,11 @@ class WriteVaspFromIOSet(FiretaskBase):
     String/parameter combo.
 
     Required params:
-        structure (Structure): structure
+        structure (Structure): structure. Can be a shared object reference,
+            see atomate.vasp.powerups.use_shared_objects.
         vasp_input_set (AbstractVaspInputSet or str): Either a VaspInputSet
             object or a string name for the VASP input set (e.g., "MPRelaxSet").
+            Can be a shared object reference.
 
     Optional params:
         vasp_input_params (dict): When using a string name for VASP input set,
@@ -69,18 +149,13 @@ class WriteVaspFromIOSet(FiretaskBase):
     optional_params = ["vasp_input_params", "potcar_spec"]
 
     def run_task(self, fw_spec):
-        # if a full VaspInputSet object was provided
-        if hasattr(self["vasp_input_set"], "write_input"):
-            vis = self["vasp_input_set"]
+        vis = resolve_shared_object(self["vasp_input_set"], VaspCalcDb, fw_spec)
 
         # if VaspInputSet String + parameters was provided
-        else:
-            vis_cls = load_class(
-                "pymatgen.io.vasp.sets", self["vasp_input_set"]
-            )
-            vis = vis_cls(
-                self["structure"], **self.get("vasp_input_params", {})
-            )
+        if not hasattr(vis, "write_input"):
+            vis_cls = load_class("pymatgen.io.vasp.sets", vis)
+            structure = resolve_shared_object(self["structure"], VaspCalcDb, fw_spec)
+            vis = vis_cls(structure, **self.get("vasp_input_params", {}))
 
         potcar_spec = self.get("potcar_spec", False)
         vis.write_input(".", potcar_spec=potcar_spec)
@@ -321,11 +396,17 @@ class WriteScanRelaxFromPrev(FiretaskBase):
             # First look for the gga_bandgap key in the FW spec, to save parsing time
             if fw_spec.get("gga_bandgap") is not None:
                 vasp_input_set_params["bandgap"] = fw_spec.get("gga_bandgap")
-            # If not found, parse the files from the previous calc to find the bandgap
+            # If not found, use the summary of the previous calc or parse its
+            # files to find the bandgap
             else:
-                parse_potcar_file = not potcar_spec
-                vasprun = Vasprun("vasprun.xml", parse_potcar_file=parse_potcar_file)
-                bandgap = vasprun.eigenvalue_band_properties[0]
+                summary = load_prev_calc_summary(".") or {}
+                band_props = summary.get("eigenvalue_band_properties")
+                if band_props:
+                    bandgap = band_props["bandgap"]
+                else:
+                    parse_potcar_file = not potcar_spec
+                    vasprun = Vasprun("vasprun.xml", parse_potcar_file=parse_potcar_file)
+                    bandgap = vasprun.eigenvalue_band_properties[0]
                 vasp_input_set_params["bandgap"] = bandgap
 
         # read the structure from the output of the previous calculation
@@ -382,7 +463,8 @@ class WriteVaspStaticFromPrev(FiretaskBase):
                 other_params["user_incar_settings"] = {}
             other_params["user_incar_settings"]["EDIFF"] = 1e-5
 
-        vis = MPStaticSet.from_prev_calc(
+        vis = get_input_set_from_prev_calc(
+            MPStaticSet,
             prev_calc_dir=self.get("prev_calc_dir", "."),
             reciprocal_density=self.get(
                 "reciprocal_density", default_reciprocal_density
@@ -428,8 +510,9 @@ class WriteVaspHSEBSFromPrev(FiretaskBase):
     ]
 
     def run_task(self, fw_spec):
-        vis = MPHSEBSSet.from_prev_calc(
-            self.get("prev_calc_dir", "."),
+        vis = get_input_set_from_prev_calc(
+            MPHSEBSSet,
+            prev_calc_dir=self.get("prev_calc_dir", "."),
             mode=self.get("mode", "uniform"),
             reciprocal_density=self.get("reciprocal_density", 50),
             kpoints_line_density=self.get("kpoints_line_density", 10),
@@ -473,7 +556,8 @@ class WriteVaspNSCFFromPrev(FiretaskBase):
     ]
 
     def run_task(self, fw_spec):
-        vis = MPNonSCFSet.from_prev_calc(
+        vis = get_input_set_from_prev_calc(
+            MPNonSCFSet,
             prev_calc_dir=self.get("prev_calc_dir", "."),
             copy_chgcar=self.get("copy_chgcar", False),
             nbands_factor=self.get("nbands_factor", 1.2),
@@ -532,7 +616,8 @@ class WriteVaspSOCFromPrev(FiretaskBase):
         # TODO: @albalu - can magmom be auto-parsed from the previous calc?
         #  -computron
 
-        vis = MPSOCSet.from_prev_calc(
+        vis = get_input_set_from_prev_calc(
+            MPSOCSet,
             prev_calc_dir=self.get("prev_calc_dir", "."),
             magmom=self["magmom"],
             saxis=self["saxis"],
@@ -580,7 +665,8 @@ class WriteVaspNMRFromPrev(FiretaskBase):
     ]
 
     def run_task(self, fw_spec):
-        vis = MPNMRSet.from_prev_calc(
+        vis = get_input_set_from_prev_calc(
+            MPNMRSet,
             prev_calc_dir=self.get("prev_calc_dir", "."),
             mode=self.get("mode", "cs"),
             isotopes=self.get("isotopes", None),
@@ -600,10 +686,12 @@ class WriteTransmutedStructureIOSet(FiretaskBase):
     only the last structure in the list is used.
 
     Required params:
-        structure (Structure): input structure
+        structure (Structure): input structure. Can be a shared object
+            reference, see atomate.vasp.powerups.use_shared_objects.
         transformations (list): list of names of transformation classes as
             defined in the modules in pymatgen.transformations
-        vasp_input_set (VaspInputSet): VASP input set.
+        vasp_input_set (VaspInputSet): VASP input set. Can be a shared object
+            reference.
 
     Optional params:
         transformation_params (list): list of dicts where each dict specifies
@@ -627,39 +715,19 @@ class WriteTransmutedStructureIOSet(FiretaskBase):
 
     def run_task(self, fw_spec):
 
-        transformations = []
         transformation_params = self.get(
             "transformation_params",
             [{} for _ in range(len(self["transformations"]))],
         )
-        for t in self["transformations"]:
-            found = False
-            t_cls = None
-            for m in [
-                "advanced_transformations",
-                "defect_transformations",
-                "site_transformations",
-                "standard_transformations",
-            ]:
-                mod = import_module("pymatgen.transformations.{}".format(m))
-
-                try:
-                    t_cls = getattr(mod, t)
-                    found = True
-                    continue
-                except AttributeError:
-                    pass
-
-            if not found:
-                raise ValueError("Could not find transformation: {}".format(t))
-
-            t_obj = t_cls(**transformation_params.pop(0))
-            transformations.append(t_obj)
+        transformations = [
+            get_transformation_class(t)(**params)
+            for t, params in zip(self["transformations"], transformation_params)
+        ]
 
         # TODO: @matk86 - should prev_calc_dir use CONTCAR instead of POSCAR?
         #  Note that if current dir, maybe POSCAR is indeed best ... -computron
         structure = (
-            self["structure"]
+            resolve_shared_object(self["structure"], VaspCalcDb, fw_spec)
             if not self.get("prev_calc_dir", None)
             else Poscar.from_file(
                 os.path.join(self["prev_calc_dir"], "POSCAR")
@@ -670,11 +738,12 @@ class WriteTransmutedStructureIOSet(FiretaskBase):
         final_structure = transmuter.transformed_structures[
             -1
         ].final_structure.copy()
-        vis_orig = self["vasp_input_set"]
-        vis_dict = vis_orig.as_dict()
-        vis_dict["structure"] = final_structure.as_dict()
-        vis_dict.update(self.get("override_default_vasp_params", {}) or {})
-        vis = vis_orig.__class__.from_dict(vis_dict)
+        vis_orig = resolve_shared_object(self["vasp_input_set"], VaspCalcDb, fw_spec)
+        vis = get_input_set_for_structure(
+            vis_orig,
+            final_structure,
+            **(self.get("override_default_vasp_params", {}) or {})
+        )
 
         potcar_spec = self.get("potcar_spec", False)
         vis.write_input(".", potcar_spec=potcar_spec)
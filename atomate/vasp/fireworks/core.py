@@ -35,7 +35,7 @@ from atomate.common.firetasks.glue_tasks import (
 )
 from atomate.vasp.firetasks.glue_tasks import CopyVaspOutputs, pass_vasp_result
 from atomate.vasp.firetasks.neb_tasks import TransferNEBTask
-from atomate.vasp.firetasks.parse_outputs import VaspToDb, BoltztrapToDb
+from atomate.vasp.firetasks.parse_outputs import VaspToDb, BoltztrapToDb, NEBToDb
 from atomate.vasp.firetasks.run_calc import (
     RunVaspCustodian,
     RunBoltztrap,
@@ -1269,6 +1269,7 @@ class NEBFW(Firework):
         user_incar_settings=None,
         user_kpoints_settings=None,
         additional_cust_args=None,
+        db_file=None,
         **kwargs
     ):
         """
@@ -1280,6 +1281,8 @@ class NEBFW(Firework):
             user_incar_settings (dict): Additional INCAR settings.
             user_kpoints_settings (dict): Additional KPOINTS settings.
             additional_cust_args (dict): Other kwargs that are passed to RunVaspCustodian.
+            db_file (str): Path to file specifying db credentials. If set, the NEB is
+                        parsed into the database by NEBToDb before being transferred.
             **kwargs: Other kwargs that are passed to Firework.__init__.
         """
         assert neb_label.isdigit() and int(neb_label) >= 1
@@ -1327,5 +1330,7 @@ class NEBFW(Firework):
             TransferNEBTask(label=label),
             PassCalcLocs(name=label),
         ]
+        if db_file:
+            tasks.insert(2, NEBToDb(db_file=db_file, additional_fields={"task_label": label}))
 
         super(NEBFW, self).__init__(tasks, spec=spec, name=label, **kwargs)
@@ -1,12 +1,22 @@
+import numpy as np
+
 from atomate.common.firetasks.glue_tasks import DeleteFiles
+from atomate.utils.database import get_shared_object_ref, resolve_shared_object
 from atomate.utils.utils import get_meta_from_structure, get_fws_and_tasks
 from atomate.vasp.config import (
     ADD_NAMEFILE,
+    DB_FILE,
     SCRATCH_DIR,
     ADD_MODIFY_INCAR,
     GAMMA_VASP_CMD,
 )
-from atomate.vasp.firetasks.glue_tasks import CheckStability, CheckBandgap
+from atomate.vasp.database import VaspCalcDb
+from atomate.vasp.firetasks.glue_tasks import (
+    CheckStability,
+    CheckBandgap,
+    CheckDuplicateCalc,
+    CopyVaspRestartFiles,
+)
 from atomate.vasp.firetasks.lobster_tasks import RunLobsterFake
 from atomate.vasp.firetasks.neb_tasks import RunNEBVaspFake
 from atomate.vasp.firetasks.parse_outputs import JsonToDb
@@ -49,6 +59,49 @@ def add_priority(original_wf, root_priority, child_priority=None):
     return original_wf
 
 
+def add_priority_from_cost(original_wf, cost_model, mode="shortest_job_first"):
+    """
+    Set the priority of the Fireworks from the cost of their VASP
+    calculations predicted by a cost model.
+
+    Args:
+        original_wf (Workflow): original workflow
+        cost_model (CostModel): model of the cost of the calculations, e.g.
+            fit on the tasks collection with CostModel.from_db_file
+        mode (str): "shortest_job_first" to run the cheapest calculations
+            first, the priority is minus the predicted core-minutes.
+            "critical_path" to run first the calculations with the most
+            expensive chain of calculations depending on them, the priority
+            is the predicted core-minutes of that chain (the Fireworks
+            without VASP calculation cost nothing).
+
+    Returns:
+       Workflow: priority-decorated workflow
+    """
+    predictions = cost_model.predict_wf(original_wf)
+    costs = {fw_id: p["core_seconds"] if p else 0 for fw_id, p in predictions.items()}
+
+    if mode == "shortest_job_first":
+        for fw in original_wf.fws:
+            if predictions[fw.fw_id]:
+                fw.spec["_priority"] = -int(round(costs[fw.fw_id] / 60))
+    elif mode == "critical_path":
+        path_costs = {}
+
+        def _get_path_cost(fw_id):
+            if fw_id not in path_costs:
+                path_costs[fw_id] = costs[fw_id] + max(
+                    [_get_path_cost(i) for i in original_wf.links[fw_id]], default=0
+                )
+            return path_costs[fw_id]
+
+        for fw in original_wf.fws:
+            fw.spec["_priority"] = int(round(_get_path_cost(fw.fw_id) / 60))
+    else:
+        raise ValueError("Unknown priority mode: {}".format(mode))
+    return original_wf
+
+
 def remove_custodian(original_wf, fw_name_constraint=None):
     """
     Replaces all tasks with "RunVasp*" (e.g. RunVaspCustodian) to be
@@ -119,18 +172,21 @@ def use_no_vasp(original_wf, ref_dirs):
     Returns:
         Workflow
     """
-    for idx_fw, fw in enumerate(original_wf.fws):
-        for job_type in ref_dirs.keys():
-            if job_type in fw.name:
-                for idx_t, t in enumerate(fw.tasks):
-                    if "RunVasp" in str(t):
-                        original_wf.fws[idx_fw].tasks[idx_t] = RunNoVasp(
-                            ref_dir=ref_dirs[job_type]
-                        )
-                    if "VaspToDb" in str(t):
-                        original_wf.fws[idx_fw].tasks[idx_t] = JsonToDb(
-                            db_file=t.get("db_file", None), calc_dir=ref_dirs[job_type],
-                        )
+    for job_type in ref_dirs.keys():
+        idx_list = get_fws_and_tasks(
+            original_wf, fw_name_constraint=job_type, task_name_constraint="RunVasp"
+        )
+        for idx_fw, idx_t in idx_list:
+            original_wf.fws[idx_fw].tasks[idx_t] = RunNoVasp(ref_dir=ref_dirs[job_type])
+
+        idx_list = get_fws_and_tasks(
+            original_wf, fw_name_constraint=job_type, task_name_constraint="VaspToDb"
+        )
+        for idx_fw, idx_t in idx_list:
+            t = original_wf.fws[idx_fw].tasks[idx_t]
+            original_wf.fws[idx_fw].tasks[idx_t] = JsonToDb(
+                db_file=t.get("db_file", None), calc_dir=ref_dirs[job_type],
+            )
     return original_wf
 
 
@@ -175,27 +231,26 @@ def use_fake_vasp(
             "LMAXMIX",
         ]
 
-    for idx_fw, fw in enumerate(original_wf.fws):
-        for job_type in ref_dirs.keys():
-            if job_type in fw.name:
-                for idx_t, t in enumerate(fw.tasks):
-                    t_str = str(t)
-                    t_job_type = t.get("job_type")
-                    if "RunVasp" in t_str:
-                        original_wf.fws[idx_fw].tasks[idx_t] = RunVaspFake(
-                            ref_dir=ref_dirs[job_type],
-                            params_to_check=params_to_check,
-                            check_incar=check_incar,
-                            check_kpoints=check_kpoints,
-                            check_poscar=check_poscar,
-                            check_potcar=check_potcar,
-                            clear_inputs=clear_inputs,
-                        )
-
-                    if "RunVaspCustodian" in t_str and t_job_type == "neb":
-                        original_wf.fws[idx_fw].tasks[idx_t] = RunNEBVaspFake(
-                            ref_dir=ref_dirs[job_type], params_to_check=params_to_check,
-                        )
+    for job_type in ref_dirs.keys():
+        idx_list = get_fws_and_tasks(
+            original_wf, fw_name_constraint=job_type, task_name_constraint="RunVasp"
+        )
+        for idx_fw, idx_t in idx_list:
+            t = original_wf.fws[idx_fw].tasks[idx_t]
+            if "RunVaspCustodian" in t.fw_name and t.get("job_type") == "neb":
+                original_wf.fws[idx_fw].tasks[idx_t] = RunNEBVaspFake(
+                    ref_dir=ref_dirs[job_type], params_to_check=params_to_check,
+                )
+            else:
+                original_wf.fws[idx_fw].tasks[idx_t] = RunVaspFake(
+                    ref_dir=ref_dirs[job_type],
+                    params_to_check=params_to_check,
+                    check_incar=check_incar,
+                    check_kpoints=check_kpoints,
+                    check_poscar=check_poscar,
+                    check_potcar=check_potcar,
+                    clear_inputs=clear_inputs,
+                )
 
     return original_wf
 
@@ -372,9 +427,10 @@ def modify_to_soc(
             )
             fw_id = sid[0][0]
             task_id = sid[0][1]
-            structure = (
-                original_wf.fws[fw_id].tasks[task_id]["vasp_input_set"].structure
-            )
+            # the input set may be a reference, see use_shared_objects
+            structure = resolve_shared_object(
+                original_wf.fws[fw_id].tasks[task_id]["vasp_input_set"], VaspCalcDb
+            ).structure
         except:
             raise ValueError(
                 "modify_to_soc powerup requires the structure in vasp_input_set"
@@ -490,6 +546,79 @@ def set_queue_options(
     return original_wf
 
 
+def set_queue_options_from_cost(
+    original_wf,
+    cost_model,
+    ncores,
+    walltime_factor=2.0,
+    min_walltime=600,
+    max_walltime=None,
+    memory_key=None,
+    memory_factor=1.5,
+    memory_per_cpu=False,
+    ranks_per_node=None,
+    fw_name_constraint=None,
+):
+    """
+    Set the walltime (and optionally the memory) requested from the queue for
+    each Firework from the cost of its VASP calculation predicted by a cost
+    model. The Fireworks whose cost cannot be predicted are not modified.
+
+    This powerup updates the 'queueadapter' key of the Firework specs, see
+    set_queue_options.
+
+    Args:
+        original_wf (Workflow):
+        cost_model (CostModel): model of the cost of the calculations, e.g.
+            fit on the tasks collection with CostModel.from_db_file
+        ncores (int): number of cores of the jobs, the walltime is the
+            predicted core-seconds divided by ncores
+        walltime_factor (float): safety factor applied to the predicted
+            walltime
+        min_walltime (int): minimum walltime in seconds
+        max_walltime (int): maximum walltime in seconds, e.g. the limit of the
+            queue
+        memory_key (str): key of the memory in the qadapter template, e.g.
+            "mem" (per node) or "mem_per_cpu" for SLURM, depending on the
+            template. If None, the memory is not set.
+        memory_factor (float): safety factor applied to the predicted memory,
+            set in MB
+        memory_per_cpu (bool): whether memory_key is a memory per CPU. The
+            model predicts the maximum memory used by an MPI rank (from the
+            OUTCAR), which is otherwise multiplied by ranks_per_node to get
+            the memory per node.
+        ranks_per_node (int): number of MPI ranks per node. Default: ncores,
+            i.e. single-node jobs
+        fw_name_constraint (str): Only apply changes to FWs where fw_name
+            contains this substring.
+
+    Returns:
+        Workflow: workflow with modified queue options
+    """
+    predictions = cost_model.predict_wf(original_wf)
+    for fw in original_wf.fws:
+        prediction = predictions[fw.fw_id]
+        if not prediction or (fw_name_constraint and fw_name_constraint not in fw.name):
+            continue
+        walltime = max(prediction["core_seconds"] / ncores * walltime_factor, min_walltime)
+        if max_walltime:
+            walltime = min(walltime, max_walltime)
+        walltime = int(round(walltime))
+        qsettings = {
+            "walltime": "{:02d}:{:02d}:{:02d}".format(
+                walltime // 3600, walltime % 3600 // 60, walltime % 60
+            )
+        }
+        if memory_key:
+            # the predicted memory is per MPI rank
+            nranks = 1 if memory_per_cpu else (ranks_per_node or ncores)
+            qsettings[memory_key] = int(
+                np.ceil(prediction["memory_kb"] * nranks * memory_factor / 1024)
+            )
+        fw.spec.setdefault("_queueadapter", {}).update(qsettings)
+    return original_wf
+
+
 def set_execution_options(
     original_wf,
     fworker_name=None,
@@ -929,13 +1058,154 @@ def use_fake_lobster(original_wf, ref_dirs, params_to_check=None):
     """
     if not params_to_check:
         params_to_check = ["basisSet", "cohpGenerator", "basisfunctions"]
-    for idx_fw, fw in enumerate(original_wf.fws):
-        for job_type in ref_dirs.keys():
-            if job_type in fw.name:
-                for idx_t, t in enumerate(fw.tasks):
-                    if "RunLobster" in str(t):
-                        original_wf.fws[idx_fw].tasks[idx_t] = RunLobsterFake(
-                            ref_dir=ref_dirs[job_type], params_to_check=params_to_check
-                        )
+    for job_type in ref_dirs.keys():
+        idx_list = get_fws_and_tasks(
+            original_wf, fw_name_constraint=job_type, task_name_constraint="RunLobster"
+        )
+        for idx_fw, idx_t in idx_list:
+            original_wf.fws[idx_fw].tasks[idx_t] = RunLobsterFake(
+                ref_dir=ref_dirs[job_type], params_to_check=params_to_check
+            )
+
+    return original_wf
+
 
+def use_shared_objects(
+    original_wf, db_file, ref_db_file=DB_FILE, fw_name_constraint=None
+):
+    """
+    Stores the structures and VASP input sets of the input writing tasks once
+    in the database and replaces them by references in the Firework specs.
+    Identical objects, e.g. the same structure used by many Fireworks or the
+    structure of an input set, are stored only once, which reduces the size
+    of large workflows in the LaunchPad. The references are resolved when
+    the tasks are run, and by the powerups and tasks that read these
+    parameters (e.g. modify_to_soc, add_priority_from_cost or
+    CheckKpointsConvergence) with resolve_shared_object.
+
+    Args:
+        original_wf (Workflow)
+        db_file (str): path to the db file used to store the objects
+        ref_db_file (str): path to the db file used by the tasks to load the
+            objects. Supports env_chk.
+        fw_name_constraint (str): Only apply changes to FWs where fw_name
+            contains this substring.
+
+    Returns:
+       Workflow
+    """
+    db = VaspCalcDb.from_db_file(db_file)
+    keys = {}
+    idx_list = get_fws_and_tasks(
+        original_wf,
+        fw_name_constraint=fw_name_constraint,
+        task_name_constraint="Write",
+    )
+    for idx_fw, idx_t in idx_list:
+        task = original_wf.fws[idx_fw].tasks[idx_t]
+        for param in ["structure", "vasp_input_set"]:
+            obj = task.get(param)
+            if not hasattr(obj, "as_dict"):
+                continue
+            # the same object is often shared by many tasks of a workflow
+            if id(obj) not in keys:
+                d = obj.as_dict()
+                # the structure of an input set is stored once as well, and
+                # substituted when the input set is loaded
+                if param == "vasp_input_set" and isinstance(d.get("structure"), dict):
+                    d["structure"] = get_shared_object_ref(
+                        db.insert_shared_object(d["structure"]), ref_db_file
+                    )
+                keys[id(obj)] = (db.insert_shared_object(d), obj)
+            task[param] = get_shared_object_ref(keys[id(obj)][0], ref_db_file)
+    return original_wf
+
+
+def use_duplicate_check(
+    original_wf, db_file=DB_FILE, link_mode=None, fw_name_constraint=None
+):
+    """
+    Every FireWork that runs VASP checks, just beforehand, whether a
+    successful task of the database was run with the same inputs (INCAR
+    without the parallelization parameters, KPOINTS, POSCAR and POTCAR), e.g.
+    by another workflow. If so, the outputs of that task are copied and VASP
+    is not run. See CheckDuplicateCalc.
+
+    Apply this powerup after the powerups that modify the inputs or replace
+    the RunVasp* tasks, e.g. add_modify_incar, use_custodian or use_fake_vasp.
+    NEB calculations are not checked.
+
+    Args:
+        original_wf (Workflow)
+        db_file (str): path to file containing the database credentials.
+            Supports env_chk.
+        link_mode (str): if "reflink" or "hardlink", link the outputs of the
+            duplicated task instead of copying them.
+        fw_name_constraint (str): Only apply changes to FWs where fw_name
+            contains this substring.
+
+    Returns:
+       Workflow
+    """
+    idx_list = get_fws_and_tasks(
+        original_wf,
+        fw_name_constraint=fw_name_constraint,
+        task_name_constraint="RunVasp",
+    )
+    for idx_fw, idx_t in reversed(idx_list):
+        task = original_wf.fws[idx_fw].tasks[idx_t]
+        if task.get("job_type") == "neb":
+            continue
+        original_wf.fws[idx_fw].tasks.insert(
+            idx_t, CheckDuplicateCalc(db_file=db_file, link_mode=link_mode)
+        )
+    return original_wf
+
+
+def use_restart_files(
+    original_wf, restart_files=None, link_mode=None, fw_name_constraint=None
+):
+    """
+    Every FireWork that copies the outputs of a previous VASP run with
+    CopyVaspOutputs also copies its WAVECAR and CHGCAR, when the inputs are
+    compatible, and starts the electronic minimization from them (ISTART and
+    ICHARG). See CopyVaspRestartFiles. The electronic steps saved are stored
+    in the restart key of the task documents.
+
+    The previous run only writes a WAVECAR if LWAVE = True, which can be set
+    with add_modify_incar. Apply this powerup after the powerups that modify
+    the inputs, e.g. add_modify_incar, and before use_duplicate_check.
+
+    Args:
+        original_wf (Workflow)
+        restart_files ([str]): restart files to copy, among "WAVECAR" and
+            "CHGCAR". Default: both
+        link_mode (str): if "reflink", clone the restart files instead of
+            copying them when possible.
+        fw_name_constraint (str): Only apply changes to FWs where fw_name
+            contains this substring.
+
+    Returns:
+       Workflow
+    """
+    idx_list = get_fws_and_tasks(
+        original_wf,
+        fw_name_constraint=fw_name_constraint,
+        task_name_constraint="RunVasp",
+    )
+    for idx_fw, idx_t in reversed(idx_list):
+        fw = original_wf.fws[idx_fw]
+        copy_tasks = [t for t in fw.tasks[:idx_t] if "CopyVaspOutputs" in t.fw_name]
+        if not copy_tasks:
+            continue
+        params = {
+            k: copy_tasks[0][k]
+            for k in ["calc_loc", "calc_dir", "filesystem"]
+            if copy_tasks[0].get(k) is not None
+        }
+        if restart_files:
+            params["restart_files"] = restart_files
+        if link_mode:
+            params["link_mode"] = link_mode
+        fw.tasks.insert(idx_t, CopyVaspRestartFiles(**params))
     return original_wf
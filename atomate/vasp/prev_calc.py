@@ -0,0 +1,440 @@
+"""
+This module defines a compact summary of a finished VASP calculation, with
+everything the pymatgen input sets need to be generated "from_prev_calc".
+VaspToDb writes the summary next to the outputs it parsed, so that the
+Write*FromPrev tasks of the child Fireworks do not have to parse the
+vasprun.xml and OUTCAR files again.
+"""
+
+import copy
+import glob
+import os
+import struct
+import zlib
+
+import numpy as np
+from monty.serialization import dumpfn, loadfn
+
+from pymatgen.core.structure import Structure
+from pymatgen.io.vasp import Incar, Kpoints
+from pymatgen.io.vasp.sets import (
+    MPHSEBSSet,
+    MPNMRSet,
+    MPNonSCFSet,
+    MPSOCSet,
+    MPStaticSet,
+    get_structure_from_prev_run,
+)
+
+from atomate.utils.utils import get_logger
+
+logger = get_logger(__name__)
+
+PREV_CALC_SUMMARY_FILE = "prev_calc_summary.json"
+# restart files copied from the previous calculation, see CopyVaspRestartFiles
+RESTART_SUMMARY_FILE = "restart_summary.json"
+# increment when the content of the summary changes, older summaries are
+# then ignored
+PREV_CALC_SUMMARY_VERSION = 2
+
+# structure the input sets are created with before being overridden with the
+# previous calculation, as in from_prev_calc
+_PLACEHOLDER_STRUCTURE = Structure(
+    np.eye(3), ["I"], [[0, 0, 0]], site_properties={"magmom": [[0, 0, 1]]}
+)
+
+
+class PrevCalcSummaryError(Exception):
+    """
+    Raised when an input set needs information that is not in the summary.
+    """
+
+    pass
+
+
+class SummaryVasprun:
+    """
+    Stand-in for the Vasprun of a previous calculation, built from its
+    summary. Only supports the attributes used by the pymatgen input sets.
+    """
+
+    def __init__(self, summary):
+        self._summary = summary
+
+    @property
+    def final_structure(self):
+        return Structure.from_dict(self._summary["structure"])
+
+    @property
+    def incar(self):
+        # the input sets modify the incar in place, always return a new one
+        return Incar.from_dict(self._summary["incar"])
+
+    @property
+    def kpoints(self):
+        return Kpoints.from_dict(self._summary["kpoints"])
+
+    @property
+    def parameters(self):
+        return copy.deepcopy(self._summary["parameters"])
+
+    @property
+    def is_spin(self):
+        return self._summary["parameters"].get("ISPIN", 1) == 2
+
+    @property
+    def eigenvalue_band_properties(self):
+        props = self._summary.get("eigenvalue_band_properties")
+        if not props:
+            raise PrevCalcSummaryError("eigenvalue_band_properties")
+        return (
+            props["bandgap"],
+            props["cbm"],
+            props["vbm"],
+            props["is_gap_direct"],
+        )
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        # e.g. the eigenvalues or the band structure, which are too large to
+        # be summarized
+        raise PrevCalcSummaryError(name)
+
+
+class SummaryOutcar:
+    """
+    Stand-in for the Outcar of a previous calculation, built from its summary.
+    """
+
+    def __init__(self, summary):
+        self.magnetization = tuple(summary["magnetization"])
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        raise PrevCalcSummaryError(name)
+
+
+def get_prev_calc_files(path):
+    """
+    Get the vasprun.xml and OUTCAR files of a calculation, selected as in
+    pymatgen.io.vasp.sets.get_vasprun_outcar.
+
+    Args:
+        path (str): calculation directory
+
+    Returns:
+        (str, str): paths to the vasprun.xml and OUTCAR files, None if one of
+            them is missing
+    """
+    files = []
+    for name in ["vasprun.xml", "OUTCAR"]:
+        paths = glob.glob(os.path.join(path, name + "*"))
+        if not paths:
+            return None
+        full_path = os.path.join(path, name)
+        files.append(full_path if full_path in paths else sorted(paths)[-1])
+    return tuple(files)
+
+
+def get_file_fingerprint(path):
+    """
+    Size and CRC-32 of the content of a file once decompressed, so that the
+    fingerprint of an output file does not change when it is gzipped, or
+    copied and unzipped by CopyVaspOutputs. Modification times are not used
+    since they change when the files are copied.
+
+    Args:
+        path (str): path to the file
+
+    Returns:
+        [int]: size modulo 2**32 and CRC-32 of the content, None for files
+            compressed with other codecs
+    """
+    if path.lower().endswith(".gz"):
+        # both are in the gzip trailer, no need to decompress the file
+        with open(path, "rb") as f:
+            f.seek(-8, os.SEEK_END)
+            crc, size = struct.unpack("<II", f.read(8))
+        return [size, crc]
+    elif os.path.splitext(path)[1].lower() in [".bz2", ".xz", ".z"]:
+        return None
+    crc = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            crc = zlib.crc32(chunk, crc)
+    return [os.path.getsize(path) % 2 ** 32, crc & 0xFFFFFFFF]
+
+
+def get_prev_calc_fingerprint(path):
+    """
+    Fingerprint of the output files of a calculation, used to detect stale
+    summaries.
+
+    Args:
+        path (str): calculation directory
+
+    Returns:
+        dict: uncompressed sizes and CRC-32 of the vasprun.xml and OUTCAR
+            files, None if they cannot be determined
+    """
+    files = get_prev_calc_files(path)
+    if not files:
+        return None
+    fingerprints = [get_file_fingerprint(f) for f in files]
+    if None in fingerprints:
+        return None
+    return dict(zip(["vasprun", "outcar"], fingerprints))
+
+
+def get_first_nelectronic_steps(task_doc):
+    """
+    Number of electronic steps of the first ionic step of a calculation,
+    i.e. the cost of the electronic convergence from its initial guess.
+
+    Args:
+        task_doc (dict): task document of the calculation
+
+    Returns:
+        int: number of electronic steps, None if unavailable
+    """
+    try:
+        ionic_steps = task_doc["calcs_reversed"][-1]["output"]["ionic_steps"]
+        return len(ionic_steps[0]["electronic_steps"])
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+def get_restart_files(summary, incar, structure, kpoints, restart_files=("WAVECAR", "CHGCAR"),
+                      tol=1e-5):
+    """
+    Restart files of a previous calculation that can be read by a new
+    calculation. The charge density can be read if the cell, the species,
+    the plane wave cutoff, the precision (i.e. the FFT grids), the spin
+    polarization and the non-collinearity are the same. The wavefunctions
+    additionally need the same k-points.
+
+    Args:
+        summary (dict): summary of the previous calculation
+        incar (dict): INCAR of the new calculation
+        structure (Structure): structure of the new calculation
+        kpoints (Kpoints): k-points of the new calculation, None if KSPACING
+            is used
+        restart_files ([str]): restart files to consider
+        tol (float): absolute tolerance on the lattice vectors, in Angstrom
+
+    Returns:
+        [str]: compatible restart files
+    """
+    prev_structure = Structure.from_dict(summary["structure"])
+    if [str(site.species) for site in prev_structure] != \
+            [str(site.species) for site in structure]:
+        return []
+    if not np.allclose(prev_structure.lattice.matrix, structure.lattice.matrix, atol=tol):
+        return []
+    prev_incar = summary["incar"]
+    for key, default in [("ENCUT", None), ("PREC", "Normal"), ("ISPIN", 1),
+                         ("LSORBIT", False), ("LNONCOLLINEAR", False), ("KSPACING", None)]:
+        if str(prev_incar.get(key, default)).lower() != str(incar.get(key, default)).lower():
+            return []
+
+    files = [f for f in restart_files if f != "WAVECAR"]
+    if "WAVECAR" in restart_files:
+        prev_kpoints = summary.get("kpoints")
+        if prev_kpoints is not None:
+            prev_kpoints = Kpoints.from_dict(prev_kpoints).as_dict()
+            prev_kpoints.pop("comment", None)
+        if kpoints is not None:
+            kpoints = kpoints.as_dict()
+            kpoints.pop("comment", None)
+        if prev_kpoints == kpoints:
+            files.insert(0, "WAVECAR")
+    return files
+
+
+def write_prev_calc_summary(task_doc, calc_dir):
+    """
+    Write the summary of a calculation parsed by the VaspDrone in its
+    directory.
+
+    Args:
+        task_doc (dict): task document of the calculation
+        calc_dir (str): directory of the calculation
+    """
+    fingerprint = get_prev_calc_fingerprint(calc_dir)
+    if not fingerprint:
+        return
+    calc = task_doc["calcs_reversed"][0]
+    kpoints = {k: v for k, v in calc["input"]["kpoints"].items() if k != "actual_points"}
+    summary = {
+        "version": PREV_CALC_SUMMARY_VERSION,
+        "files": fingerprint,
+        "structure": calc["output"]["structure"],
+        "incar": calc["input"]["incar"],
+        "kpoints": kpoints,
+        "parameters": calc["input"]["parameters"],
+        "spacegroup": task_doc.get("output", {}).get("spacegroup"),
+        "magnetization": calc["output"].get("outcar", {}).get("magnetization", []),
+        "eigenvalue_band_properties": calc["output"].get("eigenvalue_band_properties"),
+        "bandgap": calc["output"].get("bandgap"),
+        "vbm": calc["output"].get("vbm"),
+        "cbm": calc["output"].get("cbm"),
+        # baseline of the restart files, see CopyVaspRestartFiles
+        "nelectronic_steps": get_first_nelectronic_steps(task_doc),
+    }
+    dumpfn(summary, os.path.join(calc_dir, PREV_CALC_SUMMARY_FILE))
+
+
+def load_prev_calc_summary(prev_calc_dir):
+    """
+    Load the summary of a previous calculation.
+
+    Args:
+        prev_calc_dir (str): directory of the previous calculation
+
+    Returns:
+        dict: the summary, None if it is missing, from another version or
+            does not match the output files of the directory
+    """
+    paths = sorted(glob.glob(os.path.join(prev_calc_dir, PREV_CALC_SUMMARY_FILE + "*")))
+    if not paths:
+        return None
+    try:
+        summary = loadfn(paths[0], cls=None)
+    except Exception:
+        logger.warning("Cannot read {}".format(paths[0]))
+        return None
+    if summary.get("version") != PREV_CALC_SUMMARY_VERSION:
+        return None
+    if summary.get("files") != get_prev_calc_fingerprint(prev_calc_dir):
+        logger.info("Ignoring stale {}".format(paths[0]))
+        return None
+    return summary
+
+
+def _copy_chgcar(vis, prev_calc_dir):
+    if vis.copy_chgcar:
+        chgcars = sorted(glob.glob(os.path.join(prev_calc_dir, "CHGCAR*")))
+        if chgcars:
+            vis.files_to_transfer["CHGCAR"] = str(chgcars[-1])
+
+
+def override_from_summary(vis, summary, prev_calc_dir="."):
+    """
+    Same as vis.override_from_prev_calc(prev_calc_dir) for the input sets
+    written from previous calculations by atomate, with the information of
+    the vasprun.xml and OUTCAR files taken from the summary.
+
+    Args:
+        vis: pymatgen input set, one of MPStaticSet, MPNMRSet, MPNonSCFSet,
+            MPSOCSet and MPHSEBSSet
+        summary (dict): summary of the previous calculation
+        prev_calc_dir (str): directory of the previous calculation, for the
+            files to transfer
+
+    Returns:
+        the input set
+
+    Raises:
+        PrevCalcSummaryError: if the input set needs information that is not
+            in the summary, or is not supported
+    """
+    if vis.standardize:
+        # leave the warnings and the copy_chgcar logic to pymatgen
+        raise PrevCalcSummaryError("standardize")
+
+    # subclasses may override override_from_prev_calc, only exact types are
+    # supported
+    cls = type(vis)
+    if cls not in [MPStaticSet, MPNMRSet, MPNonSCFSet, MPSOCSet, MPHSEBSSet]:
+        raise PrevCalcSummaryError("override_from_prev_calc of {}".format(cls.__name__))
+
+    vasprun, outcar = SummaryVasprun(summary), SummaryOutcar(summary)
+    small_gap_multiply = getattr(vis, "small_gap_multiply", None)
+    small_gap = bool(small_gap_multiply) and \
+        vasprun.eigenvalue_band_properties[0] <= small_gap_multiply[0]
+
+    if cls in [MPStaticSet, MPNMRSet]:
+        vis.prev_incar = vasprun.incar
+        vis.prev_kpoints = vasprun.kpoints
+        vis._structure = get_structure_from_prev_run(vasprun, outcar)
+        if small_gap:
+            vis.reciprocal_density = vis.reciprocal_density * small_gap_multiply[1]
+
+    elif cls is MPNonSCFSet:
+        if vis.nedos == 0:
+            raise PrevCalcSummaryError("eigenvalues")
+        vis.prev_incar = vasprun.incar
+        vis._structure = get_structure_from_prev_run(vasprun, outcar)
+        # turn off spin when the magmom of every site is smaller than 0.02
+        if outcar.magnetization:
+            site_magmom = np.array([m["tot"] for m in outcar.magnetization])
+            ispin = 2 if np.any(site_magmom[np.abs(site_magmom) > 0.02]) else 1
+        else:
+            ispin = 2 if vasprun.is_spin else 1
+        nbands = int(np.ceil(vasprun.parameters["NBANDS"] * vis.nbands_factor))
+        vis.prev_incar.update({"ISPIN": ispin, "NBANDS": nbands})
+        _copy_chgcar(vis, prev_calc_dir)
+        if small_gap:
+            vis.reciprocal_density = vis.reciprocal_density * small_gap_multiply[1]
+            vis.kpoints_line_density = vis.kpoints_line_density * small_gap_multiply[1]
+
+    elif cls is MPSOCSet:
+        vis.prev_incar = vasprun.incar
+        # prefer the final magmoms to those of the previous INCAR
+        vis.prev_incar.pop("MAGMOM", None)
+        structure = get_structure_from_prev_run(vasprun, outcar)
+        if vis.magmom:
+            structure = structure.copy(site_properties={"magmom": vis.magmom})
+        if not hasattr(structure[0], "magmom"):
+            raise ValueError(
+                "Neither the previous structure has magmom property nor magmom provided"
+            )
+        # magmom has to be 3D for SOC calculations
+        if not isinstance(structure[0].magmom, list):
+            structure = structure.copy(
+                site_properties={"magmom": [[0, 0, site.magmom] for site in structure]}
+            )
+        vis._structure = structure
+        nbands = int(np.ceil(vasprun.parameters["NBANDS"] * vis.nbands_factor))
+        vis.prev_incar.update({"NBANDS": nbands})
+        _copy_chgcar(vis, prev_calc_dir)
+        if small_gap:
+            vis.reciprocal_density = vis.reciprocal_density * small_gap_multiply[1]
+
+    else:
+        if vis.mode.lower() == "gap":
+            raise PrevCalcSummaryError("band structure")
+        vis._structure = get_structure_from_prev_run(vasprun, outcar)
+        _copy_chgcar(vis, prev_calc_dir)
+
+    return vis
+
+
+def get_input_set_from_prev_calc(input_set_cls, prev_calc_dir=".", **kwargs):
+    """
+    Same as input_set_cls.from_prev_calc(prev_calc_dir, **kwargs), but uses
+    the summary of the previous calculation instead of parsing its
+    vasprun.xml and OUTCAR files when possible, see override_from_summary.
+
+    Args:
+        input_set_cls: pymatgen input set class, e.g. MPStaticSet
+        prev_calc_dir (str): directory of the previous calculation
+        kwargs: arguments of input_set_cls.from_prev_calc
+
+    Returns:
+        the input set
+    """
+    summary = load_prev_calc_summary(prev_calc_dir)
+    if summary:
+        try:
+            vis = input_set_cls(_PLACEHOLDER_STRUCTURE, **kwargs)
+            return override_from_summary(vis, summary, prev_calc_dir)
+        except PrevCalcSummaryError as e:
+            logger.info(
+                "{} needs {}, which is not summarized. Parsing {}".format(
+                    input_set_cls.__name__, e, prev_calc_dir
+                )
+            )
+    return input_set_cls.from_prev_calc(prev_calc_dir, **kwargs)
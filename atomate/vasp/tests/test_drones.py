@@ -3,12 +3,14 @@
 # Distributed under the terms of the BSD License.
 
 import os
+import shutil
+import tempfile
 import unittest
 
 from monty.json import MontyDecoder
 from pymatgen.io.vasp import Outcar, Oszicar
 
-from atomate.vasp.drones import VaspDrone
+from atomate.vasp.drones import NEBDrone, VaspDrone
 
 import numpy as np
 
@@ -174,3 +176,73 @@ class VaspToDbTaskDroneTest(unittest.TestCase):
         doc = drone.assimilate(self.Si_static)
         pot_spec = doc['calcs_reversed'][0]['input']["potcar_spec"]
         self.assertIsNone(pot_spec[0]["hash"])  # check a hash was not loaded
+
+    def test_parse_stats(self):
+        drone = VaspDrone(parse_dos=True)
+        doc = drone.assimilate(self.Si_static)
+        for stage in ["assimilate", "vasprun", "outcar", "dos", "symmetry"]:
+            self.assertGreater(doc["parse_stats"][stage]["time"], 0)
+        self.assertGreaterEqual(doc["parse_stats"]["assimilate"]["time"],
+                                doc["parse_stats"]["vasprun"]["time"])
+
+        drone = VaspDrone(record_parse_stats=False)
+        doc = drone.assimilate(self.Si_static)
+        self.assertNotIn("parse_stats", doc)
+
+
+class NEBDroneTest(unittest.TestCase):
+
+    def setUp(self):
+        # NEB outputs with the OUTCARs of unrelated relaxations, since the
+        # NEB test files only have placeholder OUTCARs
+        test_files = os.path.join(module_dir, "..", "test_files")
+        self.neb_dir = tempfile.mkdtemp()
+        shutil.rmtree(self.neb_dir)
+        shutil.copytree(os.path.join(test_files, "neb_wf", "4", "outputs"), self.neb_dir)
+        self.outcars = []
+        for i, calc in enumerate(["Si_structure_optimization", "Si_static", "Si_nscf_uniform"]):
+            image_dir = os.path.join(self.neb_dir, "{:02}".format(i + 1))
+            os.remove(os.path.join(image_dir, "OUTCAR"))
+            self.outcars.append(os.path.join(test_files, calc, "outputs", "OUTCAR.gz"))
+            shutil.copy(self.outcars[-1], image_dir)
+        self.endpoint_dirs = [os.path.join(test_files, calc, "outputs")
+                              for calc in ["Si_nscf_line", "Si_static"]]
+
+    def tearDown(self):
+        shutil.rmtree(self.neb_dir)
+
+    def test_assimilate(self):
+        doc = NEBDrone(nworkers=1).assimilate(self.neb_dir)
+        self.assertEqual(doc["input"]["nimages"], 3)
+        self.assertEqual(doc["input"]["incar"]["EDIFFG"], -0.02)
+        self.assertEqual(doc["formula_pretty"], "Li2O")
+        self.assertEqual([i["dir_name"] for i in doc["images"]],
+                         ["00", "01", "02", "03", "04"])
+        for outcar, image in zip(self.outcars, doc["images"][1:-1]):
+            o = Outcar(outcar)
+            o.read_neb()
+            self.assertAlmostEqual(image["energy"], o.data["energy"])
+        # no endpoint energies
+        self.assertIsNone(doc["output"]["energies"][0])
+        self.assertIsNone(doc["output"]["forward_barrier"])
+        self.assertIsNone(doc["calcs_reversed"][0]["neb_images"][0])
+        self.assertEqual(len(doc["calcs_reversed"][0]["neb_images"]), 5)
+        r = doc["output"]["r"]
+        self.assertEqual(r[0], 0)
+        self.assertTrue(all(r2 >= r1 for r1, r2 in zip(r, r[1:])))
+
+    def test_endpoints(self):
+        doc = NEBDrone(nworkers=2).assimilate(self.neb_dir, endpoint_dirs=self.endpoint_dirs)
+        energies = doc["output"]["energies"]
+        self.assertNotIn(None, energies)
+        self.assertEqual(doc["output"]["ts_index"], int(np.argmax(energies)))
+        self.assertAlmostEqual(doc["output"]["forward_barrier"], max(energies) - energies[0])
+        self.assertAlmostEqual(doc["output"]["backward_barrier"], max(energies) - energies[-1])
+        self.assertEqual(doc["images"][0]["endpoint_dir"],
+                         os.path.abspath(self.endpoint_dirs[0]))
+        # same results as when parsing in the current process
+        doc_serial = NEBDrone(nworkers=1).assimilate(self.neb_dir,
+                                                     endpoint_dirs=self.endpoint_dirs)
+        self.assertEqual(doc["output"], doc_serial["output"])
+        self.assertEqual(doc["images"], doc_serial["images"])
+
@@ -0,0 +1,73 @@
+import os
+import shutil
+
+from pymatgen.io.vasp import Incar
+
+from atomate.utils.testing import AtomateTest
+from atomate.vasp.duplicates import (
+    INPUT_FINGERPRINT_FILE,
+    get_duplicate_calc,
+    get_duplicate_output_files,
+    get_input_fingerprint,
+    load_input_fingerprint,
+    write_input_fingerprint,
+)
+
+module_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)))
+inputs_dir = os.path.join(
+    module_dir, "..", "test_files", "Si_structure_optimization", "inputs"
+)
+
+
+class TestInputFingerprint(AtomateTest):
+    def setUp(self):
+        super(TestInputFingerprint, self).setUp(lpad=False)
+        for f in os.listdir(inputs_dir):
+            shutil.copy(os.path.join(inputs_dir, f), self.scratch_dir)
+        self.fingerprint = get_input_fingerprint(self.scratch_dir)
+
+    def _update_incar(self, **kwargs):
+        incar = Incar.from_file("INCAR")
+        incar.update(kwargs)
+        incar.write_file("INCAR")
+
+    def test_parallelization(self):
+        self._update_incar(NCORE=4, KPAR=2)
+        self.assertEqual(get_input_fingerprint(self.scratch_dir), self.fingerprint)
+        self._update_incar(ENCUT=600)
+        self.assertNotEqual(get_input_fingerprint(self.scratch_dir), self.fingerprint)
+
+    def test_inputs(self):
+        with open("KPOINTS") as f:
+            kpoints = f.read()
+        os.remove("KPOINTS")
+        self.assertNotEqual(get_input_fingerprint(self.scratch_dir), self.fingerprint)
+        with open("KPOINTS", "w") as f:
+            f.write("another comment" + kpoints[kpoints.index("\n"):])
+        self.assertEqual(get_input_fingerprint(self.scratch_dir), self.fingerprint)
+        with open("POTCAR", "a") as f:
+            f.write("\n")
+        self.assertNotEqual(get_input_fingerprint(self.scratch_dir), self.fingerprint)
+
+    def test_write(self):
+        self.assertIsNone(get_duplicate_calc(self.scratch_dir))
+        write_input_fingerprint(self.fingerprint, self.scratch_dir)
+        self.assertEqual(
+            load_input_fingerprint(self.scratch_dir)["input_fingerprint"],
+            self.fingerprint,
+        )
+        self.assertIsNone(get_duplicate_calc(self.scratch_dir))
+        duplicate_of = {"task_id": 1, "dir_name": inputs_dir}
+        write_input_fingerprint(self.fingerprint, self.scratch_dir, duplicate_of)
+        self.assertEqual(get_duplicate_calc(self.scratch_dir), duplicate_of)
+        self.assertTrue(os.path.exists(INPUT_FINGERPRINT_FILE))
+
+    def test_output_files(self):
+        for f in ["vasprun.xml.relax1.gz", "OUTCAR.relax2.gz", "CHGCAR.gz", "INCAR.orig",
+                  "transformations.json", "custodian.json", "prev_calc_summary.json",
+                  "restart_summary.json", "FW.json", "OUTCARs"]:
+            open(f, "w").close()
+        self.assertEqual(
+            get_duplicate_output_files(self.scratch_dir),
+            ["CHGCAR.gz", "INCAR.orig", "OUTCAR.relax2.gz", "vasprun.xml.relax1.gz"],
+        )
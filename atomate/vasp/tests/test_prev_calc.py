@@ -0,0 +1,103 @@
+import gzip
+import os
+import shutil
+
+from pymatgen.io.vasp import Incar, Kpoints
+
+from pymatgen.io.vasp.sets import MPHSEBSSet, MPNonSCFSet, MPSOCSet, MPStaticSet
+
+from atomate.utils.testing import AtomateTest
+from atomate.vasp.drones import VaspDrone
+from atomate.vasp.prev_calc import (
+    PREV_CALC_SUMMARY_FILE,
+    get_input_set_from_prev_calc,
+    get_restart_files,
+    load_prev_calc_summary,
+    write_prev_calc_summary,
+)
+
+module_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)))
+relax_dir = os.path.join(
+    module_dir, "..", "test_files", "Si_structure_optimization", "outputs"
+)
+
+
+class TestPrevCalcSummary(AtomateTest):
+    @classmethod
+    def setUpClass(cls):
+        cls.task_doc = VaspDrone().assimilate(relax_dir)
+
+    def setUp(self):
+        super(TestPrevCalcSummary, self).setUp(lpad=False)
+        for f in ["vasprun.xml.gz", "OUTCAR.gz"]:
+            shutil.copy(os.path.join(relax_dir, f), self.scratch_dir)
+        write_prev_calc_summary(self.task_doc, self.scratch_dir)
+
+    def _assert_same_input_set(self, input_set_cls, **kwargs):
+        vis = input_set_cls.from_prev_calc(self.scratch_dir, **kwargs)
+        vis_summary = get_input_set_from_prev_calc(
+            input_set_cls, self.scratch_dir, **kwargs
+        )
+        self.assertEqual(vis_summary.incar, vis.incar)
+        self.assertEqual(str(vis_summary.kpoints), str(vis.kpoints))
+        self.assertEqual(vis_summary.structure, vis.structure)
+        self.assertEqual(
+            vis_summary.structure.site_properties, vis.structure.site_properties
+        )
+
+    def test_input_sets(self):
+        summary = load_prev_calc_summary(self.scratch_dir)
+        self.assertEqual(summary["spacegroup"]["number"], 227)
+        self._assert_same_input_set(MPStaticSet, small_gap_multiply=[1e6, 2])
+        self._assert_same_input_set(MPNonSCFSet, mode="uniform")
+        # the eigenvalues needed to set nedos are not summarized
+        self._assert_same_input_set(MPNonSCFSet, mode="uniform", nedos=0)
+        self._assert_same_input_set(MPSOCSet, saxis=(0, 0, 1))
+        self._assert_same_input_set(MPHSEBSSet, mode="uniform")
+
+    def test_decompressed(self):
+        # e.g. copied and unzipped by CopyVaspOutputs
+        for f in ["vasprun.xml.gz", "OUTCAR.gz"]:
+            with gzip.open(f) as f_in, open(f[:-3], "wb") as f_out:
+                shutil.copyfileobj(f_in, f_out)
+            os.remove(f)
+        self.assertIsNotNone(load_prev_calc_summary(self.scratch_dir))
+
+    def test_stale(self):
+        with gzip.open("OUTCAR.gz", "ab") as f:
+            f.write(b"rerun\n")
+        self.assertIsNone(load_prev_calc_summary(self.scratch_dir))
+        os.remove(PREV_CALC_SUMMARY_FILE)
+        self.assertIsNone(load_prev_calc_summary(self.scratch_dir))
+
+    def test_stale_same_size(self):
+        with gzip.open("vasprun.xml.gz") as f:
+            content = bytearray(f.read())
+        os.remove("vasprun.xml.gz")
+        content[len(content) // 2] ^= 1
+        with open("vasprun.xml", "wb") as f:
+            f.write(content)
+        self.assertIsNone(load_prev_calc_summary(self.scratch_dir))
+
+    def test_restart_files(self):
+        summary = load_prev_calc_summary(self.scratch_dir)
+        self.assertGreater(summary["nelectronic_steps"], 0)
+        vis = MPStaticSet.from_prev_calc(self.scratch_dir)
+        structure = vis.structure
+        incar = Incar(summary["incar"])
+        kpoints = Kpoints.from_dict(summary["kpoints"])
+        self.assertEqual(
+            get_restart_files(summary, incar, structure, kpoints),
+            ["WAVECAR", "CHGCAR"],
+        )
+        # the wavefunctions are not read on a different k-point grid
+        self.assertEqual(
+            get_restart_files(summary, incar, structure, Kpoints.gamma_automatic([9, 9, 9])),
+            ["CHGCAR"],
+        )
+        incar["ENCUT"] = incar["ENCUT"] + 100
+        self.assertEqual(get_restart_files(summary, incar, structure, kpoints), [])
+        incar["ENCUT"] = summary["incar"]["ENCUT"]
+        self.assertEqual(
+            get_restart_files(summary, incar, structure * [2, 1, 1], kpoints), []
+        )
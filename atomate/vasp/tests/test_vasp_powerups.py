@@ -1,6 +1,6 @@
 import unittest
 
-from atomate.utils.utils import get_fws_and_tasks
+from atomate.utils.utils import get_fws_and_tasks, get_task_index
 from fireworks import Firework, ScriptTask, Workflow
 
 from atomate.vasp.powerups import (
@@ -18,6 +18,8 @@ from atomate.vasp.powerups import (
     clean_up_files,
     set_queue_options,
     use_potcar_spec,
+    use_duplicate_check,
+    use_restart_files,
 )
 from atomate.vasp.workflows.base.core import get_wf
 
@@ -259,6 +261,60 @@ class TestVaspPowerups(unittest.TestCase):
             task = wf.fws[idx_fw].tasks[idx_t]
             self.assertTrue(task["potcar_spec"])
 
+    def test_get_fws_and_tasks(self):
+        wf = copy_wf(self.bs_wf)
+        index = get_task_index(wf)
+        self.assertIs(get_task_index(wf), index)
+
+        idx_list = get_fws_and_tasks(wf, task_name_constraint="RunVasp")
+        self.assertEqual(len(idx_list), len(wf.fws))
+        # the structure in the task parameters is not matched
+        self.assertEqual(get_fws_and_tasks(wf, task_name_constraint="Si"), [])
+        self.assertEqual(
+            get_fws_and_tasks(
+                wf,
+                fw_name_constraint="structure optimization",
+                task_name_constraint="RunVasp",
+            ),
+            idx_list[:1],
+        )
+
+        wf = remove_custodian(wf)
+        self.assertIsNot(get_task_index(wf), index)
+        self.assertEqual(
+            get_fws_and_tasks(wf, task_name_constraint="RunVaspDirect"), idx_list
+        )
+        self.assertEqual(
+            get_fws_and_tasks(wf, task_name_constraint="RunVaspCustodian"), []
+        )
+
+    def test_use_duplicate_check(self):
+        wf = add_modify_incar(copy_wf(self.bs_wf))
+        wf = use_duplicate_check(wf, link_mode="hardlink")
+        for fw in wf.fws:
+            names = [t.fw_name for t in fw.tasks]
+            idx = names.index("{{atomate.vasp.firetasks.glue_tasks.CheckDuplicateCalc}}")
+            # the fingerprint is computed once the inputs are modified
+            self.assertIn("ModifyIncar", names[idx - 1])
+            self.assertIn("RunVasp", names[idx + 1])
+            self.assertEqual(fw.tasks[idx]["db_file"], ">>db_file<<")
+            self.assertEqual(fw.tasks[idx]["link_mode"], "hardlink")
+
+    def test_use_restart_files(self):
+        wf = use_restart_files(copy_wf(self.bs_wf), restart_files=["CHGCAR"])
+        ntasks = 0
+        for fw in wf.fws:
+            names = [t.fw_name for t in fw.tasks]
+            if "{{atomate.vasp.firetasks.glue_tasks.CopyVaspOutputs}}" not in names:
+                self.assertFalse(any("CopyVaspRestartFiles" in n for n in names))
+                continue
+            idx = names.index("{{atomate.vasp.firetasks.glue_tasks.CopyVaspRestartFiles}}")
+            self.assertIn("RunVasp", names[idx + 1])
+            self.assertEqual(fw.tasks[idx]["restart_files"], ["CHGCAR"])
+            self.assertTrue(fw.tasks[idx]["calc_loc"])
+            ntasks += 1
+        self.assertEqual(ntasks, 3)
+
 
 def copy_wf(wf):
     return Workflow.from_dict(wf.to_dict())
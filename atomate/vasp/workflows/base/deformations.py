@@ -2,7 +2,10 @@
 This module defines the deformation workflow.
 """
 
+import numpy as np
+
 from atomate.utils.utils import get_logger
+from atomate.vasp.analysis.phonopy import get_phonopy_displacements
 from atomate.vasp.fireworks.core import TransmuterFW
 from fireworks import Workflow
 from pymatgen.io.vasp.sets import MPStaticSet
@@ -13,6 +16,17 @@ __email__ = "kmathew@lbl.gov"
 
 logger = get_logger(__name__)
 
+# INCAR settings of the finite displacement calculations: the forces of small
+# displacements (~1e-2 eV/Angstrom) need a tight electronic convergence and
+# accurate forces, i.e. no real-space projection and a fine augmentation grid
+FINITE_DISPLACEMENT_INCAR_SETTINGS = {
+    "ISTART": 0,
+    "EDIFF": 1e-8,
+    "LREAL": False,
+    "ADDGRID": True,
+    "PREC": "Accurate",
+}
+
 
 def get_wf_deformations(
     structure,
@@ -68,3 +82,86 @@ def get_wf_deformations(
     wfname = "{}:{}".format(structure.composition.reduced_formula, name)
 
     return Workflow(fws, name=wfname, metadata=metadata)
+
+
+def get_wf_finite_displacements(
+    structure,
+    deformations,
+    supercell_matrix,
+    displacement=0.01,
+    name="displacement",
+    vasp_input_set=None,
+    vasp_cmd="vasp",
+    db_file=None,
+    tag="",
+    copy_vasp_outputs=True,
+    metadata=None,
+):
+    """
+    Returns a workflow of the finite displacement calculations of the force constants of
+    deformed structures.
+
+    Worfklow consists of: for each deformation, one static calculation per displaced
+    supercell of the symmetry-reduced set generated by phonopy for the deformed cell, since
+    a non-isotropic deformation lowers the symmetry. All the calculations are
+    independent. The fireworks are named "<tag> <name> <deformation index> <displacement
+    index>", see atomate.vasp.analysis.phonopy.get_phonopy_force_constants for the analysis.
+
+    Args:
+        structure (Structure): input structure
+        deformations (list of 3x3 array-likes): list of deformations
+        supercell_matrix (3x3 array-like): scaling matrix of the supercell
+        displacement (float): displacement distance in Angstrom
+        name (str): some appropriate name for the transmuter fireworks.
+        vasp_input_set (DictVaspInputSet): vasp input set for the static calculations of
+            the displaced supercells. Defaults to MPStaticSet with
+            FINITE_DISPLACEMENT_INCAR_SETTINGS.
+        vasp_cmd (str): command to run
+        db_file (str): path to file containing the database credentials.
+        tag (str): some unique string that will be appended to the names of the
+            fireworks so that the data from those tagged fireworks can be queried later
+            during the analysis.
+        copy_vasp_outputs (bool): whether or not copy the outputs from the previous calc
+            (usually structure optimization) before the transmuter fireworks.
+        metadata (dict): meta data
+
+    Returns:
+        Workflow
+    """
+    vasp_input_set = vasp_input_set or MPStaticSet(
+        structure, force_gamma=True, user_incar_settings=FINITE_DISPLACEMENT_INCAR_SETTINGS
+    )
+
+    fws = []
+    for n, deformation in enumerate(deformations):
+        displacements = get_phonopy_displacements(
+            deformation.apply_to_structure(structure), supercell_matrix, displacement
+        )
+        for k, (index, vector) in enumerate(displacements):
+            fw = TransmuterFW(
+                name="{} {} {} {}".format(tag, name, n, k),
+                structure=structure,
+                transformations=[
+                    "DeformStructureTransformation",
+                    "SupercellTransformation",
+                    "TranslateSitesTransformation",
+                ],
+                transformation_params=[
+                    {"deformation": deformation.tolist()},
+                    {"scaling_matrix": np.array(supercell_matrix).tolist()},
+                    {
+                        "indices_to_move": [index],
+                        "translation_vector": vector,
+                        "vector_in_frac_coords": False,
+                    },
+                ],
+                vasp_input_set=vasp_input_set,
+                copy_vasp_outputs=copy_vasp_outputs,
+                vasp_cmd=vasp_cmd,
+                db_file=db_file,
+            )
+            fws.append(fw)
+
+    wfname = "{}:{}".format(structure.composition.reduced_formula, name)
+
+    return Workflow(fws, name=wfname, metadata=metadata)
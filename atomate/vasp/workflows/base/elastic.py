@@ -7,7 +7,8 @@ This module defines the elastic workflow
 import numpy as np
 
 from pymatgen.analysis.elasticity.strain import Deformation, Strain
-from pymatgen.core.tensors import symmetry_reduce
+from pymatgen.core.operations import SymmOp
+from pymatgen.core.tensors import TensorMapping, symmetry_reduce
 from pymatgen.symmetry.analyzer import SpacegroupAnalyzer
 from pymatgen.io.vasp.sets import MPStaticSet
 
@@ -28,8 +29,8 @@ def get_wf_elastic_constant(structure, strain_states=None, stencils=None,
                             db_file=None,
                             conventional=False, order=2, vasp_input_set=None,
                             analysis=True,
-                            sym_reduce=False, tag='elastic',
-                            copy_vasp_outputs=False, **kwargs):
+                            sym_reduce=False, minimal_strains=False,
+                            tag='elastic', copy_vasp_outputs=False, **kwargs):
     """
     Returns a workflow to calculate elastic constants.
 
@@ -62,6 +63,11 @@ def get_wf_elastic_constant(structure, strain_states=None, stencils=None,
         analysis (bool): flag to indicate whether analysis task should be added
             and stresses and strains passed to that task
         sym_reduce (bool): Whether or not to apply symmetry reductions
+        minimal_strains (bool): Whether or not to only deform along the strain
+            states that are not related by the point group of the structure,
+            e. g. 2 of the 6 default second-order strain states for a cubic
+            structure. The stresses of the other strain states are derived
+            from symmetry in the analysis.
         tag (str):
         copy_vasp_outputs (bool): whether or not to copy previous vasp outputs.
         kwargs (keyword arguments): additional kwargs to be passed to get_wf_deformations
@@ -78,7 +84,6 @@ def get_wf_elastic_constant(structure, strain_states=None, stencils=None,
                    "PREC": "High"}
     vis = vasp_input_set or MPStaticSet(structure,
                                         user_incar_settings=uis_elastic)
-    strains = []
     if strain_states is None:
         strain_states = get_default_strain_states(order)
     if stencils is None:
@@ -86,23 +91,47 @@ def get_wf_elastic_constant(structure, strain_states=None, stencils=None,
             strain_states)
     if np.array(stencils).ndim == 1:
         stencils = [stencils] * len(strain_states)
-    for state, stencil in zip(strain_states, stencils):
-        strains.extend(
-            [Strain.from_voigt(s * np.array(state)) for s in stencil])
-
-    # Remove zero strains
-    strains = [strain for strain in strains if not (abs(strain) < 1e-10).all()]
-    vstrains = [strain.voigt for strain in strains]
+    if minimal_strains:
+        state_symmops = get_minimal_strain_states(structure, strain_states)
+    else:
+        state_symmops = {n: [] for n in range(len(strain_states))}
+    strains, strain_symmops = [], []
+    for n, (state, stencil) in enumerate(zip(strain_states, stencils)):
+        if n not in state_symmops:
+            continue
+        for s in stencil:
+            strain = Strain.from_voigt(s * np.array(state))
+            # Remove zero strains
+            if not (abs(strain) < 1e-10).all():
+                strains.append(strain)
+                strain_symmops.append(state_symmops[n])
+
+    # Include the strains derived from symmetry
+    vstrains = [strain.transform(symmop).voigt
+                for strain, symmops in zip(strains, strain_symmops)
+                for symmop in [SymmOp.from_rotation_and_translation()] + symmops]
     if np.linalg.matrix_rank(vstrains) < 6:
         # TODO: check for sufficiency of input for nth order
         raise ValueError("Strain list is insufficient to fit an elastic tensor")
 
     deformations = [s.get_deformation_matrix() for s in strains]
+    if minimal_strains:
+        # Casts deformations to a TensorMapping with the symmops
+        # of their strain state as values
+        deformations = TensorMapping(deformations, strain_symmops)
 
     if sym_reduce:
         # Note this casts deformations to a TensorMapping
         # with unique deformations as keys to symmops
-        deformations = symmetry_reduce(deformations, structure)
+        reduced = symmetry_reduce(list(deformations), structure)
+        if minimal_strains:
+            # The symmops of the strain state of the removed deformations
+            # apply after the symmop of the reduction
+            for defo, symmops in reduced.items():
+                reduced[defo] = symmops + deformations[defo] + [
+                    state_symmop * symmop for symmop in symmops
+                    for state_symmop in deformations[defo.transform(symmop)]]
+        deformations = reduced
 
     wf_elastic = get_wf_deformations(structure, deformations, tag=tag,
                                      db_file=db_file,
@@ -121,7 +150,7 @@ def get_wf_elastic_constant(structure, strain_states=None, stencils=None,
                 'strain': Deformation(defo).green_lagrange_strain.tolist(),
                 'stress': '>>output.ionic_steps.-1.stress',
                 'deformation_matrix': defo}
-            if sym_reduce:
+            if sym_reduce or minimal_strains:
                 pass_dict.update({'symmops': deformations[defo]})
 
             mod_spec_key = "deformation_tasks->{}".format(idx_fw)
@@ -142,6 +171,50 @@ def get_wf_elastic_constant(structure, strain_states=None, stencils=None,
     return wf_elastic
 
 
+def get_minimal_strain_states(structure, strain_states, symprec=0.01,
+                              tol=1e-8):
+    """
+    Reduces a list of strain states to the states that are not related by
+    the point group of the structure, i. e. by the rotations of its Laue class.
+
+    Args:
+        structure (Structure): structure to be deformed
+        strain_states (list of Voigt-notation strains): strain states to be
+            reduced, e. g. from get_default_strain_states
+        symprec (float): symmetry tolerance of the SpacegroupAnalyzer
+        tol (float): tolerance for the equivalence of the strain states
+
+    Returns:
+        dict: indices of the independent strain states as keys, with the
+            symmops (SymmOp) transforming them into the removed strain states
+            as values
+    """
+    sga = SpacegroupAnalyzer(structure, symprec=symprec)
+    # Only the rotations act on the strains
+    rotations = []
+    for symmop in sga.get_symmetry_operations(cartesian=True):
+        if not any(np.allclose(symmop.rotation_matrix, r) for r in rotations):
+            rotations.append(symmop.rotation_matrix)
+    symmops = [SymmOp.from_rotation_and_translation(r) for r in rotations]
+
+    strains = [Strain.from_voigt(state) for state in strain_states]
+    state_symmops = {}
+    removed = set()
+    for n, strain in enumerate(strains):
+        if n in removed:
+            continue
+        state_symmops[n] = []
+        for m in range(n + 1, len(strains)):
+            if m in removed:
+                continue
+            for symmop in symmops:
+                if np.allclose(strain.transform(symmop), strains[m], atol=tol):
+                    state_symmops[n].append(symmop)
+                    removed.add(m)
+                    break
+    return state_symmops
+
+
 def get_default_strain_states(order=2):
     """
     Generates a list of "strain-states"
@@ -14,7 +14,8 @@ from pymatgen.io.vasp.sets import MPStaticSet
 
 from atomate.utils.utils import get_logger
 from atomate.vasp.firetasks.parse_outputs import GibbsAnalysisToDb
-from atomate.vasp.workflows.base.deformations import get_wf_deformations
+from atomate.vasp.workflows.base.deformations import FINITE_DISPLACEMENT_INCAR_SETTINGS, \
+    get_wf_deformations, get_wf_finite_displacements
 
 __author__ = 'Kiran Mathew'
 __email__ = 'kmathew@lbl.gov'
@@ -26,7 +27,9 @@ def get_wf_gibbs_free_energy(structure, deformations, vasp_input_set=None, vasp_
                              db_file=None, user_kpoints_settings=None, t_step=10, t_min=0,
                              t_max=1000, mesh=(20, 20, 20), eos="vinet", qha_type="debye_model",
                              pressure=0.0, poisson=0.25, anharmonic_contribution=False,
-                             metadata=None, tag=None):
+                             metadata=None, tag=None, finite_displacement=False,
+                             supercell_matrix=((2, 0, 0), (0, 2, 0), (0, 0, 2)),
+                             displacement=0.01, user_incar_settings=None):
     """
     Returns quasi-harmonic gibbs free energy workflow.
     Note: phonopy package is required for the final analysis step if qha_type="phonopy"
@@ -54,6 +57,14 @@ def get_wf_gibbs_free_energy(structure, deformations, vasp_input_set=None, vasp_
         metadata (dict): meta data
         tag (str): something unique to identify the tasks in this workflow. If None a random uuid
             will be assigned.
+        finite_displacement (bool): if qha_type="phonopy", compute the force constants from
+            the symmetry-reduced set of displaced supercells of each deformation, run as
+            independent static calculations, instead of a DFPT calculation per deformation.
+        supercell_matrix (3x3 array-like): supercell of the finite displacement calculations
+        displacement (float): displacement distance in Angstrom for finite_displacement
+        user_incar_settings (dict): INCAR settings of the finite displacement calculations,
+            which update FINITE_DISPLACEMENT_INCAR_SETTINGS (tight EDIFF, LREAL = False,
+            ADDGRID, PREC = Accurate)
 
     Returns:
         Workflow
@@ -78,14 +89,34 @@ def get_wf_gibbs_free_energy(structure, deformations, vasp_input_set=None, vasp_
         vis_static = MPStaticSet(structure, force_gamma=True, lepsilon=lepsilon,
                                  user_kpoints_settings=user_kpoints_settings)
 
+    finite_displacement = finite_displacement and qha_type not in ["debye_model"]
+    if finite_displacement and vasp_input_set is None:
+        # the energies of the deformations do not need DFPT
+        vis_static = MPStaticSet(structure, force_gamma=True,
+                                 user_kpoints_settings=user_kpoints_settings)
+
     wf_gibbs = get_wf_deformations(structure, deformations, name="gibbs deformation",
                                    vasp_cmd=vasp_cmd, db_file=db_file, tag=tag, metadata=metadata,
                                    vasp_input_set=vis_static)
 
+    if finite_displacement:
+        incar_settings = dict(FINITE_DISPLACEMENT_INCAR_SETTINGS, **(user_incar_settings or {}))
+        vis_displacement = MPStaticSet(structure, force_gamma=True,
+                                       user_kpoints_settings=user_kpoints_settings,
+                                       user_incar_settings=incar_settings)
+        wf_displacements = get_wf_finite_displacements(
+            structure, deformations, supercell_matrix, displacement=displacement,
+            name="gibbs displacement", vasp_cmd=vasp_cmd, db_file=db_file, tag=tag,
+            vasp_input_set=vis_displacement)
+        wf_gibbs = Workflow(wf_gibbs.fws + wf_displacements.fws, name=wf_gibbs.name,
+                            metadata=wf_gibbs.metadata)
+
     fw_analysis = Firework(GibbsAnalysisToDb(tag=tag, db_file=db_file, t_step=t_step, t_min=t_min,
                                              t_max=t_max, mesh=mesh, eos=eos, qha_type=qha_type,
                                              pressure=pressure, poisson=poisson, metadata=metadata,
-                                             anharmonic_contribution=anharmonic_contribution,),
+                                             anharmonic_contribution=anharmonic_contribution,
+                                             supercell_matrix=supercell_matrix
+                                             if finite_displacement else None),
                            name="Gibbs Free Energy")
 
     wf_gibbs.append_wf(Workflow.from_Firework(fw_analysis), wf_gibbs.leaf_fw_ids)
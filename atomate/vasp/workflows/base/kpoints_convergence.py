@@ -0,0 +1,113 @@
+"""
+This module defines the k-point convergence workflow, which runs static
+calculations at increasing k-point densities until the energy and the stress
+are converged, and records the converged density so that later workflows for
+the same material can reuse it instead of a conservative default.
+"""
+
+from uuid import uuid4
+
+from fireworks import Workflow
+from pymatgen import Structure
+from pymatgen.analysis.structure_matcher import StructureMatcher
+from pymatgen.io.vasp.sets import MPStaticSet
+
+from atomate.utils.utils import get_logger
+from atomate.vasp.config import VASP_CMD, DB_FILE
+from atomate.vasp.database import VaspCalcDb
+from atomate.vasp.firetasks.parse_outputs import CheckKpointsConvergence
+from atomate.vasp.fireworks.core import StaticFW
+
+logger = get_logger(__name__)
+
+DEFAULT_RECIPROCAL_DENSITIES = [50, 100, 150, 200, 300, 400, 600, 800, 1000]
+
+
+def get_wf_kpoints_convergence(
+    structure,
+    reciprocal_densities=None,
+    energy_tol=1e-3,
+    stress_tol=1.0,
+    user_incar_settings=None,
+    vasp_cmd=VASP_CMD,
+    db_file=DB_FILE,
+    tag=None,
+):
+    """
+    Returns the workflow that converges the k-point density of static
+    calculations. Only the calculation at the lowest density is in the
+    workflow: each calculation compares its energy per atom and stress with
+    those at the previous density and adds the calculation at the next density
+    only if they are not converged (see CheckKpointsConvergence). The
+    converged density is inserted in the "kpoints_convergence" collection, see
+    get_converged_reciprocal_density.
+
+    Args:
+        structure (Structure): input structure, usually optimized
+        reciprocal_densities ([int]): k-point densities to try, per inverse
+            Angstrom^3 of reciprocal cell. The densities that give the same
+            k-point grid as a lower one are skipped.
+        energy_tol (float): tolerance on the change of the energy per atom
+            between consecutive densities, in eV/atom
+        stress_tol (float): tolerance on the change of the components of the
+            stress between consecutive densities, in kB
+        user_incar_settings (dict): INCAR settings of MPStaticSet
+        vasp_cmd (str): vasp command to run.
+        db_file (str): path to the db file.
+        tag (str): something unique to identify the tasks in this workflow. If
+            None a random uuid will be assigned.
+
+    Returns:
+        Workflow
+    """
+    tag = tag or "kpoints_convergence group: >>{}<<".format(str(uuid4()))
+    reciprocal_densities = sorted(reciprocal_densities or DEFAULT_RECIPROCAL_DENSITIES)
+    density = reciprocal_densities[0]
+
+    name = "{} kpoints convergence {}".format(tag, density)
+    vis = MPStaticSet(
+        structure,
+        reciprocal_density=density,
+        user_incar_settings=user_incar_settings,
+    )
+    fw = StaticFW(structure, name=name, vasp_input_set=vis, vasp_cmd=vasp_cmd,
+                  db_file=db_file)
+    fw.tasks.append(
+        CheckKpointsConvergence(
+            tag=tag,
+            db_file=db_file,
+            reciprocal_density=density,
+            reciprocal_densities=reciprocal_densities,
+            energy_tol=energy_tol,
+            stress_tol=stress_tol,
+        )
+    )
+
+    formula = structure.composition.reduced_formula
+    return Workflow([fw], name="{}:{}".format(formula, "k-point convergence"))
+
+
+def get_converged_reciprocal_density(structure, db_file):
+    """
+    Get the converged k-point density of a structure from the k-point
+    convergence workflows already run, e.g. to set the reciprocal_density of
+    MPStaticSet or WriteVaspStaticFromPrev.
+
+    Args:
+        structure (Structure): structure
+        db_file (str): path to the db file
+
+    Returns:
+        int: converged reciprocal density of the most recent workflow for a
+            matching structure, None if there is none
+    """
+    mmdb = VaspCalcDb.from_db_file(db_file, admin=True)
+    docs = mmdb.db["kpoints_convergence"].find(
+        {"formula_pretty": structure.composition.reduced_formula, "converged": True},
+        ["structure", "reciprocal_density"],
+    ).sort("created_at", -1)
+    matcher = StructureMatcher()
+    for d in docs:
+        if matcher.fit(structure, Structure.from_dict(d["structure"])):
+            return d["reciprocal_density"]
+    return None
@@ -13,6 +13,7 @@ from atomate.vasp.powerups import (
 from atomate.vasp.workflows.base.core import get_wf
 from atomate.vasp.firetasks.parse_outputs import (
     MagneticDeformationToDb,
+    MagneticOrderingsScreening,
     MagneticOrderingsToDb,
 )
 
@@ -26,7 +27,7 @@ from atomate.vasp.config import VASP_CMD, DB_FILE, ADD_WF_METADATA
 
 from atomate.vasp.workflows.presets.scan import wf_scan_opt
 from uuid import uuid4
-from pymatgen.io.vasp.sets import MPRelaxSet
+from pymatgen.io.vasp.sets import MPRelaxSet, MPStaticSet
 from pymatgen.core import Lattice, Structure
 from pymatgen.analysis.magnetism.analyzer import (
     CollinearMagneticStructureAnalyzer,
@@ -209,7 +210,14 @@ class MagneticOrderingsWF:
         self.input_origin = enumerator.input_origin
 
     def get_wf(
-        self, scan=False, perform_bader=True, num_orderings_hard_limit=16, c=None
+        self,
+        scan=False,
+        perform_bader=True,
+        num_orderings_hard_limit=16,
+        c=None,
+        screening_energy_window=None,
+        screening_reciprocal_density=50,
+        screening_max_orderings=None,
     ):
         """
         Retrieve the FireWorks workflow.
@@ -225,6 +233,17 @@ class MagneticOrderingsWF:
                 magnetic orderings does not exceed this number even if there
                 are extra orderings of equivalent symmetry
             c (dict): additional config dict (as used elsewhere in atomate)
+            screening_energy_window (float): if set, adaptive mode: cheap
+                static calculations of all orderings are run first, and the
+                full calculations are only added for the orderings within
+                this energy window (in eV/atom) of the lowest energy. The
+                common powerups set in c are applied to these full
+                calculations, but powerups applied to the returned workflow
+                do not apply to them.
+            screening_reciprocal_density (int): k-point density of the
+                screening calculations
+            screening_max_orderings (int): maximum number of orderings to
+                calculate fully in adaptive mode
 
         Returns: FireWorks Workflow
 
@@ -299,12 +318,20 @@ class MagneticOrderingsWF:
         user_incar_settings.update(c.get("user_incar_settings", {}))
         c["user_incar_settings"] = user_incar_settings
 
+        if screening_energy_window is not None and scan:
+            raise ValueError("Screening of the orderings is not supported with SCAN.")
+
+        screening_fws = []
+        ordering_wfs = []
+
         for idx, ordered_structure in enumerate(ordered_structures):
 
             analyzer = CollinearMagneticStructureAnalyzer(ordered_structure)
 
             name = " ordering {} {} -".format(idx, analyzer.ordering.value)
 
+            ordering_fws = []
+
             if not scan:
 
                 vis = MPRelaxSet(
@@ -314,7 +341,7 @@ class MagneticOrderingsWF:
                 if not self.static:
 
                     # relax
-                    fws.append(
+                    ordering_fws.append(
                         OptimizeFW(
                             ordered_structure,
                             vasp_input_set=vis,
@@ -327,35 +354,83 @@ class MagneticOrderingsWF:
                     )
 
                 # static
-                fws.append(
+                ordering_fws.append(
                     StaticFW(
                         ordered_structure,
                         vasp_cmd=c["VASP_CMD"],
                         db_file=c["DB_FILE"],
                         name=name + " static",
-                        prev_calc_loc=True,
-                        parents=fws[-1],
+                        prev_calc_loc=not self.static,
+                        parents=ordering_fws[-1] if ordering_fws else None,
                         vasptodb_kwargs={'parse_chgcar': True, 'parse_aeccar': True}
                     )
                 )
-                
+
                 if not self.static:
                     # so a failed optimize doesn't crash workflow
-                    fws[-1].spec["_allow_fizzled_parents"] = True
+                    ordering_fws[-1].spec["_allow_fizzled_parents"] = True
+
+                if screening_energy_window is not None:
+                    screening_vis = MPStaticSet(
+                        ordered_structure,
+                        user_incar_settings=user_incar_settings,
+                        reciprocal_density=screening_reciprocal_density,
+                    )
+                    screening_fws.append(
+                        StaticFW(
+                            ordered_structure,
+                            vasp_input_set=screening_vis,
+                            vasp_cmd=c["VASP_CMD"],
+                            db_file=c["DB_FILE"],
+                            name=name + " screening",
+                            prev_calc_loc=False,
+                        )
+                    )
 
             elif scan:
 
                 # wf_scan_opt is just a single FireWork so can append it directly
-                scan_fws = wf_scan_opt(ordered_structure, c=c).fws
+                ordering_fws = wf_scan_opt(ordered_structure, c=c).fws
                 # change name for consistency with non-SCAN
-                new_name = scan_fws[0].name.replace(
+                new_name = ordering_fws[0].name.replace(
                     "structure optimization", name + " optimize"
                 )
-                scan_fws[0].name = new_name
-                scan_fws[0].tasks[-1]["additional_fields"]["task_label"] = new_name
-                fws += scan_fws
+                ordering_fws[0].name = new_name
+                ordering_fws[0].tasks[-1]["additional_fields"]["task_label"] = new_name
 
-            analysis_parents.append(fws[-1])
+            if screening_energy_window is not None:
+                ordering_wfs.append(Workflow(ordering_fws))
+            else:
+                fws += ordering_fws
+                analysis_parents.append(ordering_fws[-1])
+
+        tag = "magnetic_orderings group: >>{}<<".format(self.uuid)
+
+        if screening_energy_window is not None:
+            # the full calculations are added dynamically, so they need
+            # the same book-keeping and powerups as the rest of the workflow now
+            for wf_idx, ordering_wf in enumerate(ordering_wfs):
+                ordering_wf = add_common_powerups(ordering_wf, c)
+                ordering_wf = add_additional_fields_to_taskdocs(
+                    ordering_wf, {"wf_meta": self.wf_meta}
+                )
+                ordering_wf = add_tags(ordering_wf, [tag, ordered_structure_origins])
+                ordering_wfs[wf_idx] = ordering_wf.as_dict()
+
+            fw_screening = Firework(
+                MagneticOrderingsScreening(
+                    db_file=c["DB_FILE"],
+                    wf_uuid=self.uuid,
+                    energy_window=screening_energy_window,
+                    ordering_wfs=ordering_wfs,
+                    max_orderings=screening_max_orderings,
+                ),
+                name="Magnetic Orderings Screening",
+                parents=screening_fws,
+                spec={"_allow_fizzled_parents": True},
+            )
+            fws += screening_fws + [fw_screening]
+            analysis_parents.append(fw_screening)
 
         fw_analysis = Firework(
             MagneticOrderingsToDb(
@@ -382,7 +457,6 @@ class MagneticOrderingsWF:
 
         wf = add_additional_fields_to_taskdocs(wf, {"wf_meta": self.wf_meta})
 
-        tag = "magnetic_orderings group: >>{}<<".format(self.uuid)
         wf = add_tags(wf, [tag, ordered_structure_origins])
 
         return wf
@@ -59,7 +59,7 @@ def _update_spec(additional_spec):
 
 
 def get_wf_neb_from_structure(structure, user_incar_settings=None, additional_spec=None,
-                              user_kpoints_settings=None, additional_cust_args=None):
+                              user_kpoints_settings=None, additional_cust_args=None, db_file=None):
     """
     Obtain the CI-NEB workflow staring with a parent structure. This works only under the single
     vacancy diffusion mechanism.
@@ -85,6 +85,8 @@ def get_wf_neb_from_structure(structure, user_incar_settings=None, additional_sp
                     Default values depend on the selected VaspInputSet.
         additional_cust_args ([dict]): Optional parameters for RunVaspCustodian, same structure
                     with user_incar_settings and user_kpoints_settings.
+        db_file (str): Path to file specifying db credentials. If set, each NEB is parsed
+                    into the database by NEBToDb.
 
     Returns:
         Workflow
@@ -119,7 +121,7 @@ def get_wf_neb_from_structure(structure, user_incar_settings=None, additional_sp
             fw = NEBFW(spec=spec, neb_label=str(n + 1), from_images=False,
                        user_incar_settings=user_incar_settings[n + 2],
                        user_kpoints_settings=user_kpoints_settings[n + 2],
-                       additional_cust_args=additional_cust_args[n + 2])
+                       additional_cust_args=additional_cust_args[n + 2], db_file=db_file)
             neb_fws.append(fw)
         # Get relax fireworks
         for label in ["ep0", "ep1"]:
@@ -139,7 +141,7 @@ def get_wf_neb_from_structure(structure, user_incar_settings=None, additional_sp
             fw = NEBFW(spec=spec, neb_label=str(n + 1), from_images=False,
                        user_incar_settings=user_incar_settings[n + 2],
                        user_kpoints_settings=user_kpoints_settings[n + 2],
-                       additional_cust_args=additional_cust_args[n + 2])
+                       additional_cust_args=additional_cust_args[n + 2], db_file=db_file)
             neb_fws.append(fw)
         # Get relaxation fireworks.
         rlx_fws.append(NEBRelaxationFW(spec=spec, label="parent",
@@ -169,7 +171,7 @@ def get_wf_neb_from_structure(structure, user_incar_settings=None, additional_sp
 
 
 def get_wf_neb_from_endpoints(parent, endpoints, user_incar_settings=None, additional_spec=None,
-                              user_kpoints_settings=None, additional_cust_args=None):
+                              user_kpoints_settings=None, additional_cust_args=None, db_file=None):
     """
     Get a CI-NEB workflow from given endpoints.
     Workflow: (Endpoints relax -- ) NEB_1 -- NEB_2 - ... - NEB_r
@@ -194,6 +196,8 @@ def get_wf_neb_from_endpoints(parent, endpoints, user_incar_settings=None, addit
                     Default values depend on the selected VaspInputSet.
         additional_cust_args ([dict]): Optional parameters for RunVaspCustodian, same structure
                     with user_incar_settings and user_kpoints_settings.
+        db_file (str): Path to file specifying db credentials. If set, each NEB is parsed
+                    into the database by NEBToDb.
 
     Returns:
         Workflow
@@ -225,7 +229,7 @@ def get_wf_neb_from_endpoints(parent, endpoints, user_incar_settings=None, addit
         fw = NEBFW(spec=spec, neb_label=str(n + 1), from_images=False,
                    user_incar_settings=user_incar_settings[n + 2],
                    user_kpoints_settings=user_kpoints_settings[n + 2],
-                   additional_cust_args=additional_cust_args[n + 2])
+                   additional_cust_args=additional_cust_args[n + 2], db_file=db_file)
         neb_fws.append(fw)
 
     workflow = Workflow(neb_fws, name=wf_name)
@@ -251,7 +255,7 @@ def get_wf_neb_from_endpoints(parent, endpoints, user_incar_settings=None, addit
 
 
 def get_wf_neb_from_images(parent, images, user_incar_settings, additional_spec=None,
-                           user_kpoints_settings=None, additional_cust_args=None):
+                           user_kpoints_settings=None, additional_cust_args=None, db_file=None):
     """
     Get a CI-NEB workflow from given images.
     Workflow: NEB_1 -- NEB_2 - ... - NEB_n
@@ -274,6 +278,8 @@ def get_wf_neb_from_images(parent, images, user_incar_settings, additional_spec=
                     Default values depend on the selected VaspInputSet.
         additional_cust_args ([dict]): Optional parameters for RunVaspCustodian, same structure
                     with user_incar_settings and user_kpoints_settings.
+        db_file (str): Path to file specifying db credentials. If set, each NEB is parsed
+                    into the database by NEBToDb.
 
     Returns:
         Workflow
@@ -300,7 +306,7 @@ def get_wf_neb_from_images(parent, images, user_incar_settings, additional_spec=
         fw = NEBFW(spec=spec, neb_label=str(n + 1), from_images=True,
                    user_incar_settings=user_incar_settings[n + 2],
                    user_kpoints_settings=user_kpoints_settings[n + 2],
-                   additional_cust_args=additional_cust_args[n + 2])
+                   additional_cust_args=additional_cust_args[n + 2], db_file=db_file)
         fws.append(fw)
 
     # Build fireworks link
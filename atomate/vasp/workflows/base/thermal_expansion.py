@@ -14,7 +14,8 @@ from pymatgen.io.vasp.sets import MPStaticSet
 
 from atomate.utils.utils import get_logger
 from atomate.vasp.firetasks.parse_outputs import ThermalExpansionCoeffToDb
-from atomate.vasp.workflows.base.deformations import get_wf_deformations
+from atomate.vasp.workflows.base.deformations import FINITE_DISPLACEMENT_INCAR_SETTINGS, \
+    get_wf_deformations, get_wf_finite_displacements
 
 __author__ = 'Kiran Mathew'
 __email__ = 'kmathew@lbl.gov'
@@ -26,7 +27,9 @@ def get_wf_thermal_expansion(structure, deformations, vasp_input_set=None, vasp_
                              db_file=None, user_kpoints_settings=None, t_step=10, t_min=0,
                              t_max=1000, mesh=(20, 20, 20), eos="vinet", pressure=0.0,
                              copy_vasp_outputs=False,
-                             tag=None):
+                             tag=None, finite_displacement=False,
+                             supercell_matrix=((2, 0, 0), (0, 2, 0), (0, 0, 2)),
+                             displacement=0.01, user_incar_settings=None):
     """
     Returns quasi-harmonic thermal expansion workflow.
     Note: phonopy package is required for the final analysis step.
@@ -50,6 +53,14 @@ def get_wf_thermal_expansion(structure, deformations, vasp_input_set=None, vasp_
         pressure (float): in GPa
         tag (str): something unique to identify the tasks in this workflow. If None a random uuid
             will be assigned.
+        finite_displacement (bool): compute the force constants from the symmetry-reduced set
+            of displaced supercells of each deformation, run as independent static
+            calculations, instead of a DFPT calculation per deformation.
+        supercell_matrix (3x3 array-like): supercell of the finite displacement calculations
+        displacement (float): displacement distance in Angstrom for finite_displacement
+        user_incar_settings (dict): INCAR settings of the finite displacement calculations,
+            which update FINITE_DISPLACEMENT_INCAR_SETTINGS (tight EDIFF, LREAL = False,
+            ADDGRID, PREC = Accurate)
 
     Returns:
         Workflow
@@ -63,16 +74,32 @@ def get_wf_thermal_expansion(structure, deformations, vasp_input_set=None, vasp_
 
     deformations = [Deformation(defo_mat) for defo_mat in deformations]
 
-    vis_static = vasp_input_set or MPStaticSet(structure, force_gamma=True, lepsilon=True,
+    # the energies of the deformations do not need DFPT with finite displacements
+    vis_static = vasp_input_set or MPStaticSet(structure, force_gamma=True,
+                                               lepsilon=not finite_displacement,
                                                user_kpoints_settings=user_kpoints_settings)
     wf_alpha = get_wf_deformations(structure, deformations, name="thermal_expansion deformation",
                                    vasp_cmd=vasp_cmd, db_file=db_file, tag=tag,
                                    copy_vasp_outputs=copy_vasp_outputs,
                                    vasp_input_set=vis_static)
 
+    if finite_displacement:
+        incar_settings = dict(FINITE_DISPLACEMENT_INCAR_SETTINGS, **(user_incar_settings or {}))
+        vis_displacement = MPStaticSet(structure, force_gamma=True,
+                                       user_kpoints_settings=user_kpoints_settings,
+                                       user_incar_settings=incar_settings)
+        wf_displacements = get_wf_finite_displacements(
+            structure, deformations, supercell_matrix, displacement=displacement,
+            name="thermal_expansion displacement", vasp_cmd=vasp_cmd, db_file=db_file, tag=tag,
+            copy_vasp_outputs=copy_vasp_outputs, vasp_input_set=vis_displacement)
+        wf_alpha = Workflow(wf_alpha.fws + wf_displacements.fws, name=wf_alpha.name,
+                            metadata=wf_alpha.metadata)
+
     fw_analysis = Firework(ThermalExpansionCoeffToDb(tag=tag, db_file=db_file, t_step=t_step,
                                                      t_min=t_min, t_max=t_max, mesh=mesh, eos=eos,
-                                                     pressure=pressure),
+                                                     pressure=pressure,
+                                                     supercell_matrix=supercell_matrix
+                                                     if finite_displacement else None),
                            name="Thermal expansion")
 
     wf_alpha.append_wf(Workflow.from_Firework(fw_analysis), wf_alpha.leaf_fw_ids)
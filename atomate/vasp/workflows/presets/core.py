@@ -19,6 +19,7 @@ from atomate.vasp.workflows.base.raman import get_wf_raman_spectra
 from atomate.vasp.workflows.base.gibbs import get_wf_gibbs_free_energy
 from atomate.vasp.workflows.base.bulk_modulus import get_wf_bulk_modulus
 from atomate.vasp.workflows.base.thermal_expansion import get_wf_thermal_expansion
+from atomate.vasp.workflows.base.kpoints_convergence import get_wf_kpoints_convergence
 from atomate.vasp.workflows.base.neb import get_wf_neb_from_endpoints, get_wf_neb_from_structure, \
     get_wf_neb_from_images
 
@@ -260,7 +261,8 @@ def wf_nmr(structure, c=None):
     return wf
 
 
-def wf_elastic_constant(structure, c=None, order=2, sym_reduce=False):
+def wf_elastic_constant(structure, c=None, order=2, sym_reduce=False,
+                        minimal_strains=False):
 
     c = c or {}
     vasp_cmd = c.get("VASP_CMD", VASP_CMD)
@@ -298,7 +300,8 @@ def wf_elastic_constant(structure, c=None, order=2, sym_reduce=False):
     # deformations wflow for elasticity calculation
     wf_elastic = get_wf_elastic_constant(structure, vasp_cmd=vasp_cmd, db_file=db_file,
                                          order=order, stencils=stencils, copy_vasp_outputs=True,
-                                         vasp_input_set=vis_static, sym_reduce=sym_reduce)
+                                         vasp_input_set=vis_static, sym_reduce=sym_reduce,
+                                         minimal_strains=minimal_strains)
     wf.append_wf(wf_elastic, wf.leaf_fw_ids)
 
     wf = add_common_powerups(wf, c)
@@ -308,7 +311,8 @@ def wf_elastic_constant(structure, c=None, order=2, sym_reduce=False):
     return wf
 
 
-def wf_elastic_constant_minimal(structure, c=None, order=2, sym_reduce=True):
+def wf_elastic_constant_minimal(structure, c=None, order=2, sym_reduce=True,
+                                minimal_strains=False):
 
     c = c or {}
     vasp_cmd = c.get("VASP_CMD", VASP_CMD)
@@ -317,7 +321,7 @@ def wf_elastic_constant_minimal(structure, c=None, order=2, sym_reduce=True):
     stencil = np.arange(0.01, 0.01 * order, step=0.01)
     wf = get_wf_elastic_constant(structure, vasp_cmd=vasp_cmd, db_file=db_file,
                                  sym_reduce=sym_reduce, stencils=stencil, order=order,
-                                 copy_vasp_outputs=False)
+                                 minimal_strains=minimal_strains, copy_vasp_outputs=False)
 
     wf = add_common_powerups(wf, c)
     if c.get("ADD_WF_METADATA", ADD_WF_METADATA):
@@ -380,6 +384,9 @@ def wf_gibbs_free_energy(structure, c=None):
     poisson = c.get("POISSON", 0.25)
     anharmonic_contribution = c.get("ANHARMONIC_CONTRIBUTION", False)
     metadata = c.get("METADATA", None)
+    # force constants from finite displacements instead of DFPT with qha_type="phonopy"
+    finite_displacement = c.get("FINITE_DISPLACEMENT", False)
+    supercell_matrix = c.get("SUPERCELL_MATRIX", [[2, 0, 0], [0, 2, 0], [0, 0, 2]])
 
     # 21 deformed structures: from -10% to +10%
     defos = [(np.identity(3) * (1 + x)).tolist() for x in np.linspace(-0.1, 0.1, 21)]
@@ -408,7 +415,7 @@ def wf_gibbs_free_energy(structure, c=None):
 
     lepsilon = False
     if qha_type not in ["debye_model"]:
-        lepsilon = True
+        lepsilon = not finite_displacement
         try:
             from phonopy import Phonopy
         except ImportError:
@@ -424,7 +431,9 @@ def wf_gibbs_free_energy(structure, c=None):
                                         eos=eos, qha_type=qha_type, pressure=pressure, poisson=poisson,
                                         t_min=t_min, t_max=t_max, t_step=t_step, metadata=metadata,
                                         anharmonic_contribution=anharmonic_contribution,
-                                        tag=tag, vasp_input_set=vis_static)
+                                        tag=tag, vasp_input_set=vis_static,
+                                        finite_displacement=finite_displacement,
+                                        supercell_matrix=supercell_matrix)
 
     # chaining
     wf.append_wf(wf_gibbs, wf.leaf_fw_ids)
@@ -505,6 +514,37 @@ def wf_bulk_modulus(structure, c=None):
     return wf
 
 
+def wf_kpoints_convergence(structure, c=None):
+    """
+    k-point convergence workflow from the given structure and config dict.
+
+    Args:
+        structure (Structure): input structure
+        c (dict): workflow config dict
+
+    Returns:
+        Workflow
+    """
+
+    c = c or {}
+    vasp_cmd = c.get("VASP_CMD", VASP_CMD)
+    db_file = c.get("DB_FILE", DB_FILE)
+
+    wf = get_wf_kpoints_convergence(structure,
+                                    reciprocal_densities=c.get("RECIPROCAL_DENSITIES"),
+                                    energy_tol=c.get("ENERGY_TOL", 1e-3),
+                                    stress_tol=c.get("STRESS_TOL", 1.0),
+                                    user_incar_settings=c.get("USER_INCAR_SETTINGS"),
+                                    vasp_cmd=vasp_cmd, db_file=db_file)
+
+    wf = add_common_powerups(wf, c)
+
+    if c.get("ADD_WF_METADATA", ADD_WF_METADATA):
+        wf = add_wf_metadata(wf, structure)
+
+    return wf
+
+
 def wf_thermal_expansion(structure, c=None):
     """
     Thermal expansion coefficient workflow from the given structure and config dict.
@@ -521,6 +561,9 @@ def wf_thermal_expansion(structure, c=None):
     vasp_cmd = c.get("VASP_CMD", VASP_CMD)
     db_file = c.get("DB_FILE", DB_FILE)
     pressure = c.get("PRESSURE", 0.0)
+    # force constants from finite displacements instead of DFPT
+    finite_displacement = c.get("FINITE_DISPLACEMENT", False)
+    supercell_matrix = c.get("SUPERCELL_MATRIX", [[2, 0, 0], [0, 2, 0], [0, 0, 2]])
 
     user_kpoints_settings = {"grid_density": 7000}
     # 10 deformations
@@ -543,7 +586,9 @@ def wf_thermal_expansion(structure, c=None):
     wf_thermal = get_wf_thermal_expansion(structure, user_kpoints_settings=user_kpoints_settings,
                                           deformations=deformations, vasp_cmd=vasp_cmd, db_file=db_file,
                                           copy_vasp_outputs=True,
-                                          eos=eos, pressure=pressure, tag=tag)
+                                          eos=eos, pressure=pressure, tag=tag,
+                                          finite_displacement=finite_displacement,
+                                          supercell_matrix=supercell_matrix)
 
     # chain it
     wf.append_wf(wf_thermal, wf.leaf_fw_ids)
@@ -583,7 +628,7 @@ def wf_nudged_elastic_band(structures, parent, c=None):
             {"fireworks": [],  "common_params": {}, "additional_ep_params": {},
              "additional_neb_params": {}}. When the length of structures is 1, "site_indices" key
              must be included in c. Note that "fireworks" is a list corresponding to the order of
-             execution.
+             execution. If "DB_FILE" is set, the NEB calculations are parsed into the database.
     Returns:
         Workflow
     """
@@ -642,7 +687,8 @@ def wf_nudged_elastic_band(structures, parent, c=None):
 
     kwargs = {"user_incar_settings": user_incar_settings,
               "user_kpoints_settings": user_kpoints_settings,
-              "additional_cust_args": additional_cust_args}
+              "additional_cust_args": additional_cust_args,
+              "db_file": c.get("DB_FILE")}
 
     # Assign workflow using the number of given structures
     if len(structures) == 1:
@@ -55,6 +55,12 @@ class TestElasticWorkflow(AtomateTest):
         self.base_wf = add_modify_incar(self.base_wf, ec_incar_update)
         self.base_wf_noopt = add_modify_incar(self.base_wf_noopt, ec_incar_update)
 
+        # Only the independent strain states of cubic Si
+        self.minimal_strains_wf = get_wf_elastic_constant(
+            self.opt_struct, stencils=[[0.01]]*3 + [[0.03]]*3, copy_vasp_outputs=False,
+            minimal_strains=True, db_file='>>db_file<<')
+        self.minimal_strains_wf = add_modify_incar(self.minimal_strains_wf, ec_incar_update)
+
         # Full preset WF
         self.preset_wf = wf_elastic_constant(self.struct_si)
 
@@ -176,6 +182,21 @@ class TestElasticWorkflow(AtomateTest):
         wf = self.lp.get_wf_by_fw_id(1)
         self.assertTrue(all([s == 'COMPLETED' for s in wf.fw_states.values()]))
 
+    def test_minimal_strains(self):
+        self.assertEqual(len(self.minimal_strains_wf.fws), 3)
+        self.assertEqual(len(wf_elastic_constant(self.struct_si, minimal_strains=True).fws), 10)
+        self.assertEqual(len(wf_elastic_constant_minimal(
+            self.struct_si, order=3, minimal_strains=True).fws), 13)
+
+        self.minimal_strains_wf = self._simulate_vasprun(self.minimal_strains_wf)
+        self.lp.add_wf(self.minimal_strains_wf)
+        rapidfire(self.lp, fworker=FWorker(env={"db_file": os.path.join(db_dir, "db.json")}))
+
+        # same tensor as the fit of the 6 strain states of base_wf_noopt
+        d = self.get_task_collection(coll_name="elasticity").find_one({'order': 2})
+        self.assertEqual(len(d['fitting_data']['strains']), 6)
+        self._check_run(d, mode="elastic analysis")
+
 
 if __name__ == "__main__":
     unittest.main()
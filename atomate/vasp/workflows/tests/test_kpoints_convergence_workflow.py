@@ -0,0 +1,96 @@
+# coding: utf-8
+
+import os
+import unittest
+
+from pymatgen.io.vasp import Kpoints
+from pymatgen.util.testing import PymatgenTest
+
+from atomate.utils.testing import AtomateTest
+from atomate.vasp.powerups import use_shared_objects
+from atomate.vasp.firetasks.parse_outputs import CheckKpointsConvergence
+from atomate.vasp.workflows.base.kpoints_convergence import get_wf_kpoints_convergence, \
+    get_converged_reciprocal_density
+
+module_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)))
+db_dir = os.path.join(module_dir, "..", "..", "..", "common", "test_files")
+
+
+class TestKpointsConvergenceWorkflow(AtomateTest):
+
+    def setUp(self):
+        super(TestKpointsConvergenceWorkflow, self).setUp()
+        self.struct_si = PymatgenTest.get_structure("Si")
+        self.db_file = os.path.join(db_dir, "db.json")
+        self.tag = "kpoints_convergence group: >>test<<"
+        self.wf = get_wf_kpoints_convergence(self.struct_si, reciprocal_densities=[50, 55, 200],
+                                             db_file=self.db_file, tag=self.tag)
+
+    def _insert_task(self, density, energy_per_atom, stress):
+        kpts = Kpoints.automatic_density_by_vol(self.struct_si, density).kpts
+        self.get_task_collection().insert_one({
+            "task_id": density,
+            "task_label": "{} kpoints convergence {}".format(self.tag, density),
+            "state": "successful",
+            "formula_pretty": "Si",
+            "output": {"energy_per_atom": energy_per_atom, "stress": stress,
+                       "structure": self.struct_si.as_dict()},
+            "calcs_reversed": [{"input": {"kpoints": {"kpoints": [list(k) for k in kpts]}}}],
+        })
+
+    def _run_check(self, fw_spec):
+        task = [t for t in fw_spec["_tasks"] if "CheckKpointsConvergence" in t["_fw_name"]][0]
+        return CheckKpointsConvergence.from_dict(task).run_task(fw_spec)
+
+    def test_wf(self):
+        self.assertEqual(len(self.wf.fws), 1)
+        fw = self.wf.fws[0]
+        self.assertEqual(fw.name, "Si-{} kpoints convergence 50".format(self.tag))
+        self.assertEqual(fw.tasks[0]["vasp_input_set"].reciprocal_density, 50)
+        self.assertEqual(fw.tasks[-1]["reciprocal_density"], 50)
+
+    def test_convergence(self):
+        zero_stress = [[0, 0, 0]] * 3
+        self._insert_task(50, -5.0, zero_stress)
+        fw_spec = self.wf.fws[0].to_dict()["spec"]
+        action = self._run_check(fw_spec)
+
+        # the density of 55 gives the same grid as 50
+        self.assertEqual(len(action.additions), 1)
+        next_fw = action.additions[0].fws[0]
+        self.assertEqual(next_fw.name, "Si-{} kpoints convergence 200".format(self.tag))
+        self.assertEqual(next_fw.tasks[0]["vasp_input_set"].reciprocal_density, 200)
+        self.assertEqual(next_fw.tasks[-2]["additional_fields"]["task_label"],
+                         "{} kpoints convergence 200".format(self.tag))
+        self.assertEqual(next_fw.tasks[-1]["reciprocal_density"], 200)
+
+        self._insert_task(200, -5.0005, zero_stress)
+        action = self._run_check(next_fw.to_dict()["spec"])
+        self.assertFalse(action.additions)
+        self.assertTrue(action.stored_data["converged"])
+        self.assertEqual(action.stored_data["reciprocal_density"], 50)
+        self.assertEqual(get_converged_reciprocal_density(self.struct_si, self.db_file), 50)
+
+    def test_shared_objects(self):
+        wf = use_shared_objects(self.wf, self.db_file, ref_db_file=self.db_file)
+        fw_spec = wf.fws[0].to_dict()["spec"]
+        self.assertIn("shared_object", fw_spec["_tasks"][0]["vasp_input_set"])
+        self._insert_task(50, -5.0, [[0, 0, 0]] * 3)
+        action = self._run_check(fw_spec)
+        next_fw = action.additions[0].fws[0]
+        self.assertEqual(next_fw.tasks[0]["vasp_input_set"].reciprocal_density, 200)
+
+    def test_not_converged(self):
+        self._insert_task(50, -5.0, [[0, 0, 0]] * 3)
+        self._insert_task(200, -5.0, [[5, 0, 0], [0, 5, 0], [0, 0, 5]])
+        fw_spec = self.wf.fws[0].to_dict()["spec"]
+        task = [t for t in fw_spec["_tasks"] if "CheckKpointsConvergence" in t["_fw_name"]][0]
+        task["reciprocal_density"] = 200
+        action = CheckKpointsConvergence.from_dict(task).run_task(fw_spec)
+        self.assertFalse(action.additions)
+        self.assertFalse(action.stored_data["converged"])
+        self.assertIsNone(get_converged_reciprocal_density(self.struct_si, self.db_file))
+
+
+if __name__ == "__main__":
+    unittest.main()
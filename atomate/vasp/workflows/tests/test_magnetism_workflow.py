@@ -6,9 +6,12 @@ import unittest
 
 from monty.os.path import which
 
+from fireworks import Firework, Workflow
+
 from atomate.vasp.workflows.base.magnetism import MagneticOrderingsWF
 from atomate.vasp.firetasks.parse_outputs import (
     MagneticDeformationToDb,
+    MagneticOrderingsScreening,
     MagneticOrderingsToDb,
 )
 from atomate.utils.testing import AtomateTest, DB_DIR
@@ -92,6 +95,49 @@ class TestMagneticOrderingsWorkflow(AtomateTest):
         self.assertEqual(stable_ordering['input']['index'], 2)
         self.assertAlmostEqual(stable_ordering['magmoms']['vasp'][0], -2.738)
 
+    def test_screening(self):
+
+        # use the static calculations as screening calculations
+        tasks = self.get_task_collection()
+        with open(os.path.join(ref_dir, "ordering/sample_tasks.json"), "r") as f:
+            sample_tasks = load(f)
+        for task in sample_tasks:
+            task["task_label"] = task["task_label"].replace("static", "screening")
+        wf_uuid = sample_tasks[0]["wf_meta"]["wf_uuid"]
+        tasks.insert_many(sample_tasks)
+
+        ordering_wfs = [Workflow([Firework([], name="ordering {}".format(i))]).as_dict()
+                        for i in range(6)]
+        screening = MagneticOrderingsScreening(
+            db_file=os.path.join(DB_DIR, "db.json"), wf_uuid=wf_uuid,
+            energy_window=0.001, ordering_wfs=ordering_wfs
+        )
+        action = screening.run_task({})
+        self.assertEqual(action.stored_data["selected_orderings"], [2, 4, 5])
+        self.assertEqual([wf.fws[0].name for wf in action.detours],
+                         ["ordering 2", "ordering 4", "ordering 5"])
+        self.assertEqual(len(action.stored_data["screening_energies"]), 6)
+
+        screening["max_orderings"] = 2
+        action = screening.run_task({})
+        self.assertEqual(action.stored_data["selected_orderings"], [2, 5])
+
+    @unittest.skipIf(not enumlib_present, "enumlib not present")
+    def test_screening_powerups(self):
+
+        structure = Structure.from_file(os.path.join(ref_dir, "ordering/LaMnO3.json"))
+        wf = MagneticOrderingsWF(structure).get_wf(
+            c={"ADD_MODIFY_INCAR": True}, screening_energy_window=0.01
+        )
+        fw_screening = [fw for fw in wf.fws if fw.name == "Magnetic Orderings Screening"][0]
+
+        # the full calculations, only added at runtime, get the common powerups
+        for ordering_wf in fw_screening.tasks[0]["ordering_wfs"]:
+            ordering_wf = Workflow.from_dict(ordering_wf)
+            for fw in ordering_wf.fws:
+                fw_names = [t["_fw_name"] for t in fw.tasks]
+                self.assertIn("{{atomate.vasp.firetasks.write_inputs.ModifyIncar}}", fw_names)
+
 
 class TestMagneticDeformationWorkflow(AtomateTest):
     def test_analysis(self):
@@ -95,6 +95,20 @@ class TestNudgedElasticBandWorkflow(AtomateTest):
 
         # Workflow without the config file
         self.wf_6 = wf_nudged_elastic_band(self.structures, parent)
+        self.parent = parent
+
+    def test_db_file(self):
+        self.assertFalse(any("NEBToDb" in t._fw_name for t in self.wf_5.fws[0].tasks))
+        config = copy.deepcopy(self.config_5)
+        config["DB_FILE"] = str(db_dir / "db.json")
+        wf = wf_nudged_elastic_band(self.structures, self.parent, config)
+        for fw in wf.fws:
+            names = [t._fw_name for t in fw.tasks]
+            neb_to_db = [i for i, n in enumerate(names) if "NEBToDb" in n]
+            transfer = [i for i, n in enumerate(names) if "TransferNEBTask" in n]
+            # parsed before the outputs are moved
+            self.assertEqual(len(neb_to_db), 1)
+            self.assertLess(neb_to_db[0], transfer[0])
 
     def test_wf(self):
         wf_1 = get_simulated_wf(self.wf_1)
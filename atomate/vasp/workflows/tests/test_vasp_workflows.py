@@ -18,7 +18,8 @@ from pymongo import DESCENDING
 from fireworks import FWorker
 from fireworks.core.rocket_launcher import rapidfire
 
-from atomate.vasp.powerups import use_custodian, add_namefile, use_fake_vasp, add_trackers, add_bandgap_check, use_potcar_spec
+from atomate.vasp.powerups import use_custodian, add_namefile, use_fake_vasp, add_trackers, add_bandgap_check, \
+    use_potcar_spec, use_duplicate_check
 from atomate.vasp.workflows.base.core import get_wf
 from atomate.utils.testing import AtomateTest
 from atomate.vasp.firetasks.parse_outputs import VaspDrone
@@ -182,6 +183,32 @@ class TestVaspWorkflows(AtomateTest):
         wf = self.lp.get_wf_by_fw_id(1)
         self.assertTrue(all([s == 'COMPLETED' for s in wf.fw_states.values()]))
 
+    def test_duplicate_check(self):
+        structure = self.struct_si
+        for i in range(2):
+            my_wf = get_wf(structure, "optimize_only.yaml",
+                           vis=MPRelaxSet(structure, force_gamma=True),
+                           common_params={"vasp_cmd": VASP_CMD, "db_file": ">>db_file<<"})
+            if not VASP_CMD:
+                my_wf = use_fake_vasp(my_wf, ref_dirs_si)
+            else:
+                my_wf = use_custodian(my_wf)
+            my_wf = use_duplicate_check(my_wf)
+            self.lp.add_wf(my_wf)
+            rapidfire(self.lp, fworker=_fworker)
+
+        docs = list(self.get_task_collection().find().sort("task_id"))
+        self.assertEqual(len(docs), 2)
+        self.assertEqual(docs[0]["input_fingerprint"], docs[1]["input_fingerprint"])
+        self.assertNotIn("duplicate_of", docs[0])
+        self.assertEqual(docs[1]["duplicate_of"], docs[0]["task_id"])
+        self._check_run(docs[1], mode="structure optimization")
+
+        # VASP was not run for the second workflow
+        fw = self.lp.get_fw_by_id(max(self.lp.get_fw_ids()))
+        stored_data = fw.launches[-1].action.stored_data
+        self.assertEqual(stored_data["duplicate_of"]["task_id"], docs[0]["task_id"])
+
     def test_bandstructure_Vasp(self):
         # add the workflow
         structure = self.struct_si
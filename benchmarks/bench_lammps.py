@@ -0,0 +1,87 @@
+"""
+Benchmarks of the parsing and insertion of LAMMPS calculations.
+"""
+
+import os
+
+from atomate.lammps import drones
+from atomate.lammps.database import LammpsCalcDb
+from atomate.lammps.utils import get_dump_summary
+
+from .common import LAMMPS_TEST_FILES, get_doc_size, get_gridfs_sizes, get_local_db
+
+DUMP_FILE = os.path.join(LAMMPS_TEST_FILES, "peo.dump")
+
+
+class LammpsDroneSuite:
+    """
+    LammpsDrone.assimilate
+    """
+
+    timeout = 600
+
+    def setup(self):
+        # the drone uses the LAMMPS input sets and outputs removed from
+        # pymatgen v2018.5.22, skip until it is ported
+        if not hasattr(drones, "LammpsInputSet"):
+            raise NotImplementedError("LammpsDrone needs pymatgen.io.lammps.sets")
+        self.drone = drones.LammpsDrone()
+
+    def assimilate(self):
+        return self.drone.assimilate(
+            LAMMPS_TEST_FILES,
+            input_filename="peo.in",
+            log_filename="peo.log",
+            data_filename="peo.data",
+            dump_files=["peo.dump"],
+        )
+
+    def time_assimilate(self):
+        self.assimilate()
+
+    def peakmem_assimilate(self):
+        self.assimilate()
+
+    def track_doc_size(self):
+        return get_doc_size(self.assimilate())
+
+    track_doc_size.unit = "bytes"
+
+
+class LammpsDumpSummarySuite:
+    """
+    Summary of the dump files computed by LammpsDrone.assimilate.
+    """
+
+    def time_get_dump_summary(self):
+        get_dump_summary(DUMP_FILE)
+
+    def peakmem_get_dump_summary(self):
+        get_dump_summary(DUMP_FILE)
+
+
+class LammpsInsertDumpSuite:
+    """
+    Insertion of the dump files in GridFS by LammpsCalcDb.insert_task.
+    """
+
+    params = [1, 100]
+    param_names = ["chunk_size"]
+
+    def setup(self, chunk_size):
+        self.db = get_local_db(LammpsCalcDb, collection="tasks")
+
+    def teardown(self, chunk_size):
+        self.db.reset()
+
+    def time_insert_dump(self, chunk_size):
+        self.db.insert_dump(DUMP_FILE, chunk_size=chunk_size)
+
+    def peakmem_insert_dump(self, chunk_size):
+        self.db.insert_dump(DUMP_FILE, chunk_size=chunk_size)
+
+    def track_blob_size(self, chunk_size):
+        self.db.insert_dump(DUMP_FILE, chunk_size=chunk_size)
+        return get_gridfs_sizes(self.db.db)["dumps_fs"]
+
+    track_blob_size.unit = "bytes"
@@ -0,0 +1,83 @@
+"""
+Benchmarks of the parsing and insertion of Q-Chem calculations, i.e. of what
+QChemToDb runs at the end of every Q-Chem Firework.
+"""
+
+import os
+
+from atomate.qchem.database import QChemCalcDb
+from atomate.qchem.drones import QChemDrone
+
+from .common import QCHEM_TEST_FILES, cached_doc, get_doc_size, get_local_db
+
+# test calculations and the arguments of QChemDrone.assimilate used to parse
+# them
+CALCS = {
+    "FF_working": {
+        "input_file": "test.qin.opt_1",
+        "output_file": "test.qout.opt_1",
+        "multirun": False,
+    },
+    "launcher_bad_FF": {
+        "input_file": "mol.qin",
+        "output_file": "mol.qout",
+        "multirun": False,
+    },
+    "julian_nt": {
+        "input_file": "julian.qin",
+        "output_file": "julian.qout",
+        "multirun": True,
+    },
+}
+
+
+def assimilate(calc):
+    return QChemDrone().assimilate(os.path.join(QCHEM_TEST_FILES, calc), **CALCS[calc])
+
+
+@cached_doc
+def get_task_doc(calc):
+    return assimilate(calc)
+
+
+class QChemDroneSuite:
+    """
+    QChemDrone.assimilate
+    """
+
+    params = list(CALCS)
+    param_names = ["calc"]
+    timeout = 600
+
+    def time_assimilate(self, calc):
+        assimilate(calc)
+
+    def peakmem_assimilate(self, calc):
+        assimilate(calc)
+
+    def track_doc_size(self, calc):
+        return get_doc_size(get_task_doc(calc))
+
+    track_doc_size.unit = "bytes"
+
+
+class QChemInsertSuite:
+    """
+    QChemCalcDb.insert into a local mongomock database.
+    """
+
+    params = list(CALCS)
+    param_names = ["calc"]
+    number = 1
+    repeat = 10
+    warmup_time = 0
+
+    def setup(self, calc):
+        self.db = get_local_db(QChemCalcDb, collection="tasks")
+        self.task_doc = get_task_doc(calc)
+
+    def teardown(self, calc):
+        self.db.reset()
+
+    def time_insert(self, calc):
+        self.db.insert(self.task_doc)
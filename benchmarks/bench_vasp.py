@@ -0,0 +1,100 @@
+"""
+Benchmarks of the parsing and insertion of VASP calculations, i.e. of what
+VaspToDb runs at the end of every VASP Firework.
+"""
+
+import os
+
+from atomate.vasp.database import VaspCalcDb
+from atomate.vasp.drones import VaspDrone
+
+from .common import (
+    VASP_TEST_FILES,
+    cached_doc,
+    get_doc_size,
+    get_gridfs_sizes,
+    get_local_db,
+)
+
+# test calculations and the arguments of the VaspDrone used to parse them
+CALCS = {
+    "Si_structure_optimization": {},
+    "Si_structure_optimization_relax2": {"runs": ["relax1", "relax2"]},
+    "Si_static": {"parse_chgcar": True},
+    "Si_nscf_uniform": {"bandstructure_mode": "uniform"},
+    "Si_nscf_line": {"bandstructure_mode": "line"},
+}
+
+
+def get_calc_dir(calc):
+    return os.path.join(VASP_TEST_FILES, calc, "outputs")
+
+
+@cached_doc
+def get_task_doc(calc):
+    return VaspDrone(**CALCS[calc]).assimilate(get_calc_dir(calc))
+
+
+class VaspDroneSuite:
+    """
+    VaspDrone.assimilate
+    """
+
+    params = list(CALCS)
+    param_names = ["calc"]
+    timeout = 600
+
+    def setup(self, calc):
+        self.drone = VaspDrone(**CALCS[calc])
+        self.calc_dir = get_calc_dir(calc)
+
+    def time_assimilate(self, calc):
+        self.drone.assimilate(self.calc_dir)
+
+    def peakmem_assimilate(self, calc):
+        self.drone.assimilate(self.calc_dir)
+
+    def track_doc_size(self, calc):
+        return get_doc_size(get_task_doc(calc))
+
+    track_doc_size.unit = "bytes"
+
+
+class VaspInsertTaskSuite:
+    """
+    VaspCalcDb.insert_task, with the large objects (DOS, band structure,
+    CHGCAR) stored in GridFS, into a local mongomock database.
+    """
+
+    params = list(CALCS)
+    param_names = ["calc"]
+    timeout = 600
+    # insert_task modifies the task document: get a new one before each call
+    number = 1
+    repeat = 10
+    warmup_time = 0
+
+    def setup(self, calc):
+        self.db = get_local_db(VaspCalcDb, collection="tasks")
+        self.task_doc = get_task_doc(calc)
+
+    def teardown(self, calc):
+        self.db.reset()
+
+    def time_insert_task(self, calc):
+        self.db.insert_task(self.task_doc, use_gridfs=True)
+
+    def peakmem_insert_task(self, calc):
+        self.db.insert_task(self.task_doc, use_gridfs=True)
+
+    def track_stored_doc_size(self, calc):
+        t_id = self.db.insert_task(self.task_doc, use_gridfs=True)
+        return get_doc_size(self.db.collection.find_one({"task_id": t_id}))
+
+    track_stored_doc_size.unit = "bytes"
+
+    def track_blob_size(self, calc):
+        self.db.insert_task(self.task_doc, use_gridfs=True)
+        return sum(get_gridfs_sizes(self.db.db).values())
+
+    track_blob_size.unit = "bytes"
@@ -0,0 +1,88 @@
+"""
+Shared helpers of the benchmarks: locations of the test files and a local
+stand-in for the task database, so that the benchmarks run offline.
+"""
+
+import copy
+import os
+from functools import lru_cache, partial
+from unittest import mock
+
+import bson
+import mongomock
+import mongomock.gridfs
+from monty.json import jsanitize
+from mongomock.store import ServerStore
+
+ATOMATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "atomate")
+VASP_TEST_FILES = os.path.join(ATOMATE_DIR, "vasp", "test_files")
+QCHEM_TEST_FILES = os.path.join(ATOMATE_DIR, "qchem", "test_files")
+LAMMPS_TEST_FILES = os.path.join(ATOMATE_DIR, "lammps", "tests", "test_files")
+
+mongomock.gridfs.enable_gridfs_integration()
+
+
+def get_local_db(db_cls, **kwargs):
+    """
+    Connect a CalcDb to a new in-process mongomock database, reset to
+    initialize the task_id counter and the indexes.
+
+    Args:
+        db_cls: CalcDb subclass, e.g. VaspCalcDb
+        kwargs: other arguments of db_cls
+
+    Returns:
+        the CalcDb
+    """
+    client_cls = partial(mongomock.MongoClient, _store=ServerStore())
+    with mock.patch("atomate.utils.database.MongoClient", client_cls):
+        db = db_cls(host="localhost", port=27017, database="benchmarks", **kwargs)
+    db.reset()
+    return db
+
+
+def get_doc_size(doc):
+    """
+    Size of a document once encoded as BSON, i.e. what counts toward the
+    16 MB limit of MongoDB.
+
+    Args:
+        doc (dict): the document
+
+    Returns:
+        int: size in bytes
+    """
+    return len(bson.BSON.encode(jsanitize(doc, allow_bson=True)))
+
+
+def get_gridfs_sizes(db):
+    """
+    Total size of the files stored in each GridFS collection of a database.
+
+    Args:
+        db: pymongo (or mongomock) database
+
+    Returns:
+        dict: size in bytes of each GridFS collection, e.g. {"dos_fs": 1234}
+    """
+    sizes = {}
+    for name in db.list_collection_names():
+        if name.endswith(".files"):
+            sizes[name[: -len(".files")]] = sum(
+                f["length"] for f in db[name].find({}, ["length"])
+            )
+    return sizes
+
+
+def cached_doc(func):
+    """
+    Cache the documents returned by func, e.g. to parse the outputs of a
+    calculation once when benchmarking its insertion. The cached documents
+    are deep-copied since inserting them modifies them.
+    """
+    cached = lru_cache(maxsize=None)(func)
+
+    def wrapper(*args):
+        return copy.deepcopy(cached(*args))
+
+    return wrapper
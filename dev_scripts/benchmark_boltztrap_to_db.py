@@ -0,0 +1,83 @@
+"""
+Benchmark the parsing steps of BoltztrapToDb on a band structure run with a
+"boltztrap" sub-directory (e.g. the BoltzTraP test files of pymatgen),
+comparing the summary written by VaspToDb with the former parsing of the
+vasprun.xml/OUTCAR files, and the DOS encoded once or twice, e.g.:
+
+    python benchmark_boltztrap_to_db.py path/to/bandstructure_dir
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+import zlib
+
+from monty.json import MontyEncoder
+from pymatgen.electronic_structure.boltztrap import BoltztrapAnalyzer
+from pymatgen.io.vasp.sets import get_vasprun_outcar
+from pymatgen.symmetry.analyzer import SpacegroupAnalyzer
+
+from atomate.vasp.drones import VaspDrone
+from atomate.vasp.prev_calc import (
+    get_prev_calc_files,
+    load_prev_calc_summary,
+    write_prev_calc_summary,
+)
+
+
+def get_structure_parsed(path):
+    v, o = get_vasprun_outcar(path, parse_eigen=False, parse_dos=False)
+    structure = v.final_structure
+    sg = SpacegroupAnalyzer(structure, 0.1)
+    return structure, sg.get_space_group_symbol()
+
+
+def get_structure_summary(path):
+    summary = load_prev_calc_summary(path)
+    return summary["structure"], summary["spacegroup"]
+
+
+def encode_dos_twice(dos):
+    dos = json.dumps(dos, cls=MontyEncoder)
+    return zlib.compress(json.dumps(dos, cls=MontyEncoder).encode(), True)
+
+
+def encode_dos_once(dos):
+    return zlib.compress(json.dumps(dos, cls=MontyEncoder).encode(), True)
+
+
+def timeit(func, *args, repeat=5):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(*args)
+    return (time.perf_counter() - start) / repeat, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("bandstructure_dir")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    calc_dir = tempfile.mkdtemp()
+    try:
+        for f in get_prev_calc_files(args.bandstructure_dir):
+            shutil.copy(f, calc_dir)
+        write_prev_calc_summary(VaspDrone().assimilate(calc_dir), calc_dir)
+
+        t_parsed, _ = timeit(get_structure_parsed, calc_dir, repeat=args.repeat)
+        t_summary, _ = timeit(get_structure_summary, calc_dir, repeat=args.repeat)
+        print("Structure and spacegroup: parsed {:.3f} s, summary {:.3f} s".format(
+            t_parsed, t_summary))
+    finally:
+        shutil.rmtree(calc_dir)
+
+    btrap_dir = os.path.join(args.bandstructure_dir, "boltztrap")
+    dos = BoltztrapAnalyzer.from_files(btrap_dir).as_dict()["dos"]
+    t_twice, data_twice = timeit(encode_dos_twice, dos, repeat=args.repeat)
+    t_once, data_once = timeit(encode_dos_once, dos, repeat=args.repeat)
+    print("DOS encoding: twice {:.3f} s ({} bytes), once {:.3f} s ({} bytes)".format(
+        t_twice, len(data_twice), t_once, len(data_once)))
@@ -0,0 +1,74 @@
+"""
+Benchmark the task lookup used by the powerups on a large generated workflow.
+
+Compares the indexed lookup of get_fws_and_tasks with the former lookup that
+stringified every task, e.g.:
+
+    python benchmark_powerups.py --nfws 300 --supercell 3
+"""
+
+import argparse
+import time
+
+from fireworks import Workflow
+from pymatgen.util.testing import PymatgenTest
+
+from atomate.utils.utils import get_fws_and_tasks
+from atomate.vasp.fireworks.core import OptimizeFW, StaticFW
+from atomate.vasp.powerups import (
+    add_common_powerups,
+    add_modify_incar,
+    use_custodian,
+    use_fake_vasp,
+)
+
+
+def get_large_wf(nfws, supercell):
+    structure = PymatgenTest.get_structure("Si") * supercell
+    fws = []
+    for i in range(nfws // 2):
+        opt = OptimizeFW(structure, name="structure optimization {}".format(i))
+        fws.extend([opt, StaticFW(structure, parents=opt, name="static {}".format(i))])
+    return Workflow(fws)
+
+
+def get_fws_and_tasks_str(workflow, fw_name_constraint=None, task_name_constraint=None):
+    # former implementation, matching the constraint against str(task)
+    fws_and_tasks = []
+    for idx_fw, fw in enumerate(workflow.fws):
+        if fw_name_constraint is None or fw_name_constraint in fw.name:
+            for idx_t, t in enumerate(fw.tasks):
+                if task_name_constraint is None or task_name_constraint in str(t):
+                    fws_and_tasks.append((idx_fw, idx_t))
+    return fws_and_tasks
+
+
+def timeit(func, *args, repeat=5, **kwargs):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(*args, **kwargs)
+    return (time.perf_counter() - start) / repeat
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--nfws", type=int, default=300)
+    parser.add_argument("--supercell", type=int, default=3)
+    args = parser.parse_args()
+
+    wf = get_large_wf(args.nfws, args.supercell)
+    ntasks = sum(len(fw.tasks) for fw in wf.fws)
+    print("Workflow with {} fireworks and {} tasks".format(len(wf.fws), ntasks))
+
+    for constraint in ["RunVasp", "WriteVasp", "VaspToDb"]:
+        t_str = timeit(get_fws_and_tasks_str, wf, task_name_constraint=constraint)
+        t_index = timeit(get_fws_and_tasks, wf, task_name_constraint=constraint)
+        print("{:>10}: str(task) {:.4f} s, index {:.4f} s".format(constraint, t_str, t_index))
+
+    start = time.perf_counter()
+    wf = add_common_powerups(wf, {"ADD_NAMEFILE": True, "SCRATCH_DIR": "/tmp",
+                                  "ADD_MODIFY_INCAR": True})
+    wf = use_custodian(wf, custodian_params={"vasp_cmd": "vasp"})
+    wf = add_modify_incar(wf, {"incar_update": {"NCORE": 4}})
+    wf = use_fake_vasp(wf, {"structure optimization": "opt", "static": "static"})
+    print("Powerups: {:.4f} s".format(time.perf_counter() - start))
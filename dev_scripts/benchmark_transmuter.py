@@ -0,0 +1,72 @@
+"""
+Microbenchmarks of the steps of WriteTransmutedStructureIOSet, comparing the
+cached transformation registry and the input set copy with the former module
+search and as_dict/from_dict round trip, e.g.:
+
+    python benchmark_transmuter.py --supercell 4 --repeat 200
+"""
+
+import argparse
+import time
+from importlib import import_module
+
+from pymatgen.io.vasp.sets import MPStaticSet
+from pymatgen.util.testing import PymatgenTest
+
+from atomate.vasp.firetasks.write_inputs import (
+    TRANSFORMATION_MODULES,
+    get_input_set_for_structure,
+    get_transformation_class,
+)
+
+
+def get_transformation_class_search(name):
+    # former implementation, searching the modules for every transformation
+    t_cls = None
+    for m in TRANSFORMATION_MODULES:
+        mod = import_module("pymatgen.transformations.{}".format(m))
+        t_cls = getattr(mod, name, t_cls)
+    return t_cls
+
+
+def get_input_set_for_structure_dict(vis, structure, **kwargs):
+    # former implementation, serializing the whole input set
+    vis_dict = vis.as_dict()
+    vis_dict["structure"] = structure.as_dict()
+    vis_dict.update(kwargs)
+    return vis.__class__.from_dict(vis_dict)
+
+
+def timeit(func, *args, repeat=100, **kwargs):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(*args, **kwargs)
+    return (time.perf_counter() - start) / repeat
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--supercell", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    names = ["SupercellTransformation", "DeformStructureTransformation",
+             "SubstitutionTransformation", "PerturbStructureTransformation"]
+    t_search = timeit(lambda: [get_transformation_class_search(n) for n in names],
+                      repeat=args.repeat)
+    t_registry = timeit(lambda: [get_transformation_class(n) for n in names],
+                        repeat=args.repeat)
+    print("Transformation lookup: module search {:.2e} s, registry {:.2e} s".format(
+        t_search, t_registry))
+
+    structure = PymatgenTest.get_structure("Si")
+    supercell = structure * args.supercell
+    vis = MPStaticSet(structure, lepsilon=True,
+                      user_incar_settings={"ENCUT": 600})
+    overrides = {"user_kpoints_settings": {"reciprocal_density": 200}}
+    t_dict = timeit(get_input_set_for_structure_dict, vis, supercell,
+                    repeat=args.repeat, **overrides)
+    t_copy = timeit(get_input_set_for_structure, vis, supercell,
+                    repeat=args.repeat, **overrides)
+    print("Input set for {} sites: as_dict/from_dict {:.2e} s, copy {:.2e} s".format(
+        len(supercell), t_dict, t_copy))
@@ -17,7 +17,7 @@ if __name__ == "__main__":
         author='Anubhav Jain, Kiran Mathew',
         author_email='anubhavster@gmail.com, kmathew@lbl.gov',
         license='modified BSD',
-        packages=find_packages(),
+        packages=find_packages(exclude=['benchmarks', 'benchmarks.*']),
         package_data={'atomate.vasp.workflows.base': ['library/*'],
                       'atomate.vasp.builders': ['*', 'examples/*']},
         zip_safe=False,